@@ -0,0 +1,184 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""免 root 的 ICMP 探测：一个 ``SOCK_DGRAM``/``IPPROTO_ICMP`` 套接字同时向多个目标发送回显请求。
+
+Linux 上普通用户可使用该类套接字的前提是所在组落在 ``net.ipv4.ping_group_range`` 内，
+macOS 默认允许；不可用时（Windows、容器内未放开等）由 ``native_icmp_available`` 返回 False，
+调用方回退到 ``ping`` 子进程。内核会把回显标识改写为套接字自身的端口，并只把属于本套接字的
+回包交给它，因此回包按 ``(源地址, seq)`` 匹配，载荷中的随机令牌用于丢弃过期或无关的报文。
+"""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import itertools
+import os
+import platform
+import socket
+import struct
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+_HEADER = struct.Struct("!BBHHH")
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident: int, seq: int, payload: bytes) -> bytes:
+    """构造 ICMP 回显请求报文（内核对 DGRAM 套接字会重算校验和，这里照常填写以兼容 macOS）。"""
+
+    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return _HEADER.pack(ICMP_ECHO_REQUEST, 0, _checksum(header + payload), ident, seq) + payload
+
+
+def parse_echo_reply(packet: bytes) -> Optional[Tuple[int, int, bytes]]:
+    """解析回显应答，返回 ``(ident, seq, payload)``；非回显应答返回 None。"""
+
+    # macOS 的 DGRAM 套接字会带上 IP 头，Linux 只返回 ICMP 部分
+    if len(packet) >= 20 and packet[0] >> 4 == 4:
+        packet = packet[(packet[0] & 0x0F) * 4 :]
+    if len(packet) < _HEADER.size:
+        return None
+    kind, _, _, ident, seq = _HEADER.unpack_from(packet)
+    if kind != ICMP_ECHO_REPLY:
+        return None
+    return ident, seq, packet[_HEADER.size :]
+
+
+def open_icmp_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    sock.setblocking(False)
+    return sock
+
+
+@lru_cache(maxsize=1)
+def native_icmp_available() -> bool:
+    """当前进程能否创建免 root 的 ICMP 套接字（Windows 的事件循环不支持 add_reader，直接返回 False）。"""
+
+    if platform.system().lower() == "windows":
+        return False
+    try:
+        open_icmp_socket().close()
+    except OSError:
+        return False
+    return True
+
+
+def ipv4_literal(host: str) -> Optional[str]:
+    try:
+        address = ipaddress.ip_address(str(host).strip())
+    except ValueError:
+        return None
+    return str(address) if address.version == 4 else None
+
+
+class AsyncIcmpPinger:
+    """在当前事件循环上共享一个 ICMP 套接字，``ping`` 可被大量协程同时调用。"""
+
+    def __init__(self, socket_factory: Callable[[], socket.socket] = open_icmp_socket) -> None:
+        self._socket_factory = socket_factory
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[Tuple[str, int], Tuple[asyncio.Future, float]] = {}
+        self._token = os.urandom(8)
+        self._ident = int.from_bytes(os.urandom(2), "big")
+        self._seq = itertools.cycle(range(1, 0x10000))
+
+    def open(self) -> "AsyncIcmpPinger":
+        """创建套接字并注册到正在运行的事件循环，创建失败时抛出 ``OSError``。"""
+
+        self._loop = asyncio.get_running_loop()
+        self._sock = self._socket_factory()
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        return self
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    async def __aenter__(self) -> "AsyncIcmpPinger":
+        return self.open()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                packet, address = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            received = time.perf_counter()
+            reply = parse_echo_reply(packet)
+            if reply is None or not reply[2].startswith(self._token):
+                continue
+            entry = self._pending.pop((address[0], reply[1]), None)
+            if entry is not None and not entry[0].done():
+                entry[0].set_result(received - entry[1])
+
+    def _next_seq(self, address: str) -> int:
+        for seq in self._seq:
+            if (address, seq) not in self._pending:
+                return seq
+        raise RuntimeError("unreachable")  # pragma: no cover - cycle 不会耗尽
+
+    async def ping(self, address: str, timeout: float = 1.0) -> Optional[float]:
+        """向 IPv4 地址发送一次回显请求，返回往返时间（秒），超时或发送失败返回 None。"""
+
+        if self._sock is None or self._loop is None:
+            raise RuntimeError("AsyncIcmpPinger 未打开")
+        seq = self._next_seq(address)
+        future = self._loop.create_future()
+        sent = time.perf_counter()
+        self._pending[(address, seq)] = (future, sent)
+        try:
+            self._sock.sendto(build_echo_request(self._ident, seq, self._token), (address, 0))
+            return await asyncio.wait_for(future, timeout=timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        finally:
+            self._pending.pop((address, seq), None)
+
+
+__all__ = [
+    "AsyncIcmpPinger",
+    "build_echo_request",
+    "ipv4_literal",
+    "native_icmp_available",
+    "open_icmp_socket",
+    "parse_echo_reply",
+]
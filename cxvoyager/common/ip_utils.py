@@ -56,26 +56,23 @@ def cidr_overlap(a: str, b: str) -> bool:
 
 
 def validate_cidrs(cidrs: Iterable[str]) -> Tuple[List[str], List[str], List[str]]:
+    from .address_index import AddressIndex
+
     ok: List[str] = []
     errors: List[str] = []
-    overlaps: List[str] = []
-    cidr_list = []
+    index = AddressIndex()
+    originals = {}
     for c in cidrs:
         if not c:
             continue
-        try:
-            net = parse_cidr(c)
-            cidr_list.append((c, net))
-            ok.append(c)
-        except Exception:
+        entry = index.add_network(c)
+        if entry is None:
             errors.append(f"非法CIDR: {c}")
-    # 重叠检查 O(n^2) 规模小可接受
-    for i in range(len(cidr_list)):
-        for j in range(i + 1, len(cidr_list)):
-            c1, n1 = cidr_list[i]
-            c2, n2 = cidr_list[j]
-            if n1.overlaps(n2):
-                overlaps.append(f"CIDR重叠: {c1} <-> {c2}")
+            continue
+        originals[entry.order] = c
+        ok.append(c)
+    # 重叠检查：按起点排序扫描，输出顺序与两两比较一致
+    overlaps = [f"CIDR重叠: {originals[a.order]} <-> {originals[b.order]}" for a, b in index.overlaps()]
     return ok, errors, overlaps
 
 
@@ -17,14 +17,20 @@
 """网络连通性与端口检测工具。"""
 from __future__ import annotations
 
+import asyncio
+import math
 import platform
+import re
 import socket
 import subprocess
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Any, Dict, Iterable, List, Literal, Optional
 
+from cxvoyager.common.icmp_pinger import AsyncIcmpPinger, ipv4_literal, native_icmp_available
+
 
 @dataclass
 class ProbeTask:
@@ -46,6 +52,7 @@ class ProbeResult:
     success: bool
     detail: str = ""
     elapsed: float = 0.0
+    rtt: Optional[float] = None  # ICMP 往返时间（秒）
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -58,25 +65,52 @@ class ProbeResult:
             "success": self.success,
             "detail": self.detail,
             "elapsed": self.elapsed,
+            "rtt": self.rtt,
         }
 
 
-def _build_ping_command(host: str, count: int, timeout: int) -> List[str]:
+_RTT_PATTERN = re.compile(r"time[=<]\s*([\d.]+)\s*ms", re.IGNORECASE)
+
+
+def _build_ping_command(host: str, count: int, timeout: float) -> List[str]:
     system = platform.system().lower()
     if system == "windows":
-        return ["ping", "-n", str(count), "-w", str(timeout * 1000), host]
-    return ["ping", "-c", str(count), "-W", str(timeout), host]
+        return ["ping", "-n", str(count), "-w", str(max(1, int(timeout * 1000))), host]
+    # Linux/macOS 的 ping -W 以整秒计
+    return ["ping", "-c", str(count), "-W", str(max(1, math.ceil(timeout))), host]
 
 
-def ping(host: str, count: int = 1, timeout: int = 1) -> bool:
-    """执行 ICMP 探测，返回是否连通。"""
+def _subprocess_ping(host: str, count: int = 1, timeout: float = 1.0) -> Optional[float]:
+    """调用系统 ping 命令，连通时返回往返时间（秒，无法从输出解析时取命令耗时），否则返回 None。"""
 
+    start = time.perf_counter()
     try:
-        command = _build_ping_command(host, count, timeout)
-        result = subprocess.run(command, capture_output=True, text=True)
-        return result.returncode == 0
+        result = subprocess.run(_build_ping_command(host, count, timeout), capture_output=True, text=True)
     except Exception:
-        return False
+        return None
+    if result.returncode != 0:
+        return None
+    match = _RTT_PATTERN.search(result.stdout or "")
+    return float(match.group(1)) / 1000 if match else time.perf_counter() - start
+
+
+def ping(host: str, count: int = 1, timeout: float = 1.0) -> bool:
+    """执行 ICMP 探测，返回是否连通。"""
+
+    return ping_many([host], count=count, timeout=timeout)[host] is not None
+
+
+def ping_many(hosts: Iterable[str], *, count: int = 1, timeout: float = 1.0) -> Dict[str, Optional[float]]:
+    """同时向多个目标发送 ICMP 回显请求，返回 ``{目标: 往返时间（秒）或 None}``。
+
+    每个目标最多发送 ``count`` 次，收到任一应答即视为连通。可创建免 root ICMP 套接字时
+    全部目标共用一个套接字，否则回退到 ``ping`` 子进程。
+    """
+
+    targets = list(dict.fromkeys(hosts))
+    if not targets:
+        return {}
+    return _run_coroutine(_ping_many_async(targets, count, timeout))
 
 
 def check_port(host: str, port: int, timeout: float = 1.0) -> bool:
@@ -90,17 +124,9 @@ def check_port(host: str, port: int, timeout: float = 1.0) -> bool:
 
 
 def probe_icmp(host: str, timeout: float = 1.0, *, retries: int = 0) -> ProbeResult:
-    """ICMP 探测封装，带重试与耗时统计。"""
+    """ICMP 探测封装，带重试、耗时与往返时间统计。"""
 
-    task = ProbeTask(target=host, kind="icmp", timeout=timeout, retries=retries)
-    start = time.perf_counter()
-    for attempt in range(retries + 1):
-        if ping(host, timeout=int(timeout)):
-            elapsed = time.perf_counter() - start
-            return ProbeResult(task=task, success=True, elapsed=elapsed)
-        time.sleep(0.05)
-    elapsed = time.perf_counter() - start
-    return ProbeResult(task=task, success=False, elapsed=elapsed, detail="icmp unreachable")
+    return run_probe_tasks([ProbeTask(target=host, kind="icmp", timeout=timeout, retries=retries)], max_workers=1)[0]
 
 
 def probe_tcp(host: str, port: int, timeout: float = 1.0, *, retries: int = 0) -> ProbeResult:
@@ -117,57 +143,206 @@ def probe_tcp(host: str, port: int, timeout: float = 1.0, *, retries: int = 0) -
     return ProbeResult(task=task, success=False, elapsed=elapsed, detail=f"tcp {port} unreachable")
 
 
+# 回退到 ping 子进程时，单独限制占用的线程数
+_BLOCKING_PROBE_THREADS = 32
+# 预留给日志、数据库与 HTTP 客户端等的文件描述符
+_RESERVED_FDS = 64
+
+
+def probe_fd_budget() -> int:
+    """可同时用于探测连接的文件描述符数量（进程软限制扣除预留后的一半，无法获取时取 256）。"""
+
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return 256
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return 4096
+    return max(16, (int(soft) - _RESERVED_FDS) // 2)
+
+
+async def _async_tcp_attempt(host: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await asyncio.wait_for(writer.wait_closed(), timeout=timeout)
+    except (OSError, asyncio.TimeoutError):
+        pass
+    return True
+
+
+async def probe_tcp_async(host: str, port: int, timeout: float = 1.0, *, retries: int = 0) -> ProbeResult:
+    """``probe_tcp`` 的协程版本：每次尝试各自有独立的超时，不占用线程。"""
+
+    task = ProbeTask(target=host, kind="tcp", port=port, timeout=timeout, retries=retries)
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        if await _async_tcp_attempt(host, port, timeout):
+            return ProbeResult(task=task, success=True, elapsed=time.perf_counter() - start)
+        if attempt < retries:
+            await asyncio.sleep(0.05)
+    return ProbeResult(task=task, success=False, elapsed=time.perf_counter() - start, detail=f"tcp {port} unreachable")
+
+
+def _open_pinger() -> Optional[AsyncIcmpPinger]:
+    """在当前事件循环上打开共享的 ICMP 套接字，不可用时返回 None（回退到子进程）。"""
+
+    if not native_icmp_available():
+        return None
+    try:
+        return AsyncIcmpPinger().open()
+    except OSError:
+        return None
+
+
+async def _resolve_ipv4(host: str) -> Optional[str]:
+    address = ipv4_literal(host)
+    if address is not None or ":" in host:
+        return address
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+    except OSError:
+        return None
+    return infos[0][4][0] if infos else None
+
+
+async def _icmp_attempt(
+    host: str,
+    timeout: float,
+    pinger: Optional[AsyncIcmpPinger],
+    executor: ThreadPoolExecutor,
+) -> Optional[float]:
+    address = await _resolve_ipv4(host) if pinger is not None else None
+    if address is None:
+        # 无原生套接字、IPv6 或无法解析为 IPv4 的目标交给系统 ping
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(_subprocess_ping, host, 1, timeout))
+    return await pinger.ping(address, timeout)
+
+
+async def probe_icmp_async(
+    host: str,
+    timeout: float = 1.0,
+    *,
+    retries: int = 0,
+    pinger: Optional[AsyncIcmpPinger] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> ProbeResult:
+    """``probe_icmp`` 的协程版本；传入 ``pinger`` 时经共享的 ICMP 套接字发送，超时可小于 1 秒。"""
+
+    task = ProbeTask(target=host, kind="icmp", timeout=timeout, retries=retries)
+    start = time.perf_counter()
+    owns_executor = executor is None
+    executor = executor or ThreadPoolExecutor(max_workers=1)
+    try:
+        for attempt in range(retries + 1):
+            rtt = await _icmp_attempt(host, timeout, pinger, executor)
+            if rtt is not None:
+                return ProbeResult(task=task, success=True, elapsed=time.perf_counter() - start, rtt=rtt)
+            if attempt < retries:
+                await asyncio.sleep(0.05)
+    finally:
+        if owns_executor:
+            executor.shutdown(wait=False)
+    return ProbeResult(task=task, success=False, elapsed=time.perf_counter() - start, detail="icmp unreachable")
+
+
+async def _ping_many_async(hosts: List[str], count: int, timeout: float) -> Dict[str, Optional[float]]:
+    pinger = _open_pinger()
+    blocking = ThreadPoolExecutor(max_workers=max(1, min(len(hosts), _BLOCKING_PROBE_THREADS)))
+    try:
+        results = await asyncio.gather(
+            *(probe_icmp_async(host, timeout, retries=count - 1, pinger=pinger, executor=blocking) for host in hosts)
+        )
+    finally:
+        if pinger is not None:
+            pinger.close()
+        blocking.shutdown(wait=False)
+    return {host: result.rtt for host, result in zip(hosts, results)}
+
+
+async def _run_probe_tasks_async(task_list: List[ProbeTask], concurrency: int, logger=None) -> List[ProbeResult]:
+    limit = asyncio.Semaphore(concurrency)
+    blocking = ThreadPoolExecutor(max_workers=max(1, min(concurrency, _BLOCKING_PROBE_THREADS)))
+    pinger = _open_pinger() if any(task.kind == "icmp" for task in task_list) else None
+
+    async def _execute(task: ProbeTask) -> ProbeResult:
+        async with limit:
+            try:
+                if task.kind == "icmp":
+                    result = await probe_icmp_async(
+                        task.target, task.timeout, retries=task.retries, pinger=pinger, executor=blocking
+                    )
+                elif task.kind == "tcp":
+                    if task.port is None:
+                        raise ValueError("TCP 探测需要指定端口")
+                    result = await probe_tcp_async(task.target, task.port, timeout=task.timeout, retries=task.retries)
+                else:
+                    raise ValueError(f"未知探测类型: {task.kind}")
+            except Exception as exc:  # noqa: BLE001 - 捕获执行异常
+                result = ProbeResult(task=task, success=False, detail=str(exc) or "probe failed")
+        # 返回调用方传入的任务对象，保留 metadata
+        result.task = task
+        if logger and hasattr(logger, "debug"):
+            logger.debug("探测结果", extra={"probe": result.to_dict()})
+        return result
+
+    try:
+        return list(await asyncio.gather(*(_execute(task) for task in task_list)))
+    finally:
+        if pinger is not None:
+            pinger.close()
+        blocking.shutdown(wait=False)
+
+
+def _run_coroutine(coro):
+    """在当前线程运行协程；若当前线程已有事件循环在运行，则放到独立线程中执行。"""
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
 def run_probe_tasks(
     tasks: Iterable[ProbeTask],
     *,
     max_workers: int = 8,
     logger=None,
 ) -> List[ProbeResult]:
-    """并发执行探测任务，返回所有结果。
+    """并发执行探测任务，按任务顺序返回所有结果。
+
+    探测在 asyncio 事件循环中执行：TCP 探测使用 ``asyncio.open_connection``，ICMP 探测共用一个
+    免 root ICMP 套接字（不可用时回退到 ``ping`` 子进程），同时在途的数量可达数百上千，
+    整体耗时约为一个超时周期。
 
     :param tasks: 待执行的探测任务集合。
-    :param max_workers: 线程池并发度，默认 8。
+    :param max_workers: 同时在途的探测数量上限，受进程文件描述符限制（见 ``probe_fd_budget``）。
     :param logger: 可选日志记录器，若提供且为 DEBUG 级别，将输出探测详情。
     """
 
     task_list = list(tasks)
     if not task_list:
         return []
-
-    results: List[ProbeResult] = []
-
-    def _execute(task: ProbeTask) -> ProbeResult:
-        if task.kind == "icmp":
-            return probe_icmp(task.target, timeout=task.timeout, retries=task.retries)
-        if task.kind == "tcp":
-            if task.port is None:
-                raise ValueError("TCP 探测需要指定端口")
-            return probe_tcp(task.target, task.port, timeout=task.timeout, retries=task.retries)
-        raise ValueError(f"未知探测类型: {task.kind}")
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_execute, task): task for task in task_list}
-        for future in as_completed(futures):
-            task = futures[future]
-            try:
-                result = future.result()
-            except Exception as exc:  # noqa: BLE001 - 捕获执行异常
-                detail = str(exc) or "probe failed"
-                result = ProbeResult(task=task, success=False, detail=detail)
-            results.append(result)
-            if logger and hasattr(logger, "debug"):
-                logger.debug("探测结果", extra={"probe": result.to_dict()})
-    return results
+    concurrency = max(1, min(max_workers, probe_fd_budget(), len(task_list)))
+    return _run_coroutine(_run_probe_tasks_async(task_list, concurrency, logger))
 
 
 def batch_connectivity(hosts: List[str], ports: List[int]) -> Dict[str, Dict[int, bool]]:
     """兼容旧接口的批量连通性检测。"""
 
     report: Dict[str, Dict[int, bool]] = {}
+    alive = ping_many(hosts)
     for h in hosts:
         report[h] = {}
-        alive = ping(h)
-        if not alive:
+        if alive.get(h) is None:
             report[h][-1] = False  # -1 代表ICMP失败
             continue
         for p in ports:
@@ -0,0 +1,427 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""多集群批量部署：每份规划表在独立进程中执行完整工作流。"""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Event
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence
+
+from cxvoyager.common.config import load_config
+from cxvoyager.common.system_constants import PLAN_KEYWORDS, PROJECT_ROOT
+from cxvoyager.core.deployment.deployment_executor import RunOptions, execute_run
+from cxvoyager.core.deployment.stage_manager import Stage
+from cxvoyager.integrations.excel.compiled_plan import COMPILED_PLAN_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_ROOT = PROJECT_ROOT / "artifacts" / "batch"
+BATCH_LOG_FILE = "cxvoyager.log"
+BATCH_RESULT_FILE = "result.json"
+BATCH_SUMMARY_FILE = "batch-summary.json"
+
+BatchEventCallback = Callable[[str, "BatchItem", Dict[str, Any] | None], None]
+
+
+@dataclass
+class BatchItem:
+    """批量任务中的单个集群。"""
+
+    index: int
+    plan_file: Path
+    work_dir: Path
+    cluster_name: str | None = None
+    cloudtower_ip: str | None = None
+    error: str | None = None
+
+    @property
+    def label(self) -> str:
+        return self.cluster_name or self.plan_file.stem
+
+
+@dataclass
+class BatchItemResult:
+    plan_file: str
+    cluster_name: str | None
+    cloudtower_ip: str | None
+    work_dir: str
+    status: str
+    duration: float = 0.0
+    error: str | None = None
+    result: Dict[str, Any] | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plan_file": self.plan_file,
+            "cluster_name": self.cluster_name,
+            "cloudtower_ip": self.cloudtower_ip,
+            "work_dir": self.work_dir,
+            "status": self.status,
+            "duration": round(self.duration, 3),
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+@dataclass
+class BatchResult:
+    output_dir: Path
+    started_at: datetime
+    finished_at: datetime
+    items: List[BatchItemResult] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(item.status == "ok" for item in self.items)
+
+    def to_dict(self) -> Dict[str, Any]:
+        succeeded = sum(1 for item in self.items if item.status == "ok")
+        return {
+            "ok": self.ok,
+            "output_dir": str(self.output_dir),
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat(),
+            "total": len(self.items),
+            "succeeded": succeeded,
+            "failed": len(self.items) - succeeded,
+            "items": [item.to_dict() for item in self.items],
+        }
+
+
+def resolve_batch_limits(
+    cfg: Mapping[str, Any] | None = None,
+    *,
+    max_parallel: int | None = None,
+    per_cloudtower_limit: int | None = None,
+) -> tuple[int, int]:
+    """合并显式参数与配置 ``batch`` 段，返回 (全局并发, 单 CloudTower 并发)。"""
+
+    data = cfg if isinstance(cfg, Mapping) else load_config()
+    batch_cfg = data.get("batch", {}) if isinstance(data, Mapping) else {}
+    if not isinstance(batch_cfg, Mapping):
+        batch_cfg = {}
+    parallel = max_parallel if max_parallel is not None else int(batch_cfg.get("max_parallel", 4) or 1)
+    per_tower = (
+        per_cloudtower_limit
+        if per_cloudtower_limit is not None
+        else int(batch_cfg.get("per_cloudtower_limit", 1) or 1)
+    )
+    return max(1, int(parallel)), max(1, int(per_tower))
+
+
+def collect_plan_files(sources: Iterable[str | Path]) -> List[Path]:
+    """展开文件、目录与 glob 模式，返回去重后的规划表列表。
+
+    目录中选取文件名包含 ``PLAN_KEYWORDS`` 的工作簿与 ``*.plan.json`` JSON 规划，显式给出的文件不做关键词限制。
+    """
+
+    found: List[Path] = []
+    seen: set[Path] = set()
+
+    def _add(path: Path) -> None:
+        resolved = path.resolve()
+        if resolved in seen or path.name.startswith("~$"):
+            return
+        seen.add(resolved)
+        found.append(resolved)
+
+    for source in sources:
+        text = str(source)
+        path = Path(text)
+        if path.is_dir():
+            for candidate in sorted(path.glob("*.xlsx")):
+                if all(keyword in candidate.name for keyword in PLAN_KEYWORDS):
+                    _add(candidate)
+            for candidate in sorted(path.glob(f"*{COMPILED_PLAN_SUFFIX}")):
+                _add(candidate)
+        elif path.is_file():
+            _add(path)
+        elif any(ch in text for ch in "*?["):
+            anchor = Path(text).anchor
+            pattern = text[len(anchor):] if anchor else text
+            base = Path(anchor) if anchor else Path.cwd()
+            for candidate in sorted(base.glob(pattern)):
+                if candidate.is_file() and candidate.suffix.lower() in {".xlsx", ".json"}:
+                    _add(candidate)
+        else:
+            logger.warning("批量部署忽略不存在的规划表路径: %s", text)
+    return found
+
+
+def _slugify(text: str) -> str:
+    slug = re.sub(r"[^\w.-]+", "-", text, flags=re.UNICODE).strip("-")
+    return slug or "plan"
+
+
+def _inspect_plan(plan_file: Path) -> tuple[str | None, str | None]:
+    """读取集群名称与 CloudTower IP，用于命名工作目录与资源限流。"""
+
+    from cxvoyager.integrations.excel.planning_sheet_parser import parse_plan
+
+    parsed = parse_plan(plan_file)
+    variables = parsed.get("variables", {}) if isinstance(parsed, dict) else {}
+    mgmt_records = parsed.get("mgmt", {}).get("records", []) if isinstance(parsed.get("mgmt"), dict) else []
+    cloudtower_ip = mgmt_records[0].get("Cloudtower IP") if mgmt_records else None
+    cluster_name = variables.get("CLUSTER_NAME") or variables.get("HOST_CLUSTER_NAME")
+    return (
+        str(cluster_name) if cluster_name else None,
+        str(cloudtower_ip) if cloudtower_ip else None,
+    )
+
+
+def _configure_item_logging(log_file: Path, log_level: str) -> None:
+    """将当前进程的根日志重定向到集群专属日志文件。"""
+
+    level = getattr(logging, str(log_level).upper(), logging.INFO)
+    fmt = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+    handler = logging.FileHandler(log_file, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(fmt, "%Y-%m-%d %H:%M:%S"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+def run_batch_item(
+    plan_file: str,
+    stage_names: Sequence[str],
+    options: Dict[str, Any],
+    work_dir: str,
+    log_level: str = "INFO",
+) -> Dict[str, Any]:
+    """在工作进程内执行单个集群的工作流（需可被 pickle，供进程池调用）。
+
+    进程工作目录切换到集群专属目录，阶段写入的相对路径构件与日志彼此隔离；规划表通过
+    ``plan_source`` 固定，部署载荷与巡检报告写入集群目录下的 ``artifacts``；
+    异常被捕获并转换为结果字典，保证单个集群失败不会影响进程池中的其他任务。
+    """
+
+    target = Path(work_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    os.chdir(target)
+    _configure_item_logging(target / BATCH_LOG_FILE, log_level)
+    started = time.perf_counter()
+    try:
+        result = execute_run(
+            [Stage(name) for name in stage_names],
+            RunOptions(**options),
+            plan_file=Path(plan_file),
+            work_dir=Path(plan_file).parent,
+            artifact_dir=target / "artifacts",
+            configure_logging=False,
+        )
+        outcome: Dict[str, Any] = {"status": "ok", "result": result.to_dict()}
+    except Exception as exc:  # noqa: BLE001 - 转换为结果，不向进程池抛出
+        logging.getLogger(__name__).exception("集群工作流执行失败: %s", plan_file)
+        outcome = {"status": "failed", "error": str(exc) or exc.__class__.__name__, "traceback": traceback.format_exc()}
+    outcome["duration"] = time.perf_counter() - started
+    try:
+        (target / BATCH_RESULT_FILE).write_text(
+            json.dumps(outcome, ensure_ascii=False, indent=2, default=str), encoding="utf-8"
+        )
+    except OSError:  # pragma: no cover - filesystem interaction
+        logging.getLogger(__name__).exception("写入集群结果失败: %s", target)
+    return outcome
+
+
+def describe_batch_event(event: str, item: BatchItem, outcome: Dict[str, Any] | None) -> Dict[str, Any]:
+    """把调度事件转换为任务进度消息（Web 任务与分布式工作者共用）。"""
+
+    level = "info"
+    if event == "start":
+        message = f"集群 {item.label} 开始部署"
+    elif event == "complete":
+        message = f"集群 {item.label} 部署完成"
+    else:
+        level = "error"
+        message = f"集群 {item.label} 部署失败: {(outcome or {}).get('error')}"
+    return {
+        "message": message,
+        "stage": None,
+        "level": level,
+        "extra": {"plan_file": str(item.plan_file), "cloudtower_ip": item.cloudtower_ip, "event": event},
+    }
+
+
+def _default_executor(max_workers: int) -> Executor:
+    # spawn 避免在多线程的 Web 进程中 fork 带锁状态
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_batch(
+    plan_files: Sequence[str | Path],
+    stages: Sequence[Stage],
+    options: RunOptions | None = None,
+    *,
+    max_parallel: int | None = None,
+    per_cloudtower_limit: int | None = None,
+    output_dir: Path | None = None,
+    log_level: str | None = None,
+    executor: Executor | None = None,
+    runner: Callable[..., Dict[str, Any]] = run_batch_item,
+    event_callback: BatchEventCallback | None = None,
+    abort_signal: Event | None = None,
+) -> BatchResult:
+    """并行执行多份规划表，单个集群失败不影响其余集群。
+
+    调度器按提交顺序挑选可运行的集群：全局并发不超过 ``max_parallel``，
+    同一 CloudTower 上同时运行的集群不超过 ``per_cloudtower_limit``，
+    被限流的集群不会阻塞其他 CloudTower 的集群（无队头阻塞）。
+    ``abort_signal`` 置位后不再启动新的集群，已在运行的集群执行至结束。
+    """
+
+    cfg = load_config()
+    parallel, per_tower = resolve_batch_limits(cfg, max_parallel=max_parallel, per_cloudtower_limit=per_cloudtower_limit)
+    stage_names = [stage.value if isinstance(stage, Stage) else str(stage) for stage in stages]
+    option_dict = (options or RunOptions()).to_dict()
+    if log_level is None:
+        logging_cfg = cfg.get("logging", {}) if isinstance(cfg, Mapping) else {}
+        debug = option_dict.get("debug")
+        log_level = "DEBUG" if debug else str(logging_cfg.get("level", "INFO")).upper()
+
+    started_at = datetime.now(timezone.utc)
+    if output_dir is None:
+        batch_cfg = cfg.get("batch", {}) if isinstance(cfg, Mapping) else {}
+        configured = batch_cfg.get("output_dir") if isinstance(batch_cfg, Mapping) else None
+        base = Path(configured) if configured else DEFAULT_BATCH_ROOT
+        output_dir = base / started_at.strftime("%Y%m%d-%H%M%S")
+    root = Path(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+
+    plan_paths = [Path(raw).resolve() for raw in plan_files]
+    results: Dict[int, BatchItemResult] = {}
+    items: List[BatchItem] = []
+
+    def _finish(item: BatchItem, outcome: Dict[str, Any]) -> None:
+        results[item.index] = BatchItemResult(
+            plan_file=str(item.plan_file),
+            cluster_name=item.cluster_name,
+            cloudtower_ip=item.cloudtower_ip,
+            work_dir=str(item.work_dir),
+            status=str(outcome.get("status") or "failed"),
+            duration=float(outcome.get("duration") or 0.0),
+            error=outcome.get("error"),
+            result=outcome.get("result"),
+        )
+        event = "complete" if results[item.index].status == "ok" else "failed"
+        logger.info(
+            "批量部署集群 %s %s，用时 %.2fs",
+            item.label,
+            "完成" if event == "complete" else f"失败: {outcome.get('error')}",
+            results[item.index].duration,
+        )
+        if event_callback:
+            event_callback(event, item, results[item.index].to_dict())
+
+    owns_executor = executor is None
+    pool = executor or _default_executor(min(parallel, max(1, len(plan_paths))))
+    running: Dict[Future, BatchItem] = {}
+    tower_load: Dict[str, int] = {}
+    try:
+        # 规划表解析同样提交到进程池：Web 进程内只负责调度，不在 API 进程中占用 GIL 解析 Excel
+        inspections = [pool.submit(_inspect_plan, plan_path) for plan_path in plan_paths]
+        pending: List[BatchItem] = []
+        for index, (plan_path, inspection) in enumerate(zip(plan_paths, inspections), start=1):
+            item = BatchItem(index=index, plan_file=plan_path, work_dir=root)
+            try:
+                item.cluster_name, item.cloudtower_ip = inspection.result()
+            except Exception as exc:  # noqa: BLE001 - 规划表无法解析时直接记为失败
+                item.error = f"规划表解析失败: {exc}"
+            item.work_dir = root / f"{index:02d}-{_slugify(item.label)}"
+            items.append(item)
+        for item in items:
+            if item.error:
+                _finish(item, {"status": "failed", "error": item.error})
+            else:
+                pending.append(item)
+
+        logger.info(
+            "批量部署开始：集群=%d，阶段=%s，全局并发=%d，单 CloudTower 并发=%d，输出目录=%s",
+            len(items),
+            stage_names,
+            parallel,
+            per_tower,
+            root,
+        )
+
+        while pending or running:
+            if abort_signal is not None and abort_signal.is_set() and pending:
+                for item in pending:
+                    _finish(item, {"status": "aborted", "error": "批量任务已被终止"})
+                pending.clear()
+            for item in list(pending):
+                if len(running) >= parallel:
+                    break
+                key = item.cloudtower_ip
+                if key and tower_load.get(key, 0) >= per_tower:
+                    continue
+                pending.remove(item)
+                if key:
+                    tower_load[key] = tower_load.get(key, 0) + 1
+                logger.info("批量部署启动集群 %s（CloudTower=%s）", item.label, key or "-")
+                if event_callback:
+                    event_callback("start", item, None)
+                future = pool.submit(runner, str(item.plan_file), stage_names, option_dict, str(item.work_dir), log_level)
+                running[future] = item
+            if not running:  # pragma: no cover - 防御：限流配置导致无法调度
+                break
+            done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+            for future in done:
+                item = running.pop(future)
+                if item.cloudtower_ip:
+                    tower_load[item.cloudtower_ip] -= 1
+                try:
+                    outcome = future.result()
+                except Exception as exc:  # noqa: BLE001 - 工作进程崩溃等
+                    outcome = {"status": "failed", "error": str(exc) or exc.__class__.__name__}
+                _finish(item, outcome)
+    finally:
+        if owns_executor:
+            pool.shutdown(wait=True)
+
+    batch = BatchResult(
+        output_dir=root,
+        started_at=started_at,
+        finished_at=datetime.now(timezone.utc),
+        items=[results[item.index] for item in items],
+    )
+    try:
+        (root / BATCH_SUMMARY_FILE).write_text(
+            json.dumps(batch.to_dict(), ensure_ascii=False, indent=2, default=str), encoding="utf-8"
+        )
+    except OSError:  # pragma: no cover - filesystem interaction
+        logger.exception("写入批量部署汇总失败: %s", root)
+    return batch
+
+
+__all__ = [
+    "BatchItem",
+    "BatchItemResult",
+    "BatchResult",
+    "collect_plan_files",
+    "describe_batch_event",
+    "resolve_batch_limits",
+    "run_batch",
+    "run_batch_item",
+]
@@ -20,6 +20,7 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
+from pathlib import Path
 from threading import Event
 from typing import Any, Callable, Dict, Iterable, List, Sequence
 
@@ -27,7 +28,20 @@ from cxvoyager.common.config import Config, load_config
 from cxvoyager.common.i18n import tr
 from cxvoyager.common.system_constants import DEFAULT_CONFIG_FILE
 from cxvoyager.common.logging_config import setup_logging
+from cxvoyager.core.deployment.progress import (
+    PROGRESS_MESSAGES_KEY,
+    PROGRESS_PAYLOAD_STORE_KEY,
+    ProgressBuffer,
+    resolve_progress_payload_store,
+    resolve_progress_retention,
+)
+from cxvoyager.core.deployment.plan_checkpoint import record_run_checkpoint
 from cxvoyager.core.deployment.runtime_context import RunContext
+from cxvoyager.integrations.excel.plan_writeback import (
+    PLAN_WRITEBACK_KEY,
+    PlanWriteBackJournal,
+    flush_plan_writeback,
+)
 from cxvoyager.core.deployment.stage_manager import (
     Stage,
     StageInfo,
@@ -111,12 +125,25 @@ def execute_run(
     options: RunOptions | None = None,
     progress_callback: Callable[[str, Stage, RunContext | None], None] | None = None,
     abort_signal: Event | None = None,
+    *,
+    plan_file: Path | None = None,
+    work_dir: Path | None = None,
+    artifact_dir: Path | None = None,
+    configure_logging: bool = True,
 ) -> RunResult:
-    """Execute the deployment workflow for the requested stages."""
+    """Execute the deployment workflow for the requested stages.
+
+    ``plan_file`` pins the planning sheet instead of searching ``work_dir``;
+    ``artifact_dir`` redirects generated payloads and reports (default: the
+    project ``artifacts`` directory / ``work_dir``);
+    ``configure_logging=False`` leaves the caller's logging setup untouched
+    (used by the batch runner, which routes each cluster to its own log file).
+    """
 
     cfg = load_config(DEFAULT_CONFIG_FILE)
     effective = _resolve_effective_options(cfg, options)
-    setup_logging(effective.log_level)
+    if configure_logging:
+        setup_logging(effective.log_level)
 
     stage_names = [stage.value if isinstance(stage, Stage) else str(stage) for stage in stages]
     logger.info(tr("deploy.executor.load_config", path=DEFAULT_CONFIG_FILE))
@@ -124,6 +151,12 @@ def execute_run(
     logger.info(tr("deploy.executor.options", options=effective.to_dict()))
 
     ctx = RunContext(config=cfg)
+    if work_dir is not None:
+        ctx.work_dir = Path(work_dir)
+    if plan_file is not None:
+        ctx.extra["plan_source"] = str(plan_file)
+    if artifact_dir is not None:
+        ctx.extra["artifact_dir"] = str(artifact_dir)
     ctx.extra.setdefault("cli_options", {})
     ctx.extra["cli_options"].update(
         {
@@ -133,6 +166,11 @@ def execute_run(
         }
     )
     ctx.extra["selected_stages"] = [stage.value if isinstance(stage, Stage) else str(stage) for stage in stages]
+    # 进度消息按级别限额保留在内存中，超出部分写入日志，长时间运行内存保持平稳
+    ctx.extra[PROGRESS_MESSAGES_KEY] = ProgressBuffer(retention=resolve_progress_retention(cfg))
+    ctx.extra[PROGRESS_PAYLOAD_STORE_KEY] = resolve_progress_payload_store(cfg)
+    # 各阶段的规划表回写先登记，运行结束时每个文件只加载、保存一次
+    ctx.extra[PLAN_WRITEBACK_KEY] = PlanWriteBackJournal()
 
     started = datetime.now(timezone.utc)
 
@@ -140,7 +178,13 @@ def execute_run(
     if abort_signal is not None:
         ctx.extra.setdefault("abort_signal", abort_signal)
 
-    run_stages(list(stages), ctx={"ctx": ctx}, progress_callback=progress_callback, abort_signal=abort_signal)
+    try:
+        run_stages(list(stages), ctx={"ctx": ctx}, progress_callback=progress_callback, abort_signal=abort_signal)
+    finally:
+        # 阶段失败或中止时同样写回已得到的结果（如已生成的序列号）
+        ctx.extra["plan_writeback_results"] = flush_plan_writeback(ctx)
+        if not effective.dry_run:
+            _record_checkpoint(ctx)
 
     finished = datetime.now(timezone.utc)
     summary = _build_summary(ctx)
@@ -191,6 +235,21 @@ def _resolve_effective_options(cfg: Config, options: RunOptions | None) -> Effec
     return resolved
 
 
+def _record_checkpoint(ctx: RunContext) -> None:
+    """记录本次成功完成的阶段及所用规划表的分段指纹，供 ``diff`` 判断需要重跑的部分。"""
+
+    parsed = ctx.extra.get("parsed_plan")
+    if not ctx.completed_stages or not isinstance(parsed, dict):
+        return
+    source = parsed.get("_meta", {}).get("source_file")
+    if not source:
+        return
+    try:
+        record_run_checkpoint(source, parsed, ctx.completed_stages)
+    except Exception as exc:  # noqa: BLE001 - 检查点失败不影响运行结果
+        logger.warning("记录运行检查点失败: %s", exc)
+
+
 def _build_summary(ctx: RunContext) -> Dict[str, Any]:
     precheck = ctx.extra.get("precheck", {})
     report = precheck.get("report", {})
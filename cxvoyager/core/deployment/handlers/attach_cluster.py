@@ -59,7 +59,9 @@ def _ensure_plan_for_attach(ctx: RunContext, stage_logger: logging.LoggerAdapter
 
     try:
         base_dir = ctx.work_dir if hasattr(ctx, "work_dir") and isinstance(ctx.work_dir, Path) else Path.cwd()
-        plan_path = find_plan_file(base_dir=base_dir)
+        # 批量部署等场景通过 plan_source 指定规划表，优先于在工作目录中查找
+        plan_source = ctx.extra.get('plan_source') if isinstance(ctx.extra, dict) else None
+        plan_path = Path(str(plan_source)) if plan_source else find_plan_file(base_dir=base_dir)
         if plan_path:
             parsed_plan = parse_plan(plan_path)
             plan_model = to_model(parsed_plan)
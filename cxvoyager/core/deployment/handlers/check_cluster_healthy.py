@@ -412,6 +412,9 @@ def _resolve_artifact_dir(ctx: RunContext, stage_cfg: Dict[str, Any]) -> Path:
         if not path.is_absolute():
             return (ctx.work_dir or Path.cwd()) / path
         return path
+    # 运行指定了构件目录（如批量部署的集群目录）时写入该目录
+    if isinstance(ctx.extra, dict) and ctx.extra.get('artifact_dir'):
+        return Path(str(ctx.extra['artifact_dir']))
     # 默认写入项目根目录（工作目录），不再额外创建 artifacts 子目录
     return ctx.work_dir or Path.cwd()
 
@@ -443,7 +446,9 @@ def _ensure_plan_for_inspector(ctx: RunContext, stage_logger: logging.LoggerAdap
 
     try:
         base_dir = ctx.work_dir if hasattr(ctx, "work_dir") and ctx.work_dir else Path.cwd()
-        plan_path = find_plan_file(base_dir=base_dir)
+        # 批量部署等场景通过 plan_source 指定规划表，优先于在工作目录中查找
+        plan_source = ctx.extra.get('plan_source') if isinstance(ctx.extra, dict) else None
+        plan_path = Path(str(plan_source)) if plan_source else find_plan_file(base_dir=base_dir)
         if plan_path:
             parsed_plan = parse_plan(plan_path)
             plan_model = to_model(parsed_plan)
@@ -26,7 +26,6 @@ import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, cast
 
-import openpyxl
 
 from cxvoyager.core.deployment.handlers.init_cluster import _resolve_deployment_base
 from cxvoyager.core.deployment.stage_manager import Stage, stage_handler
@@ -38,9 +37,12 @@ from cxvoyager.common.parallel_utils import parallel_map
 from cxvoyager.common.i18n import tr
 from cxvoyager.integrations.smartx.api_client import APIClient, APIError
 from cxvoyager.integrations.excel import field_variables as plan_vars
+from cxvoyager.integrations.excel.plan_writeback import queue_plan_update
 
 logger = logging.getLogger(__name__)
 DEFAULT_SVT_CHUNK_SIZE = 8 * 1024 * 1024
+_JOB_DONE_STATES = {"done", "success", "succeed", "finished"}
+_JOB_FAILED_STATES = {"failed", "error", "aborted"}
 
 
 @stage_handler(Stage.config_cluster)
@@ -369,40 +371,16 @@ def run_config_cluster_stage(ctx_dict):
                 tr("deploy.config_cluster.biz_network_create_start", count=len(business_network_payloads)),
                 progress_extra={"count": len(business_network_payloads)},
             )
-            success = 0
-            for payload in business_network_payloads:
-                name = payload.get("name") or "(未命名)"
-                action_desc = tr("deploy.config_cluster.action_create_biz_network", name=name)
-                try:
-                    _send_post_request(
-                        client,
-                        f"/api/v2/network/vds/{business_vds_uuid}/vlans",
-                        payload,
-                        auth_headers,
-                        action_desc,
-                        results,
-                    )
-                    network_entry = results[-1]
-                    if network_entry.get("status") == "ok":
-                        success += 1
-                        stage_logger.info(
-                            tr("deploy.config_cluster.biz_network_create_success"),
-                            progress_extra={"name": name, "vlan_id": payload.get("vlan_id")},
-                        )
-                    else:
-                        stage_logger.warning(
-                            tr("deploy.config_cluster.biz_network_create_fail"),
-                            progress_extra={
-                                "name": name,
-                                "vlan_id": payload.get("vlan_id"),
-                                "error": network_entry.get("error"),
-                            },
-                        )
-                except Exception as exc:  # noqa: BLE001
-                    stage_logger.warning(
-                        "创建业务网络异常，继续下一条",
-                        progress_extra={"name": name, "error": str(exc)},
-                    )
+            network_outcomes = _create_business_networks(
+                client=client,
+                headers=auth_headers,
+                vds_uuid=business_vds_uuid,
+                payloads=business_network_payloads,
+                stage_logger=stage_logger,
+                results=results,
+                cfg=cfg,
+            )
+            success = sum(1 for item in network_outcomes if item.get("status") == "ok")
             stage_logger.info(
                 tr("deploy.config_cluster.biz_network_create_done"),
                 progress_extra={"success": success, "total": len(business_network_payloads)},
@@ -487,9 +465,15 @@ def run_config_cluster_stage(ctx_dict):
         plan_path = _resolve_plan_workbook_path(ctx)
         if plan_path:
             try:
-                _write_cluster_serial_to_plan(plan_path, serial)
-                results.append({"action": "write_plan_serial", "status": "ok", "path": str(plan_path)})
-                stage_logger.info(tr("deploy.config_cluster.serial_write_plan_done", plan=plan_path.name))
+                # 运行中只登记，运行结束时与其他阶段的回写合并为一次保存
+                deferred = queue_plan_update(ctx, plan_path, plan_vars.CLUSTER_SERIAL, serial, source="config_cluster")
+                results.append(
+                    {"action": "write_plan_serial", "status": "queued" if deferred else "ok", "path": str(plan_path)}
+                )
+                if deferred:
+                    stage_logger.info(tr("deploy.config_cluster.serial_write_plan_queued", plan=plan_path.name))
+                else:
+                    stage_logger.info(tr("deploy.config_cluster.serial_write_plan_done", plan=plan_path.name))
             except Exception as exc:  # noqa: BLE001 - 记录失败
                 logger.debug("写入集群序列号到规划表失败详情", exc_info=exc)
                 results.append({"action": "write_plan_serial", "status": "failed", "error": str(exc)})
@@ -975,6 +959,166 @@ def _build_business_network_payloads(parsed_plan: Any, vds_uuid: str) -> List[Di
     return payloads
 
 
+def _create_business_networks(
+    *,
+    client: APIClient,
+    headers: Dict[str, str],
+    vds_uuid: str,
+    payloads: List[Dict[str, Any]],
+    stage_logger,
+    results: List[Dict[str, Any]],
+    cfg: Any,
+) -> List[Dict[str, Any]]:
+    """并发提交业务虚拟网络创建请求，并对返回的异步任务统一轮询。
+
+    Fisheye 的 vlans 接口每次只接受一个网络，因此按网络并发提交；响应中若携带 job_id，
+    所有任务在同一个轮询循环中查询状态，整体耗时不再随业务网络数量线性增长。
+    每个网络的结果都会写入 *results*，返回值按 *payloads* 原始顺序排列。
+    """
+
+    net_cfg = cfg.get('business_network', {}) if isinstance(cfg, dict) else {}
+    if not isinstance(net_cfg, dict):
+        net_cfg = {}
+    max_workers = int(net_cfg.get('max_workers', min(8, len(payloads))) or 1)
+    poll_interval = float(net_cfg.get('poll_interval', 2))
+    job_timeout = float(net_cfg.get('job_timeout', 300))
+    path = f"/api/v2/network/vds/{vds_uuid}/vlans"
+
+    def _submit(item: tuple[int, Dict[str, Any]]) -> tuple[int, Dict[str, Any], Any]:
+        index, payload = item
+        try:
+            return index, payload, client.post(path, payload, headers=headers)
+        except Exception as exc:  # noqa: BLE001 - 按网络粒度记录失败
+            return index, payload, exc
+
+    submissions = parallel_map(_submit, list(enumerate(payloads)), max_workers=max(1, max_workers))
+    submissions.sort(key=lambda item: item[0])
+
+    outcomes: List[Dict[str, Any]] = []
+    pending_jobs: Dict[str, Dict[str, Any]] = {}
+    for _, payload, response in submissions:
+        outcome: Dict[str, Any] = {
+            "name": payload.get("name") or "(未命名)",
+            "vlan_id": payload.get("vlan_id"),
+            "status": "ok",
+        }
+        outcomes.append(outcome)
+        if isinstance(response, Exception):
+            if isinstance(response, APIError):
+                logger.error("创建业务网络[%s]失败: %s", outcome["name"], response)
+            else:
+                logger.warning("创建业务网络[%s]异常: %s", outcome["name"], response)
+            outcome["status"] = "warning"
+            outcome["error"] = str(response)
+            continue
+        network_uuid = _extract_resource_uuid(response)
+        job_id = _extract_job_id(response)
+        if network_uuid:
+            outcome["uuid"] = network_uuid
+        elif job_id:
+            outcome["job_id"] = job_id
+            outcome["status"] = "pending"
+            pending_jobs[job_id] = outcome
+
+    if pending_jobs:
+        stage_logger.debug(
+            tr("deploy.config_cluster.biz_network_job_wait"),
+            progress_extra={"jobs": list(pending_jobs.keys()), "timeout": job_timeout},
+        )
+        _wait_for_business_network_jobs(
+            client=client,
+            headers=headers,
+            pending_jobs=pending_jobs,
+            max_workers=max(1, max_workers),
+            poll_interval=poll_interval,
+            timeout=job_timeout,
+        )
+
+    for outcome in outcomes:
+        action_desc = tr("deploy.config_cluster.action_create_biz_network", name=outcome["name"])
+        entry: Dict[str, Any] = {"action": action_desc, "status": outcome["status"]}
+        if outcome.get("job_id"):
+            entry["job_id"] = outcome["job_id"]
+        if outcome["status"] == "ok":
+            results.append(entry)
+            stage_logger.info(
+                tr("deploy.config_cluster.biz_network_create_success"),
+                progress_extra={"name": outcome["name"], "vlan_id": outcome["vlan_id"]},
+            )
+        else:
+            entry["error"] = outcome.get("error")
+            results.append(entry)
+            stage_logger.warning(
+                tr("deploy.config_cluster.biz_network_create_fail"),
+                progress_extra={
+                    "name": outcome["name"],
+                    "vlan_id": outcome["vlan_id"],
+                    "error": outcome.get("error"),
+                },
+            )
+    return outcomes
+
+
+def _wait_for_business_network_jobs(
+    *,
+    client: APIClient,
+    headers: Dict[str, str],
+    pending_jobs: Dict[str, Dict[str, Any]],
+    max_workers: int,
+    poll_interval: float,
+    timeout: float,
+) -> None:
+    """在同一个循环内轮询全部业务网络创建任务，直接更新 *pending_jobs* 中的结果。"""
+
+    def _query(job_id: str) -> tuple[str, str, Any]:
+        try:
+            response = client.get(f"/api/v2/jobs/{job_id}", headers=headers)
+        except Exception as exc:  # noqa: BLE001 - 查询失败视为暂未完成，下一轮重试
+            logger.debug("查询业务网络任务 %s 失败: %s", job_id, exc)
+            return job_id, "", None
+        job = _extract_job_object(response)
+        return job_id, str(job.get("state") or "").lower(), job
+
+    deadline = time.monotonic() + timeout
+    while pending_jobs:
+        polled = parallel_map(_query, list(pending_jobs.keys()), max_workers=min(max_workers, len(pending_jobs)))
+        for job_id, state, job in polled:
+            outcome = pending_jobs.get(job_id)
+            if outcome is None:
+                continue
+            if state in _JOB_DONE_STATES:
+                outcome["status"] = "ok"
+                network_uuid = _extract_vds_uuid_from_job({"data": {"job": job}})
+                if network_uuid:
+                    outcome["uuid"] = network_uuid
+                pending_jobs.pop(job_id, None)
+            elif state in _JOB_FAILED_STATES:
+                detail = job.get("error") or job.get("message") or state
+                outcome["status"] = "warning"
+                outcome["error"] = str(detail)
+                pending_jobs.pop(job_id, None)
+        if not pending_jobs:
+            break
+        if time.monotonic() >= deadline:
+            for outcome in pending_jobs.values():
+                outcome["status"] = "warning"
+                outcome["error"] = f"任务等待超时（{timeout:g} 秒）"
+            pending_jobs.clear()
+            break
+        time.sleep(poll_interval)
+
+
+def _extract_job_object(response: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(response, dict):
+        return {}
+    data = response.get("data")
+    if isinstance(data, dict) and isinstance(data.get("job"), dict):
+        return data["job"]
+    if isinstance(response.get("job"), dict):
+        return response["job"]
+    return {}
+
+
 def _extract_job_id(response: Dict[str, Any]) -> Optional[str]:
     if not isinstance(response, dict):
         return None
@@ -1227,13 +1371,6 @@ def _resolve_plan_workbook_path(ctx: RunContext) -> Optional[Path]:
     return None
 
 
-def _write_cluster_serial_to_plan(plan_path: Path, serial: str) -> None:
-    workbook = openpyxl.load_workbook(plan_path)
-    sheet = workbook[plan_vars.CLUSTER_SERIAL.sheet]
-    sheet[plan_vars.CLUSTER_SERIAL.cell] = serial
-    workbook.save(plan_path)
-
-
 def _upload_svt_image(
     *,
     ctx: RunContext,
@@ -1555,6 +1692,7 @@ def _upload_svt_chunks(
             percentage = max(0.0, min(percentage, 100.0))
         stage_logger.info(
             "SVT 上传进度",
+            progress_gauge="upload:svt_iso",
             progress_extra={
                 "chunk": max(current_chunk_index, 0),
                 "total_chunks": total_chunks or None,
@@ -240,6 +240,7 @@ def _upload_package_chunks(
             status_value = status.get("status") if isinstance(status, dict) else None
             stage_logger.info(
                 tr("deploy.deploy_bak.chunk_done"),
+                progress_gauge="upload:bak_package",
                 progress_extra={"chunk": chunk_index, "status": status_value},
             )
 
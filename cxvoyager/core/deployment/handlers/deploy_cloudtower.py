@@ -31,7 +31,6 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import openpyxl
 
 from cxvoyager.common.config import load_config
 from cxvoyager.common.i18n import tr
@@ -42,6 +41,7 @@ from cxvoyager.core.deployment.runtime_context import RunContext
 from cxvoyager.core.deployment.stage_manager import AbortRequestedError, Stage, stage_handler, raise_if_aborted
 from cxvoyager.integrations.smartx.api_client import APIClient, APIError
 from cxvoyager.integrations.excel import field_variables as plan_vars
+from cxvoyager.integrations.excel.plan_writeback import queue_plan_update
 from cxvoyager.integrations.excel.planning_sheet_parser import find_plan_file, parse_plan, to_model
 from cxvoyager.models.planning_sheet_models import PlanModel
 
@@ -602,13 +602,6 @@ def _resolve_plan_path_for_write(ctx: RunContext) -> Optional[Path]:
     return None
 
 
-def _write_cloudtower_serial_to_plan(plan_path: Path, serial: str) -> None:
-    workbook = openpyxl.load_workbook(plan_path)
-    sheet = workbook[plan_vars.CLOUDTOWER_SERIAL.sheet]
-    sheet[plan_vars.CLOUDTOWER_SERIAL.cell] = serial
-    workbook.save(plan_path)
-
-
 def _configure_rack_topology_placeholder(*, ctx: RunContext, stage_logger: LoggerAdapter) -> None:
     """TODO: 读取机架拓扑表并调用 CloudTower 接口配置机架拓扑。"""
 
@@ -2318,7 +2311,9 @@ def _configure_cloudtower_post_install(
         plan_path = _resolve_plan_path_for_write(ctx)
         if plan_path:
             try:
-                _write_cloudtower_serial_to_plan(plan_path, serial)
+                deferred = queue_plan_update(
+                    ctx, plan_path, plan_vars.CLOUDTOWER_SERIAL, serial, source="deploy_cloudtower"
+                )
             except Exception as exc:  # noqa: BLE001
                 stage_logger.warning(
                     "写入 CloudTower 序列号到规划表失败",
@@ -2327,14 +2322,14 @@ def _configure_cloudtower_post_install(
                 plan_updates["cloudtower_serial"] = {"status": "failed", "error": str(exc)}
             else:
                 stage_logger.info(
-                    "已在规划表写入 CloudTower 序列号",
+                    "CloudTower 序列号已登记，运行结束时写入规划表" if deferred else "已在规划表写入 CloudTower 序列号",
                     progress_extra={
                         "path": plan_path.name,
                         "cell": plan_vars.CLOUDTOWER_SERIAL.cell,
                         "serial": serial,
                     },
                 )
-                plan_updates["cloudtower_serial"] = {"status": "ok", "path": str(plan_path)}
+                plan_updates["cloudtower_serial"] = {"status": "queued" if deferred else "ok", "path": str(plan_path)}
         else:
             stage_logger.warning(tr("deploy.deploy_cloudtower.serial_plan_missing"))
 
@@ -2965,6 +2960,7 @@ def _upload_cloudtower_iso_chunks(
             percentage = max(0.0, min(percentage, 100.0))
         stage_logger.info(
             "CloudTower ISO 上传进度",
+            progress_gauge="upload:cloudtower_iso",
             progress_extra={
                 "chunk": max(current_chunk_index, 0),
                 "total_chunks": total_chunks or None,
@@ -212,6 +212,7 @@ def _upload_chunks(client: APIClient, upload_id: str, package_path: Path, header
             progress = round(sent / file_size * 100, 2) if file_size else 100
             stage_logger.info(
                 tr("deploy.deploy_obs.chunk_done"),
+                progress_gauge="upload:obs_package",
                 progress_extra={
                     "chunk": chunk_index,
                     "uploaded": sent,
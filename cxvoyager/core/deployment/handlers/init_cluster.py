@@ -134,6 +134,7 @@ def handle_init_cluster(ctx_dict):
             plan=ctx.plan,
             host_scan_data=host_info,
             parsed_plan=parsed_plan,
+            artifact_dir=ctx.extra.get('artifact_dir'),
         )
     except Exception as exc:  # noqa: BLE001
         stage_logger.exception(tr("deploy.init_cluster.payload_generate_fail"))
@@ -353,12 +354,14 @@ def _wait_for_deployment_completion(
                 message = tr("deploy.init_cluster.progress_missing_state", attempt=attempt, max_attempts=max_attempts, snapshot=snapshot)
                 stage_logger.info(
                     tr("deploy.init_cluster.progress_missing_state_log"),
+                    progress_gauge="poll:init_cluster",
                     progress_extra={"attempt": attempt, "max_attempts": max_attempts},
                 )
             elif "running" in state:
                 message = tr("deploy.init_cluster.progress_running", attempt=attempt, max_attempts=max_attempts, state=state, stage=stage_info)
                 stage_logger.info(
                     tr("deploy.init_cluster.progress_running_log"),
+                    progress_gauge="poll:init_cluster",
                     progress_extra={
                         "attempt": attempt,
                         "max_attempts": max_attempts,
@@ -387,6 +390,7 @@ def _wait_for_deployment_completion(
             raise_if_aborted(ctx_view, abort_signal=abort_signal, stage_logger=stage_logger, hint="等待下一次进度轮询")
             stage_logger.info(
                 tr("deploy.init_cluster.progress_retry_wait"),
+                progress_gauge="poll:init_cluster",
                 progress_extra={"poll_interval": poll_interval, "attempt": attempt, "max_attempts": max_attempts},
             )
             time.sleep(poll_interval)
@@ -17,6 +17,7 @@
 # Stage 1 prepare – 准备与规划校验
 from __future__ import annotations
 import logging
+from pathlib import Path
 from cxvoyager.core.deployment.stage_manager import Stage, stage_handler
 from cxvoyager.core.deployment.runtime_context import RunContext
 from cxvoyager.core.deployment.progress import create_stage_progress_logger
@@ -42,7 +43,8 @@ def handle_prepare(ctx_dict):
     if strict_flag is None:
         strict_flag = cfg.get('validation', {}).get('strict', False)
     cli_opts['strict_validation'] = bool(strict_flag)
-    plan_file = find_plan_file(ctx.work_dir)
+    plan_source = ctx.extra.get('plan_source')
+    plan_file = Path(str(plan_source)) if plan_source else find_plan_file(ctx.work_dir)
     if not plan_file:
         raise RuntimeError(tr("deploy.prepare.plan_file_missing"))
     parsed = parse_plan(plan_file)
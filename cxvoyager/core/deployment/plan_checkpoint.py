@@ -0,0 +1,271 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""运行检查点与规划表差异：记录各阶段成功时所用规划表的分段指纹，据此给出需要重跑的部分。
+
+每份规划表对应一个检查点文件，按阶段保存最近一次成功执行时的分段字段摘要
+（``planning_sheet_parser.plan_section_fields``）。``diff_plan`` 把当前规划表与检查点逐阶段比较，
+结合 ``stage_capabilities.yml`` 中 ``plan_sections`` 的消费关系列出受影响的阶段与子步骤，
+并沿上下文键目录（``produces`` → ``requires``）给出可能受波及的下游阶段。
+
+检查点文件仅属主可读写（0600）。密码字段不做普通摘要，而是以检查点目录下的本地密钥
+（``.secret``，首次使用时随机生成）计算 HMAC，脱离该密钥无法离线穷举。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+from uuid import uuid4
+
+import yaml
+
+from cxvoyager.common.system_constants import CONFIG_DIR, PROJECT_ROOT
+from cxvoyager.core.deployment.stage_manager import Stage
+from cxvoyager.integrations.excel.planning_sheet_parser import parse_plan, plan_section_fields
+
+logger = logging.getLogger(__name__)
+
+# 2：密码字段改为 HMAC 指纹，旧版检查点中的普通摘要不再读取，下次运行时整体覆盖
+CHECKPOINT_VERSION = 2
+_SECRET_FILE = ".secret"
+STAGE_CAPABILITIES_FILE = CONFIG_DIR / "stage_capabilities.yml"
+
+
+def checkpoint_dir() -> Path:
+    """检查点目录；环境变量 ``CXVOYAGER_CHECKPOINT_DIR`` 可覆盖。"""
+
+    configured = os.environ.get("CXVOYAGER_CHECKPOINT_DIR")
+    if configured and configured.strip():
+        return Path(configured.strip())
+    return PROJECT_ROOT / "artifacts" / "checkpoints"
+
+
+def checkpoint_path(plan_file: Path | str) -> Path:
+    resolved = Path(plan_file).resolve()
+    slug = re.sub(r"[^\w.-]+", "-", resolved.stem, flags=re.UNICODE).strip("-") or "plan"
+    digest = hashlib.sha1(str(resolved).encode("utf-8")).hexdigest()[:10]
+    return checkpoint_dir() / f"{slug[:60]}-{digest}.json"
+
+
+def _checkpoint_secret() -> bytes:
+    """读取（不存在时生成）计算密码字段 HMAC 的本地密钥。"""
+
+    path = checkpoint_dir() / _SECRET_FILE
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    secret = os.urandom(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:  # 并发进程已生成
+        return path.read_bytes()
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(secret)
+    return secret
+
+
+def _write_private(path: Path, text: str) -> None:
+    """原子写入仅属主可读写（0600）的文件。"""
+
+    tmp = path.with_name(f".{path.name}.{uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def load_checkpoint(plan_file: Path | str) -> Dict[str, Any] | None:
+    path = checkpoint_path(plan_file)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("读取运行检查点失败 %s: %s", path, exc)
+        return None
+    if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+        return None
+    return data
+
+
+def record_run_checkpoint(
+    plan_file: Path | str,
+    parsed: Dict[str, Any],
+    stages: Iterable[str],
+) -> Path | None:
+    """把本次运行成功完成的阶段与所用规划表的分段摘要写入检查点（原子替换）。"""
+
+    stage_names = [stage.value if isinstance(stage, Stage) else str(stage) for stage in stages]
+    if not stage_names:
+        return None
+    path = checkpoint_path(plan_file)
+    data = load_checkpoint(plan_file) or {"version": CHECKPOINT_VERSION, "stages": {}}
+    try:
+        fields = plan_section_fields(parsed, secret=_checkpoint_secret())
+    except OSError as exc:  # pragma: no cover - filesystem interaction
+        logger.warning("读取检查点密钥失败，跳过写入运行检查点: %s", exc)
+        return None
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "content_hash": parsed.get("_meta", {}).get("content_hash"),
+        "sections": fields,
+    }
+    data["plan_file"] = str(Path(plan_file).resolve())
+    for name in stage_names:
+        data["stages"][name] = entry
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_private(path, json.dumps(data, ensure_ascii=False, indent=2))
+    except OSError as exc:  # pragma: no cover - filesystem interaction
+        logger.warning("写入运行检查点失败 %s: %s", path, exc)
+        return None
+    return path
+
+
+@lru_cache(maxsize=1)
+def load_stage_catalogue() -> Dict[str, Any]:
+    """读取阶段能力目录（上下文键、阶段依赖与规划表分段的消费关系）。"""
+
+    try:
+        with STAGE_CAPABILITIES_FILE.open("r", encoding="utf-8") as fh:
+            data = yaml.safe_load(fh) or {}
+    except OSError as exc:  # pragma: no cover - 随包发布
+        logger.warning("读取阶段能力目录失败: %s", exc)
+        data = {}
+    return data if isinstance(data, dict) else {}
+
+
+def section_consumers(section: str) -> Dict[str, List[str]]:
+    """消费指定分段的 ``{阶段: [子步骤...]}``，分段名按目录中的通配模式匹配。"""
+
+    consumers: Dict[str, List[str]] = {}
+    for pattern, spec in (load_stage_catalogue().get("plan_sections") or {}).items():
+        if not fnmatchcase(section, str(pattern)) or not isinstance(spec, dict):
+            continue
+        for stage, steps in (spec.get("consumers") or {}).items():
+            merged = consumers.setdefault(str(stage), [])
+            merged.extend(step for step in steps or [] if step not in merged)
+    return consumers
+
+
+def downstream_stages(stages: Iterable[str]) -> List[str]:
+    """沿上下文键目录传播：受影响阶段产出的键被哪些阶段依赖（requires），按阶段顺序返回。"""
+
+    catalogue = load_stage_catalogue().get("stages") or {}
+    affected = set(stages)
+    frontier = list(affected)
+    while frontier:
+        stage = frontier.pop()
+        produced = set((catalogue.get(stage) or {}).get("produces") or [])
+        for name, spec in catalogue.items():
+            if name in affected or not isinstance(spec, dict):
+                continue
+            if produced.intersection(spec.get("requires") or []):
+                affected.add(name)
+                frontier.append(name)
+    extra = affected.difference(stages)
+    return sorted(extra, key=lambda name: float((catalogue.get(name) or {}).get("order", 99)))
+
+
+def _compare_fields(before: Dict[str, Dict[str, str]], after: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+    changes: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(set(before) | set(after)):
+        old, new = before.get(name), after.get(name)
+        if old is None:
+            changes[name] = {"status": "added", "fields": sorted(new or {})}
+        elif new is None:
+            changes[name] = {"status": "removed", "fields": sorted(old)}
+        elif old != new:
+            fields = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+            changes[name] = {"status": "changed", "fields": fields}
+    return changes
+
+
+def diff_plan(plan_file: Path | str, parsed: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """比较当前规划表与上次成功运行的检查点，返回变更分段、受影响阶段/子步骤与建议重跑的阶段。"""
+
+    parsed = parsed if parsed is not None else parse_plan(Path(plan_file))
+    checkpoint = load_checkpoint(plan_file)
+    # 没有检查点时无需比较密码字段，也就不必生成密钥
+    current = plan_section_fields(parsed, secret=_checkpoint_secret() if checkpoint else None)
+    result: Dict[str, Any] = {
+        "plan_file": str(Path(plan_file).resolve()),
+        "checkpoint": str(checkpoint_path(plan_file)) if checkpoint else None,
+        "content_hash": parsed.get("_meta", {}).get("content_hash"),
+        "sections": {},
+        "stages": [],
+        "downstream": [],
+        "rerun_stages": [],
+    }
+    if not checkpoint:
+        return result
+
+    stage_entries: Dict[str, Any] = checkpoint.get("stages") or {}
+    latest = max(stage_entries.values(), key=lambda entry: entry.get("at") or "", default=None)
+    if latest:
+        result["sections"] = _compare_fields(latest.get("sections") or {}, current)
+
+    order = {stage.value: index for index, stage in enumerate(Stage)}
+    affected: List[Dict[str, Any]] = []
+    for stage_name in sorted(stage_entries, key=lambda name: order.get(name, len(order))):
+        entry = stage_entries[stage_name]
+        changes = _compare_fields(entry.get("sections") or {}, current)
+        steps: List[str] = []
+        sections: List[str] = []
+        for section in changes:
+            consumed = section_consumers(section).get(stage_name)
+            if consumed is None:
+                continue
+            sections.append(section)
+            steps.extend(step for step in consumed if step not in steps)
+        if sections:
+            affected.append(
+                {"stage": stage_name, "last_success_at": entry.get("at"), "sections": sections, "steps": steps}
+            )
+    result["stages"] = affected
+    affected_names = [item["stage"] for item in affected]
+    result["downstream"] = downstream_stages(affected_names)
+    if affected_names:
+        # prepare 负责解析与预检，规划表有任何变更时都需要先执行
+        rerun = set(affected_names) | {Stage.prepare.value}
+        result["rerun_stages"] = sorted(rerun, key=lambda name: order.get(name, len(order)))
+    return result
+
+
+__all__ = [
+    "checkpoint_dir",
+    "checkpoint_path",
+    "diff_plan",
+    "downstream_stages",
+    "load_checkpoint",
+    "load_stage_catalogue",
+    "record_run_checkpoint",
+    "section_consumers",
+]
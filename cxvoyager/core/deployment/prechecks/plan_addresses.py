@@ -0,0 +1,29 @@
+"""规划表地址静态检查：探测前基于地址索引找出规划表内部的地址冲突。"""
+from __future__ import annotations
+
+from typing import Any, List, Mapping
+
+from cxvoyager.common.address_index import AddressIndex, plan_address_conflicts
+from cxvoyager.models.planning_sheet_models import PlanModel
+
+from .types import ProbeRecord
+from .utils import log_debug
+
+
+def inspect(plan: PlanModel, config: Mapping[str, Any], *, logger) -> List[ProbeRecord]:
+    """同一地址被多个角色占用记为错误，已规划地址落入临时测试 IP 范围记为警告。"""
+
+    index = AddressIndex.from_plan(plan)
+    records: List[ProbeRecord] = []
+    for conflict in plan_address_conflicts(index):
+        if conflict["type"] == "duplicate":
+            level = "error"
+            message = f"地址被多个角色重复使用: {', '.join(conflict['roles'])}"
+        else:
+            level = "warning"
+            message = f"{conflict['roles'][0]} 落在临时测试 IP 范围 {conflict['range']} 内"
+        records.append(
+            ProbeRecord(category="plan_address", target=conflict["ip"], level=level, message=message, probes={})
+        )
+    log_debug(logger, "规划表地址检查", {"entries": len(index), "conflicts": len(records)})
+    return records
@@ -8,7 +8,7 @@ from typing import Any, Dict, Sequence
 from cxvoyager.core.deployment.runtime_context import RunContext
 from cxvoyager.core.deployment.stage_manager import Stage
 
-from . import bmc_ip, cloudtower_ip, cluster_vip, mgmt_hosts, storage_ip, obs_ip
+from . import bmc_ip, cloudtower_ip, cluster_vip, mgmt_hosts, plan_addresses, storage_ip, obs_ip
 from .types import PrecheckReport
 
 
@@ -41,6 +41,8 @@ def run_ip_prechecks(
     stage_set = _as_stage_set(stages)
     app_only = _is_app_only(stage_set)
 
+    # 先做不依赖网络的规划表地址冲突检查，再执行探测
+    report.extend(plan_addresses.inspect(plan, cfg, logger=logger))
     report.extend(mgmt_hosts.inspect(plan, cfg, logger=logger))
 
     if Stage.deploy_obs.value in stage_set:
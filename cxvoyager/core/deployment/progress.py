@@ -2,15 +2,40 @@
 """Progress feed utilities used to share live updates across workflow stages."""
 from __future__ import annotations
 
+import gzip
+import hashlib
+import json
 import logging
+import os
+import re
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Mapping, MutableMapping
+from enum import Enum
+from pathlib import Path
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Mapping, MutableMapping, Set
+from uuid import uuid4
+
+from cxvoyager.common.system_constants import LOG_DIR
 
 from .runtime_context import RunContext
 
 __all__ = [
     "PROGRESS_MESSAGES_KEY",
     "PROGRESS_SINK_KEY",
+    "PROGRESS_BUS_KEY",
+    "PROGRESS_PAYLOAD_STORE_KEY",
+    "PAYLOAD_REF_KEY",
+    "DEFAULT_PROGRESS_RETENTION",
+    "OverflowPolicy",
+    "ProgressBuffer",
+    "ProgressBus",
+    "ProgressPayloadStore",
+    "ProgressSubscription",
+    "get_progress_bus",
+    "resolve_progress_payload_store",
+    "resolve_progress_retention",
     "record_progress",
     "progress_info",
     "progress_warning",
@@ -21,6 +46,495 @@ __all__ = [
 
 PROGRESS_MESSAGES_KEY = "progress_messages"
 PROGRESS_SINK_KEY = "progress_log_sink"
+PROGRESS_BUS_KEY = "progress_bus"
+PROGRESS_PAYLOAD_STORE_KEY = "progress_payload_store"
+PAYLOAD_REF_KEY = "_payload"
+
+logger = logging.getLogger(__name__)
+_spill_logger = logging.getLogger("cxvoyager.progress.spill")
+
+# 各级别在内存中保留的进度消息条数，None 表示不限（警告与错误全部保留）
+DEFAULT_PROGRESS_RETENTION: Dict[str, int | None] = {"debug": 200, "info": 2000, "warning": None, "error": None}
+
+
+def resolve_progress_retention(cfg: Mapping[str, Any] | None) -> Dict[str, int | None]:
+    """读取配置 ``logging.progress_retention``，未配置的级别沿用缺省值。"""
+
+    retention = dict(DEFAULT_PROGRESS_RETENTION)
+    section = cfg.get("logging", {}) if isinstance(cfg, Mapping) else {}
+    configured = section.get("progress_retention") if isinstance(section, Mapping) else None
+    if isinstance(configured, Mapping):
+        for level, limit in configured.items():
+            retention[str(level).lower()] = None if limit is None else max(0, int(limit))
+    return retention
+
+
+def _spill_to_log(entry: Mapping[str, Any]) -> None:
+    """把从内存淘汰、此前未写入日志的消息补写到日志。
+
+    日志级别不低于 INFO，否则 INFO 配置下淘汰的调试消息仍会被丢弃；原级别记在消息文本中。
+    """
+
+    level = entry.get("level") or "info"
+    numeric = logging.getLevelName(str(level).upper())
+    numeric = max(numeric if isinstance(numeric, int) else logging.INFO, logging.INFO)
+    message = entry.get("message")
+    if entry.get("extra"):
+        message = f"{message} | extra={_safe_repr(entry.get('extra'))}"
+    _spill_logger.log(numeric, "[%s] %s: %s", entry.get("stage") or "-", level, message)
+
+
+class ProgressBuffer(list):
+    """按级别限额的进度消息缓冲（list 子类，读取方式不变）。
+
+    某一级别超过 ``retention`` 限额时淘汰该级别最旧的一条并计入 ``evicted``；追加时未标记
+    ``logged`` 的消息（直接调用 ``record_progress``、日志级别未启用或附加数据未写入日志）在淘汰时
+    交给 ``spill``（缺省经 ``cxvoyager.progress.spill`` 日志补写），已由阶段日志适配器完整记录的
+    消息不重复输出。``pinned_after`` 不为 None 时，序号大于它的
+    消息尚未落盘，不参与淘汰；调用方落盘后通过 ``pin`` 推进水位。带 ``gauge`` 键的
+    仪表类消息（上传/轮询进度）只保留最新一条：新值移除同键旧值后追加到末尾。
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Dict[str, Any]] = (),
+        *,
+        retention: Mapping[str, int | None] | None = None,
+        spill: Callable[[Mapping[str, Any]], None] | None = _spill_to_log,
+        pinned_after: int | None = None,
+    ) -> None:
+        super().__init__()
+        self.retention: Dict[str, int | None] = dict(DEFAULT_PROGRESS_RETENTION if retention is None else retention)
+        self.spill = spill
+        self.pinned_after = pinned_after
+        self.last_seq = 0  # 追加过的最大序号（淘汰后仍保留）
+        self.evicted = 0
+        self.evicted_through = 0  # 已淘汰消息中的最大序号
+        self._counts: Dict[str, int] = {}
+        self._logged: Set[int] = set()  # 已完整写入日志的消息（按对象标识）
+        self.extend(items)
+
+    def append(self, entry: Dict[str, Any], *, logged: bool = False) -> None:  # type: ignore[override]
+        gauge = entry.get("gauge")
+        if gauge:
+            self._drop_gauge(gauge)
+        super().append(entry)
+        if logged:
+            self._logged.add(id(entry))
+        level = entry.get("level") or "info"
+        self._counts[level] = self._counts.get(level, 0) + 1
+        seq = entry.get("seq")
+        if isinstance(seq, int) and seq > self.last_seq:
+            self.last_seq = seq
+        self._enforce(level)
+
+    def extend(self, items: Iterable[Dict[str, Any]]) -> None:  # type: ignore[override]
+        for item in items:
+            self.append(item)
+
+    def clear(self) -> None:  # type: ignore[override]
+        super().clear()
+        self._counts.clear()
+        self._logged.clear()
+
+    def __reduce__(self):
+        # list 子类默认的 pickle 协议会在恢复属性前调用 append，这里改为经构造函数重建
+        logged = [index for index, entry in enumerate(self) if id(entry) in self._logged]
+        return (
+            _restore_progress_buffer,
+            (list(self), self.retention, self.spill, self.pinned_after, self.last_seq, logged),
+        )
+
+    def pin(self, seq: int | None) -> None:
+        """推进落盘水位并按新的水位重新执行限额。"""
+
+        self.pinned_after = seq
+        for level in list(self._counts):
+            self._enforce(level)
+
+    def since(self, seq: int, limit: int | None = None) -> List[Dict[str, Any]]:
+        """返回序号大于 ``seq`` 的消息（缓冲按序号递增排列）。"""
+
+        start = len(self)
+        while start > 0 and (self[start - 1].get("seq") or 0) > seq:
+            start -= 1
+        items = list(self[start:])
+        return items if limit is None else items[:limit]
+
+    def complete_after(self, seq: int) -> bool:
+        """序号大于 ``seq`` 的消息是否都还在内存中。"""
+
+        return seq >= self.evicted_through
+
+    def _drop_gauge(self, gauge: str) -> None:
+        for index in range(len(self) - 1, -1, -1):
+            if self[index].get("gauge") == gauge:
+                previous = super().pop(index)
+                self._logged.discard(id(previous))
+                level = previous.get("level") or "info"
+                self._counts[level] = self._counts.get(level, 1) - 1
+                return
+
+    def _enforce(self, level: str) -> None:
+        limit = self.retention.get(level)
+        if limit is None:
+            return
+        while self._counts.get(level, 0) > limit:
+            index = self._evictable_index(level)
+            if index is None:
+                return
+            entry = super().pop(index)
+            self._counts[level] -= 1
+            self.evicted += 1
+            seq = entry.get("seq")
+            if isinstance(seq, int) and seq > self.evicted_through:
+                self.evicted_through = seq
+            if id(entry) in self._logged:
+                self._logged.discard(id(entry))
+            elif self.spill is not None:
+                try:
+                    self.spill(entry)
+                except Exception:  # pragma: no cover - defensive
+                    pass
+
+    def _evictable_index(self, level: str) -> int | None:
+        for index, entry in enumerate(self):
+            if self.pinned_after is not None and (entry.get("seq") or 0) > self.pinned_after:
+                return None
+            if (entry.get("level") or "info") == level:
+                return index
+        return None
+
+
+def _restore_progress_buffer(items, retention, spill, pinned_after, last_seq, logged=()) -> ProgressBuffer:
+    buffer = ProgressBuffer(items, retention=retention, spill=spill, pinned_after=pinned_after)
+    buffer.last_seq = max(buffer.last_seq, last_seq)
+    buffer._logged.update(id(buffer[index]) for index in logged if index < len(buffer))
+    return buffer
+
+
+_PAYLOAD_REF_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_SUMMARY_MAX_KEYS = 20
+_SUMMARY_MAX_TEXT = 200
+
+
+class ProgressPayloadStore:
+    """进度附加数据（``extra``）的外置存储。
+
+    序列化后超过 ``inline_limit`` 字节的 ``extra`` 按内容寻址（sha256）gzip 压缩写入
+    ``root``，进度消息中只保留顶层摘要与 ``_payload`` 引用（``ref``/``bytes``/``keys``），
+    完整内容通过 ``load`` 或 Web 接口 ``/progress/payloads/{ref}`` 按需读取。相同内容只写一次。
+    """
+
+    def __init__(self, root: Path | str, *, inline_limit: int = 4096) -> None:
+        self.root = Path(root)
+        self.inline_limit = max(0, int(inline_limit))
+
+    def externalize(self, extra: Mapping[str, Any]) -> Dict[str, Any]:
+        """返回应写入进度消息的 ``extra``：未超过阈值时原样返回，否则落盘并返回摘要。"""
+
+        try:
+            raw = json.dumps(extra, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
+        except TypeError:  # 键类型混杂时无法排序
+            raw = json.dumps(extra, ensure_ascii=False, default=str, separators=(",", ":"))
+        data = raw.encode("utf-8")
+        if len(data) <= self.inline_limit:
+            return dict(extra)
+
+        ref = hashlib.sha256(data).hexdigest()
+        summary = _summarize_extra(extra)
+        reference: Dict[str, Any] = {"ref": ref, "bytes": len(data), "keys": len(extra)}
+        try:
+            self._write(ref, data)
+        except OSError as exc:
+            # 落盘失败时仍只保留摘要，避免大对象进入内存与任务存档
+            logger.warning("进度附加数据落盘失败，仅保留摘要: %s", exc)
+            reference["ref"] = None
+        summary[PAYLOAD_REF_KEY] = reference
+        return summary
+
+    def path_for(self, ref: str) -> Path:
+        if not _PAYLOAD_REF_PATTERN.match(ref or ""):
+            raise ValueError(f"invalid payload ref: {ref!r}")
+        return self.root / ref[:2] / f"{ref}.json.gz"
+
+    def load(self, ref: str) -> Any | None:
+        """读取完整的附加数据；引用非法或文件不存在时返回 None。"""
+
+        try:
+            path = self.path_for(ref)
+        except ValueError:
+            return None
+        try:
+            with gzip.open(path, "rb") as fh:
+                return json.loads(fh.read().decode("utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def _write(self, ref: str, data: bytes) -> None:
+        path = self.path_for(ref)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+        tmp.write_bytes(gzip.compress(data, compresslevel=6))
+        os.replace(tmp, path)  # 多个 worker 同时写入同一内容时以原子替换收尾
+
+
+def _summarize_extra(extra: Mapping[str, Any]) -> Dict[str, Any]:
+    """保留顶层标量，长字符串截断，容器只记录类型与元素个数。"""
+
+    summary: Dict[str, Any] = {}
+    for index, (key, value) in enumerate(extra.items()):
+        if index >= _SUMMARY_MAX_KEYS:
+            break
+        if value is None or isinstance(value, (bool, int, float)):
+            summary[str(key)] = value
+        elif isinstance(value, str):
+            summary[str(key)] = value if len(value) <= _SUMMARY_MAX_TEXT else value[:_SUMMARY_MAX_TEXT] + "…"
+        elif isinstance(value, Mapping):
+            summary[str(key)] = f"<dict: {len(value)} 项>"
+        elif isinstance(value, (list, tuple, set)):
+            summary[str(key)] = f"<list: {len(value)} 项>"
+        else:
+            text = str(value)
+            summary[str(key)] = text if len(text) <= _SUMMARY_MAX_TEXT else text[:_SUMMARY_MAX_TEXT] + "…"
+    return summary
+
+
+def resolve_progress_payload_store(cfg: Mapping[str, Any] | None) -> ProgressPayloadStore:
+    """读取配置 ``logging.progress_payload``；环境变量 ``CXVOYAGER_PROGRESS_PAYLOAD_DIR`` 可覆盖目录，
+    留空时使用 ``logs/progress_payloads``（多主机部署时应指向共享存储）。"""
+
+    section = cfg.get("logging", {}) if isinstance(cfg, Mapping) else {}
+    configured = section.get("progress_payload") if isinstance(section, Mapping) else None
+    if not isinstance(configured, Mapping):
+        configured = {}
+    root = os.environ.get("CXVOYAGER_PROGRESS_PAYLOAD_DIR") or configured.get("dir") or LOG_DIR / "progress_payloads"
+    inline_limit = configured.get("inline_limit")
+    return ProgressPayloadStore(root, inline_limit=4096 if inline_limit is None else int(inline_limit))
+
+
+class OverflowPolicy(str, Enum):
+    """订阅队列写满时的处理方式。"""
+
+    drop_oldest = "drop_oldest"  # 丢弃最旧的条目，发布方永不等待
+    coalesce = "coalesce"  # 同一键的待投递条目只保留最新一条，仍满时丢弃最旧
+    block = "block"  # 发布方等待消费者腾出空间（仅用于不允许丢失的消费者）
+
+
+def _default_coalesce_key(entry: Mapping[str, Any]) -> Hashable:
+    return entry.get("gauge") or (entry.get("stage"), entry.get("level"))
+
+
+class ProgressSubscription:
+    """单个订阅者的有界队列及其积压、丢弃统计。
+
+    可由调用方自行 ``get`` / ``drain``；订阅时给出 ``handler`` 则由总线的后台线程逐条投递。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        maxsize: int = 1000,
+        policy: OverflowPolicy | str = OverflowPolicy.drop_oldest,
+        coalesce_key: Callable[[Mapping[str, Any]], Hashable] | None = None,
+        handler: Callable[[Dict[str, Any]], None] | None = None,
+    ) -> None:
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = OverflowPolicy(policy)
+        self.handler = handler
+        self._coalesce_key = coalesce_key or _default_coalesce_key
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._cond = Condition()
+        self._closed = False
+        self._thread: Thread | None = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_lag = 0
+        self.blocked_seconds = 0.0
+
+    def put(self, entry: Dict[str, Any]) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self.published += 1
+            if self.policy is OverflowPolicy.coalesce and self._replace_pending(entry):
+                self.coalesced += 1
+                self._cond.notify_all()
+                return
+            if len(self._queue) >= self.maxsize:
+                if self.policy is OverflowPolicy.block:
+                    started = time.monotonic()
+                    while len(self._queue) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    self.blocked_seconds += time.monotonic() - started
+                    if self._closed:
+                        return
+                else:
+                    self._queue.popleft()
+                    self.dropped += 1
+            self._queue.append(entry)
+            self.max_lag = max(self.max_lag, len(self._queue))
+            self._cond.notify_all()
+
+    def _replace_pending(self, entry: Dict[str, Any]) -> bool:
+        key = self._coalesce_key(entry)
+        for index, pending in enumerate(self._queue):
+            if self._coalesce_key(pending) == key:
+                del self._queue[index]
+                self._queue.append(entry)
+                return True
+        return False
+
+    def get(self, timeout: float | None = None) -> Dict[str, Any] | None:
+        """取出一条消息；超时或订阅已关闭且队列为空时返回 None。"""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            entry = self._queue.popleft()
+            self.delivered += 1
+            self._cond.notify_all()
+            return entry
+
+    def drain(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            items = list(self._queue)
+            self._queue.clear()
+            self.delivered += len(items)
+            self._cond.notify_all()
+            return items
+
+    @property
+    def lag(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "policy": self.policy.value,
+                "lag": len(self._queue),
+                "max_lag": self.max_lag,
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "blocked_seconds": round(self.blocked_seconds, 3),
+            }
+
+    def close(self) -> None:
+        """停止接收新消息；已排队的消息仍可取出（后台投递线程会先投递完再退出）。"""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _run_handler(self) -> None:
+        while True:
+            entry = self.get()
+            if entry is None:
+                return
+            try:
+                self.handler(entry)  # type: ignore[misc]
+            except Exception:  # pragma: no cover - defensive
+                logger.exception("进度订阅者 %s 处理消息失败", self.name)
+
+
+class ProgressBus:
+    """进度消息的发布/订阅总线。
+
+    每个订阅者拥有独立的有界队列与溢出策略，发布方只做入队；慢速消费者（持久化、
+    推送、指标）不会拖慢部署线程，也不会互相影响。
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: List[ProgressSubscription] = []
+        self._lock = Lock()
+
+    def subscribe(
+        self,
+        name: str,
+        *,
+        maxsize: int = 1000,
+        policy: OverflowPolicy | str = OverflowPolicy.drop_oldest,
+        coalesce_key: Callable[[Mapping[str, Any]], Hashable] | None = None,
+        handler: Callable[[Dict[str, Any]], None] | None = None,
+    ) -> ProgressSubscription:
+        subscription = ProgressSubscription(
+            name, maxsize=maxsize, policy=policy, coalesce_key=coalesce_key, handler=handler
+        )
+        if handler is not None:
+            subscription._thread = Thread(
+                target=subscription._run_handler, name=f"progress-{name}", daemon=True
+            )
+            subscription._thread.start()
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription, *, timeout: float | None = 5.0) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        subscription.close()
+        if subscription._thread is not None:
+            subscription._thread.join(timeout)
+
+    def publish(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(entry)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """各订阅者的积压（lag）、丢弃与阻塞统计。"""
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {item.name: item.metrics() for item in subscriptions}
+
+    def close(self, *, timeout: float | None = 5.0) -> None:
+        """关闭全部订阅，等待后台投递线程把已排队的消息投递完。"""
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.close()
+        for subscription in subscriptions:
+            if subscription._thread is not None:
+                subscription._thread.join(timeout)
+
+
+def get_progress_bus(ctx: RunContext) -> ProgressBus:
+    """返回运行上下文上的进度总线，不存在时创建。"""
+
+    bus = ctx.extra.get(PROGRESS_BUS_KEY)
+    if not isinstance(bus, ProgressBus):
+        bus = ProgressBus()
+        ctx.extra[PROGRESS_BUS_KEY] = bus
+    return bus
 
 
 def _normalize_stage(stage: Any) -> str | None:
@@ -54,10 +568,20 @@ def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _append_to_context(ctx: RunContext, entry: Dict[str, Any]) -> None:
-    messages: List[Dict[str, Any]] = ctx.extra.setdefault(PROGRESS_MESSAGES_KEY, [])
-    messages.append(entry)
+def _append_to_context(ctx: RunContext, entry: Dict[str, Any], *, logged: bool = False) -> None:
+    messages: List[Dict[str, Any]] = ctx.extra.get(PROGRESS_MESSAGES_KEY)
+    if messages is None:
+        messages = ctx.extra[PROGRESS_MESSAGES_KEY] = ProgressBuffer()
+    if isinstance(messages, ProgressBuffer):
+        messages.append(entry, logged=logged)
+    else:
+        messages.append(entry)
+
+    bus = ctx.extra.get(PROGRESS_BUS_KEY)
+    if isinstance(bus, ProgressBus):
+        bus.publish(entry)
 
+    # 兼容旧的单一回调接口；新的消费者应通过 get_progress_bus(ctx).subscribe 订阅
     sink = ctx.extra.get(PROGRESS_SINK_KEY)
     if callable(sink):
         try:
@@ -74,8 +598,16 @@ def record_progress(
     stage: str | None = None,
     level: str = "info",
     extra: Dict[str, Any] | None = None,
+    gauge: str | None = None,
+    logged: bool = False,
 ) -> None:
-    """Store a progress entry on the given context and broadcast it if possible."""
+    """Store a progress entry on the given context and broadcast it if possible.
+
+    ``gauge`` marks a gauge-style entry (e.g. ``upload:cloudtower_iso``): the latest
+    value replaces the previous one with the same key in the feed, store and UI.
+    ``logged`` tells the buffer the caller has already written the full entry to the
+    log, so it is not spilled again when evicted.
+    """
 
     if ctx is None:
         return
@@ -96,9 +628,15 @@ def record_progress(
         "at": _now(),
     }
     if extra:
+        # 超过阈值的附加数据外置为压缩文件，消息中只保留摘要与引用
+        payload_store = ctx.extra.get(PROGRESS_PAYLOAD_STORE_KEY)
+        if isinstance(payload_store, ProgressPayloadStore) and isinstance(extra, Mapping):
+            extra = payload_store.externalize(extra)
         entry["extra"] = extra
+    if gauge:
+        entry["gauge"] = gauge
 
-    _append_to_context(ctx, entry)
+    _append_to_context(ctx, entry, logged=logged)
 
 
 def progress_info(ctx: RunContext | None, message: str, *, stage: str | None = None, extra: Dict[str, Any] | None = None) -> None:
@@ -139,7 +677,15 @@ class ProgressLoggerAdapter(logging.LoggerAdapter):
         self._prefix = prefix
         self._include_progress_extra_in_message = include_progress_extra_in_message
 
-    def log(self, level: int, msg: str, *args: Any, progress_extra: Mapping[str, Any] | None = None, **kwargs: Any) -> None:  # type: ignore[override]
+    def log(  # type: ignore[override]
+        self,
+        level: int,
+        msg: str,
+        *args: Any,
+        progress_extra: Mapping[str, Any] | None = None,
+        progress_gauge: str | None = None,
+        **kwargs: Any,
+    ) -> None:
         message = msg % args if args else msg
         normalized_level = _normalize_level(level)
 
@@ -150,9 +696,19 @@ class ProgressLoggerAdapter(logging.LoggerAdapter):
         else:
             progress_extra_dict = dict(progress_extra)
 
-        record_progress(self._ctx, message, stage=self._stage, level=normalized_level, extra=progress_extra_dict)
-
-        if not self.logger.isEnabledFor(level):
+        enabled = self.logger.isEnabledFor(level)
+        record_progress(
+            self._ctx,
+            message,
+            stage=self._stage,
+            level=normalized_level,
+            extra=progress_extra_dict,
+            gauge=progress_gauge,
+            # 未写入日志或附加数据未写入日志文本的消息，淘汰时由缓冲补写
+            logged=enabled and (not progress_extra_dict or self._include_progress_extra_in_message),
+        )
+
+        if not enabled:
             return
 
         log_message = message
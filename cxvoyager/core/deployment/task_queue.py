@@ -0,0 +1,388 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""协调者/工作者模式使用的 SQLite 持久化任务队列。
+
+Web 服务（协调者）把任务写入队列，工作者进程（可位于其他跳板机，共享同一个
+数据库文件）认领任务、定期心跳，并把阶段事件与进度消息写回事件表；协调者
+按序号增量读取自己所持任务的事件并确认，确认后的事件即被删除；多个 Web 进程
+共用同一队列时互不删除对方的事件，已结束任务的遗留事件超过保留期后统一清理。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping
+
+from cxvoyager.common.config import load_config
+from cxvoyager.common.system_constants import PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = PROJECT_ROOT / "logs" / "task_queue.db"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ABORTED = "aborted"
+TERMINAL_STATES = frozenset({DONE, FAILED, ABORTED})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker_id TEXT,
+    enqueued_at TEXT NOT NULL,
+    claimed_at TEXT,
+    heartbeat_at TEXT,
+    finished_at TEXT,
+    abort_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    resource_keys TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, priority DESC, enqueued_at);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class LeaseLostError(RuntimeError):
+    """工作者已失去任务所有权（任务被其他进程接管或被判定超时）。"""
+
+
+@dataclass
+class QueuedTask:
+    id: str
+    payload: Dict[str, Any]
+    status: str
+    worker_id: str | None = None
+    abort_requested: bool = False
+    error: str | None = None
+
+
+@dataclass
+class QueueEvent:
+    seq: int
+    task_id: str
+    kind: str
+    data: Dict[str, Any]
+
+
+def resolve_queue_settings(cfg: Mapping[str, Any] | None = None) -> Dict[str, Any]:
+    """读取配置 ``task_queue`` 段，环境变量 ``CXVOYAGER_TASK_QUEUE`` 可覆盖队列路径。"""
+
+    data = cfg if isinstance(cfg, Mapping) else load_config()
+    section = data.get("task_queue", {}) if isinstance(data, Mapping) else {}
+    if not isinstance(section, Mapping):
+        section = {}
+    env_path = os.environ.get("CXVOYAGER_TASK_QUEUE")
+    configured = env_path or section.get("path") or ""
+    return {
+        "enabled": bool(env_path) or bool(section.get("enabled", False)),
+        "path": Path(configured) if configured else DEFAULT_QUEUE_PATH,
+        "heartbeat_interval": float(section.get("heartbeat_interval", 5) or 5),
+        "lease_timeout": float(section.get("lease_timeout", 60) or 60),
+        "poll_interval": float(section.get("poll_interval", 1) or 1),
+    }
+
+
+class DurableTaskQueue:
+    """基于 SQLite 的任务队列，可被多个进程同时打开。
+
+    每次操作使用独立连接，写操作通过 ``BEGIN IMMEDIATE`` 串行化，
+    认领任务时先锁库再按优先级挑选无资源冲突的任务，保证同一任务只被一个工作者获得。
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _emit(conn: sqlite3.Connection, task_id: str, kind: str, data: Mapping[str, Any]) -> None:
+        conn.execute(
+            "INSERT INTO events (task_id, kind, data) VALUES (?, ?, ?)",
+            (task_id, kind, json.dumps(dict(data), ensure_ascii=False, default=str)),
+        )
+
+    @staticmethod
+    def _row_to_task(row: sqlite3.Row) -> QueuedTask:
+        return QueuedTask(
+            id=row["id"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            worker_id=row["worker_id"],
+            abort_requested=bool(row["abort_requested"]),
+            error=row["error"],
+        )
+
+    # ---- 协调者侧 -----------------------------------------------------
+
+    def enqueue(self, task_id: str, payload: Mapping[str, Any]) -> None:
+        """写入任务；``payload`` 中的 ``priority`` / ``resource_keys`` 参与认领顺序与互斥判断。"""
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO tasks (id, payload, status, enqueued_at, priority, resource_keys) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    task_id,
+                    json.dumps(dict(payload), ensure_ascii=False, default=str),
+                    QUEUED,
+                    _utcnow().isoformat(),
+                    int(payload.get("priority") or 0),
+                    json.dumps(list(payload.get("resource_keys") or [])),
+                ),
+            )
+        logger.debug("任务 %s 已写入持久化队列 %s", task_id, self.path)
+
+    def request_abort(self, task_id: str) -> bool:
+        """标记终止请求；尚未被认领的任务直接结束，返回任务是否存在。"""
+
+        now = _utcnow().isoformat()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return False
+            if row["status"] == QUEUED:
+                conn.execute(
+                    "UPDATE tasks SET status = ?, abort_requested = 1, finished_at = ? WHERE id = ?",
+                    (ABORTED, now, task_id),
+                )
+                self._emit(conn, task_id, "finished", {"status": ABORTED, "at": now})
+            elif row["status"] == RUNNING:
+                conn.execute("UPDATE tasks SET abort_requested = 1 WHERE id = ?", (task_id,))
+        return True
+
+    def expire_stale(self, lease_timeout: float) -> List[str]:
+        """将心跳超时的任务判定为失败。
+
+        部署阶段不可安全重放，因此超时任务不重新入队，而是交由用户确认后重新提交。
+        """
+
+        now = _utcnow()
+        cutoff = (now - timedelta(seconds=lease_timeout)).isoformat()
+        expired: List[str] = []
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_id FROM tasks WHERE status = ? AND heartbeat_at < ?",
+                (RUNNING, cutoff),
+            ).fetchall()
+            for row in rows:
+                error = f"工作者 {row['worker_id']} 心跳超时"
+                conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (FAILED, error, now.isoformat(), row["id"]),
+                )
+                self._emit(conn, row["id"], "finished", {"status": FAILED, "error": error, "at": now.isoformat()})
+                expired.append(row["id"])
+        for task_id in expired:
+            logger.warning("任务 %s 的工作者心跳超时，已标记失败", task_id)
+        return expired
+
+    def fetch_events(self, limit: int = 500, *, task_ids: Iterable[str] | None = None) -> List[QueueEvent]:
+        """按序号读取事件；给出 ``task_ids`` 时只读取这些任务的事件（多个协调者共用队列时各取所需）。"""
+
+        with self._connect() as conn:
+            if task_ids is None:
+                rows = conn.execute(
+                    "SELECT seq, task_id, kind, data FROM events ORDER BY seq LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT seq, task_id, kind, data FROM events"
+                    " WHERE task_id IN (SELECT value FROM json_each(?)) ORDER BY seq LIMIT ?",
+                    (json.dumps(list(task_ids)), limit),
+                ).fetchall()
+        return [QueueEvent(seq=row["seq"], task_id=row["task_id"], kind=row["kind"], data=json.loads(row["data"])) for row in rows]
+
+    def acknowledge(self, seq: int, *, task_ids: Iterable[str] | None = None) -> None:
+        """删除序号不大于 ``seq`` 的事件（协调者已处理）；给出 ``task_ids`` 时只删除这些任务的事件。"""
+
+        with self._transaction() as conn:
+            if task_ids is None:
+                conn.execute("DELETE FROM events WHERE seq <= ?", (seq,))
+            else:
+                conn.execute(
+                    "DELETE FROM events WHERE seq <= ? AND task_id IN (SELECT value FROM json_each(?))",
+                    (seq, json.dumps(list(task_ids))),
+                )
+
+    def purge_finished_events(self, retention: float) -> int:
+        """删除结束超过 ``retention`` 秒的任务遗留的事件（其协调者已退出，不会再确认），返回删除数量。"""
+
+        cutoff = (_utcnow() - timedelta(seconds=retention)).isoformat()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM events WHERE task_id IN (SELECT id FROM tasks WHERE finished_at IS NOT NULL AND finished_at < ?)",
+                (cutoff,),
+            )
+        return cursor.rowcount
+
+    def get(self, task_id: str) -> QueuedTask | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def queued_positions(self) -> Dict[str, int]:
+        """返回排队任务的认领顺序（1 起），供前端展示排队位置。"""
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM tasks WHERE status = ? ORDER BY priority DESC, enqueued_at, rowid",
+                (QUEUED,),
+            ).fetchall()
+        return {row["id"]: position for position, row in enumerate(rows, start=1)}
+
+    def active_task_ids(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id FROM tasks WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+        return [row["id"] for row in rows]
+
+    # ---- 工作者侧 -----------------------------------------------------
+
+    def claim(self, worker_id: str) -> QueuedTask | None:
+        """按优先级认领任务，跳过与运行中任务资源键冲突的任务（不阻塞其后的任务）。"""
+
+        now = _utcnow().isoformat()
+        with self._transaction() as conn:
+            load: Dict[str, int] = {}
+            for running in conn.execute("SELECT resource_keys FROM tasks WHERE status = ?", (RUNNING,)):
+                for key in json.loads(running["resource_keys"]):
+                    load[key] = load.get(key, 0) + 1
+            row = None
+            candidates = conn.execute(
+                "SELECT * FROM tasks WHERE status = ? ORDER BY priority DESC, enqueued_at, rowid",
+                (QUEUED,),
+            )
+            for candidate in candidates:
+                limit = int(json.loads(candidate["payload"]).get("resource_limit") or 1)
+                if all(load.get(key, 0) < limit for key in json.loads(candidate["resource_keys"])):
+                    row = candidate
+                    break
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = ?, worker_id = ?, claimed_at = ?, heartbeat_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now, now, row["id"]),
+            )
+            self._emit(conn, row["id"], "claimed", {"worker_id": worker_id, "at": now})
+        task = self._row_to_task(row)
+        task.status = RUNNING
+        task.worker_id = worker_id
+        logger.info("工作者 %s 认领任务 %s", worker_id, task.id)
+        return task
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """刷新租约并返回是否收到终止请求；失去所有权时抛出 ``LeaseLostError``。"""
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT status, worker_id, abort_requested FROM tasks WHERE id = ?",
+                (task_id,),
+            ).fetchone()
+            if row is None or row["status"] != RUNNING or row["worker_id"] != worker_id:
+                raise LeaseLostError(task_id)
+            conn.execute("UPDATE tasks SET heartbeat_at = ? WHERE id = ?", (_utcnow().isoformat(), task_id))
+        return bool(row["abort_requested"])
+
+    def publish(self, task_id: str, worker_id: str, kind: str, data: Mapping[str, Any]) -> None:
+        with self._transaction() as conn:
+            owner = conn.execute("SELECT worker_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if owner is None or owner["worker_id"] != worker_id:
+                raise LeaseLostError(task_id)
+            self._emit(conn, task_id, kind, data)
+
+    def finish(
+        self,
+        task_id: str,
+        worker_id: str,
+        status: str,
+        *,
+        result: Mapping[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        if status not in TERMINAL_STATES:
+            raise ValueError(f"非法的终态: {status}")
+        now = _utcnow().isoformat()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status, worker_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None or row["status"] != RUNNING or row["worker_id"] != worker_id:
+                raise LeaseLostError(task_id)
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, now, task_id),
+            )
+            self._emit(
+                conn,
+                task_id,
+                "finished",
+                {"status": status, "error": error, "result": dict(result or {}), "at": now},
+            )
+
+
+__all__ = [
+    "ABORTED",
+    "DONE",
+    "DurableTaskQueue",
+    "FAILED",
+    "LeaseLostError",
+    "QUEUED",
+    "QueueEvent",
+    "QueuedTask",
+    "RUNNING",
+    "TERMINAL_STATES",
+    "resolve_queue_settings",
+]
@@ -0,0 +1,259 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""任务载荷执行器。
+
+同一套事件格式（stage / progress）服务于两种场景：分布式工作者认领队列任务并回写
+协调者，以及 Web 服务把任务放入子进程执行、经跨进程队列回传进度。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Event, Thread
+from typing import Any, Callable, Dict
+from uuid import uuid4
+
+from cxvoyager.core.deployment.batch_runner import describe_batch_event, run_batch
+from cxvoyager.core.deployment.deployment_executor import RunOptions, execute_run
+from cxvoyager.core.deployment.progress import PROGRESS_SINK_KEY, OverflowPolicy, ProgressBus, get_progress_bus
+from cxvoyager.core.deployment.runtime_context import RunContext
+from cxvoyager.core.deployment.stage_manager import AbortRequestedError, Stage
+from cxvoyager.core.deployment.task_queue import (
+    ABORTED,
+    DONE,
+    FAILED,
+    DurableTaskQueue,
+    LeaseLostError,
+    QueuedTask,
+)
+
+logger = logging.getLogger(__name__)
+
+EventEmitter = Callable[[str, Dict[str, Any]], None]
+
+
+def _utcnow_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+
+
+class DeploymentWorker:
+    """循环认领队列任务并执行，执行期间后台线程持续心跳。
+
+    心跳返回终止请求或租约丢失时置位取消信号，阶段处理函数通过
+    ``raise_if_aborted`` 感知并尽快退出。``run_fn`` / ``batch_fn`` 便于测试替换。
+    """
+
+    def __init__(
+        self,
+        queue: DurableTaskQueue,
+        *,
+        worker_id: str | None = None,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 5.0,
+        run_fn: Callable[..., Any] = execute_run,
+        batch_fn: Callable[..., Any] = run_batch,
+    ) -> None:
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._run_fn = run_fn
+        self._batch_fn = batch_fn
+
+    def run_forever(self, stop_event: Event | None = None, max_tasks: int | None = None) -> int:
+        """持续处理任务直到 ``stop_event`` 置位或处理满 ``max_tasks`` 个，返回处理数量。"""
+
+        stop = stop_event or Event()
+        handled = 0
+        logger.info("工作者 %s 启动，队列=%s", self.worker_id, self.queue.path)
+        while not stop.is_set():
+            if max_tasks is not None and handled >= max_tasks:
+                break
+            if self.run_once():
+                handled += 1
+            else:
+                stop.wait(self.poll_interval)
+        logger.info("工作者 %s 退出，共处理 %d 个任务", self.worker_id, handled)
+        return handled
+
+    def run_once(self) -> bool:
+        task = self.queue.claim(self.worker_id)
+        if task is None:
+            return False
+        self._execute(task)
+        return True
+
+    def _publish(self, task: QueuedTask, kind: str, data: Dict[str, Any]) -> None:
+        try:
+            self.queue.publish(task.id, self.worker_id, kind, data)
+        except LeaseLostError:
+            logger.warning("任务 %s 的租约已失效，丢弃事件 %s", task.id, kind)
+
+    def _heartbeat_loop(self, task: QueuedTask, cancel_event: Event, finished: Event) -> None:
+        while not finished.wait(self.heartbeat_interval):
+            try:
+                if self.queue.heartbeat(task.id, self.worker_id):
+                    logger.info("任务 %s 收到终止请求", task.id)
+                    cancel_event.set()
+            except LeaseLostError:
+                logger.warning("任务 %s 的租约已丢失，停止执行", task.id)
+                cancel_event.set()
+                return
+            except Exception:  # pragma: no cover - 数据库暂时不可用时继续重试
+                logger.exception("任务 %s 心跳失败", task.id)
+
+    def _execute(self, task: QueuedTask) -> None:
+        cancel_event = Event()
+        finished = Event()
+        if task.abort_requested:
+            cancel_event.set()
+        heartbeat = Thread(
+            target=self._heartbeat_loop,
+            args=(task, cancel_event, finished),
+            name=f"heartbeat-{task.id[:8]}",
+            daemon=True,
+        )
+        heartbeat.start()
+        status, result, error = FAILED, None, None
+        try:
+            result = execute_payload(
+                task.payload,
+                lambda kind, data: self._publish(task, kind, data),
+                cancel_event,
+                run_fn=self._run_fn,
+                batch_fn=self._batch_fn,
+            )
+            status = DONE
+            batch = result.get("batch")
+            if batch is not None and not batch.get("ok"):
+                status = FAILED
+                error = f"{batch.get('failed')}/{batch.get('total')} 个集群部署失败"
+            if cancel_event.is_set():
+                status = ABORTED
+        except AbortRequestedError:
+            status = ABORTED
+        except Exception as exc:  # noqa: BLE001 - 失败原因回传协调者
+            logger.exception("任务 %s 执行失败: %s", task.id, exc)
+            status, error = FAILED, str(exc) or exc.__class__.__name__
+        finally:
+            finished.set()
+            heartbeat.join(timeout=self.heartbeat_interval)
+        try:
+            self.queue.finish(task.id, self.worker_id, status, result=result, error=error)
+        except LeaseLostError:
+            logger.warning("任务 %s 的租约已失效，结果未回写", task.id)
+        logger.info("工作者 %s 完成任务 %s，状态=%s", self.worker_id, task.id, status)
+
+
+def execute_payload(
+    payload: Dict[str, Any],
+    emit: EventEmitter,
+    cancel_event: Any,
+    *,
+    run_fn: Callable[..., Any] = execute_run,
+    batch_fn: Callable[..., Any] = run_batch,
+) -> Dict[str, Any]:
+    """执行任务载荷（``kind`` 为 run 或 batch），阶段/进度事件经 ``emit`` 回传。
+
+    ``cancel_event`` 只需提供 ``is_set()``，既可以是线程事件，也可以是跨进程的代理对象。
+    """
+
+    stages = [Stage(name) for name in payload.get("stages", [])]
+    options = RunOptions(**payload.get("options", {}))
+
+    if payload.get("kind") == "batch":
+
+        def _on_event(event: str, item, outcome: Dict[str, Any] | None) -> None:
+            emit("progress", {**describe_batch_event(event, item, outcome), "at": _utcnow_iso()})
+
+        batch = batch_fn(
+            payload.get("plan_files", []),
+            stages,
+            options,
+            max_parallel=payload.get("max_parallel"),
+            per_cloudtower_limit=payload.get("per_cloudtower_limit"),
+            event_callback=_on_event,
+            abort_signal=cancel_event,
+        )
+        return {"batch": batch.to_dict()}
+
+    def _sink(event: Dict[str, Any]) -> None:
+        at = event.get("at")
+        emit(
+            "progress",
+            {
+                "message": event.get("message"),
+                "stage": event.get("stage"),
+                "level": event.get("level", "info"),
+                "at": at.isoformat() if isinstance(at, datetime) else (at or _utcnow_iso()),
+                "extra": event.get("extra"),
+                "gauge": event.get("gauge"),
+            },
+        )
+
+    buses: list[ProgressBus] = []
+
+    def progress_callback(event: str, stage: Stage, run_ctx) -> None:
+        completed = None
+        if run_ctx is not None and getattr(run_ctx, "completed_stages", None) is not None:
+            completed = list(run_ctx.completed_stages)
+        emit("stage", {"event": event, "stage": stage.value, "completed_stages": completed, "at": _utcnow_iso()})
+        if isinstance(run_ctx, RunContext) and not buses and not run_ctx.extra.get(PROGRESS_SINK_KEY):
+            # 经总线的独立投递线程转发，跨进程/数据库写入不占用部署线程；进度消息不允许丢失
+            bus = get_progress_bus(run_ctx)
+            bus.subscribe("task-events", maxsize=10000, policy=OverflowPolicy.block, handler=_sink)
+            buses.append(bus)
+        if cancel_event.is_set():
+            raise AbortRequestedError(stage.value)
+
+    # 指定规划文件（Excel 或 JSON 规划）时才传入，未指定时沿用工作目录查找
+    run_kwargs = {"plan_file": Path(payload["plan_file"])} if payload.get("plan_file") else {}
+    try:
+        result = run_fn(stages, options, progress_callback=progress_callback, abort_signal=cancel_event, **run_kwargs)
+    finally:
+        for bus in buses:  # 结果返回前投递完剩余消息，保证顺序在 finished 之前
+            bus.close()
+    return result.to_dict()
+
+
+def run_payload_in_process(
+    payload: Dict[str, Any],
+    event_queue: Any,
+    abort_event: Any,
+    run_fn: Callable[..., Any] | None = None,
+) -> Dict[str, Any]:
+    """进程池入口：事件写入跨进程队列，异常转换为可 pickle 的类型后抛回父进程。"""
+
+    def _emit(kind: str, data: Dict[str, Any]) -> None:
+        event_queue.put((kind, data))
+
+    try:
+        return execute_payload(payload, _emit, abort_event, run_fn=run_fn or execute_run)
+    except AbortRequestedError:
+        raise
+    except Exception as exc:  # noqa: BLE001 - 第三方异常未必可 pickle
+        raise RuntimeError(str(exc) or exc.__class__.__name__) from None
+
+
+__all__ = ["DeploymentWorker", "default_worker_id", "execute_payload", "run_payload_in_process"]
@@ -0,0 +1,259 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""批量校验多份规划表：进程池并行解析与校验，并检查集群之间的地址冲突。
+
+每份规划表在工作进程中执行 ``parse_plan`` → ``validate``（含 ``validate_plan_model``），
+解析结果命中磁盘缓存时不再读取 Excel。各工作进程同时返回规划表声明的地址，
+由调用方汇总到共享的地址索引中，找出被多个集群同时占用的 IP。
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from cxvoyager.common.address_index import KIND_ADDRESS, AddressIndex
+
+logger = logging.getLogger(__name__)
+
+# 存储网络通常为集群私有，跨集群复用地址只提示警告；其余角色冲突视为错误
+SHARED_OK_ROLES = frozenset({"storage"})
+# 多个集群接入同一套管理组件是常见部署方式，所有规划表都以同一角色声明该地址时记为共享
+SHARED_COMPONENT_ROLES = frozenset({"component:cloudtower", "component:obs", "component:backup"})
+
+
+def _conflict_severity(entries: Sequence[Any]) -> str:
+    roles = {entry.role for entry in entries}
+    if len(roles) == 1 and roles <= SHARED_COMPONENT_ROLES:
+        return "shared"
+    if {entry.role_group for entry in entries} <= SHARED_OK_ROLES:
+        return "warning"
+    return "error"
+
+
+def _plan_addresses(model: Any) -> List[Tuple[str, str]]:
+    """规划表中声明的 ``(IP, 角色)`` 列表，角色带主机名或组件名便于定位。"""
+
+    index = AddressIndex.from_plan(model)
+    return [(entry.value, entry.role) for entry in index.entries(KIND_ADDRESS)]
+
+
+def validate_plan_file(plan_file: str) -> Dict[str, Any]:
+    """在工作进程内解析并校验单份规划表（需可被 pickle，供进程池调用）。
+
+    异常被转换为 ``status=failed`` 的结果，单份规划表损坏不影响其余文件。
+    """
+
+    from cxvoyager.core.validation.validator import validate
+    from cxvoyager.integrations.excel.planning_sheet_parser import parse_plan, to_model
+
+    timing: Dict[str, float] = {}
+    started = time.perf_counter()
+    try:
+        # 校验不使用密码，可直接使用去掉密码的磁盘缓存
+        parsed = parse_plan(Path(plan_file), credentials=False)
+        timing["parse"] = time.perf_counter() - started
+        mark = time.perf_counter()
+        report = validate(parsed)
+        model = to_model(parsed)
+        timing["validate"] = time.perf_counter() - mark
+    except Exception as exc:  # noqa: BLE001 - 转换为结果，不向进程池抛出
+        timing["total"] = time.perf_counter() - started
+        return {
+            "plan_file": plan_file,
+            "status": "failed",
+            "error": str(exc) or exc.__class__.__name__,
+            "traceback": traceback.format_exc(),
+            "timing": timing,
+        }
+    timing["total"] = time.perf_counter() - started
+    cluster_names = sorted({host.集群名称 for host in model.hosts if host.集群名称})
+    return {
+        "plan_file": plan_file,
+        "status": "ok" if report.get("ok") else "invalid",
+        "cluster_name": cluster_names[0] if cluster_names else None,
+        "errors": list(report.get("errors", [])),
+        "warnings": list(report.get("warnings", [])),
+        "summary": report.get("summary", {}),
+        "content_hash": parsed.get("_meta", {}).get("content_hash"),
+        "addresses": _plan_addresses(model),
+        "timing": timing,
+    }
+
+
+def find_cross_plan_conflicts(results: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """把各规划表声明的地址汇总到共享地址索引，返回被多份规划表同时使用的地址。
+
+    ``severity``：跨角色占用或主机、VIP、ER 地址重复为 ``error``；仅存储地址重复为 ``warning``；
+    所有规划表都把同一地址声明为同一管理组件（CloudTower/OBS/备份）时为 ``shared``。
+    """
+
+    index = AddressIndex()
+    for result in results:
+        for ip, role in result.get("addresses") or []:
+            index.add_address(ip, role, owner=result["plan_file"])
+
+    conflicts: List[Dict[str, Any]] = []
+    for ip, entries in index.duplicates():
+        if len({entry.owner for entry in entries}) < 2:
+            continue
+        conflicts.append(
+            {
+                "ip": ip,
+                "severity": _conflict_severity(entries),
+                "owners": [{"plan_file": entry.owner, "role": entry.role} for entry in entries],
+            }
+        )
+    rank = {"error": 0, "warning": 1, "shared": 2}
+    conflicts.sort(key=lambda item: (rank[item["severity"]], item["ip"]))
+    return conflicts
+
+
+@dataclass
+class BatchValidationResult:
+    started_at: datetime
+    finished_at: datetime
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    conflicts: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(item["status"] == "ok" for item in self.items) and not any(
+            conflict["severity"] == "error" for conflict in self.conflicts
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for item in self.items:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        return {
+            "ok": self.ok,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat(),
+            "duration": round((self.finished_at - self.started_at).total_seconds(), 3),
+            "total": len(self.items),
+            "counts": counts,
+            "conflicts": self.conflicts,
+            "items": [
+                {
+                    **{key: value for key, value in item.items() if key not in {"addresses", "timing"}},
+                    "timing": {key: round(value, 3) for key, value in item.get("timing", {}).items()},
+                }
+                for item in self.items
+            ],
+        }
+
+    def to_markdown(self) -> str:
+        data = self.to_dict()
+        lines = [
+            "# 规划表批量校验报告",
+            "",
+            f"- 结果: {'通过' if data['ok'] else '未通过'}",
+            f"- 规划表: {data['total']} 份，用时 {data['duration']}s",
+            "",
+            "| 规划表 | 集群 | 结果 | 错误 | 警告 | 解析(s) | 校验(s) |",
+            "| --- | --- | --- | --- | --- | --- | --- |",
+        ]
+        for item in data["items"]:
+            timing = item.get("timing", {})
+            lines.append(
+                "| {file} | {cluster} | {status} | {errors} | {warnings} | {parse} | {validate} |".format(
+                    file=Path(item["plan_file"]).name,
+                    cluster=item.get("cluster_name") or "-",
+                    status=item["status"],
+                    errors=len(item.get("errors", [])) if item["status"] != "failed" else item.get("error"),
+                    warnings=len(item.get("warnings", [])),
+                    parse=timing.get("parse", "-"),
+                    validate=timing.get("validate", "-"),
+                )
+            )
+        if data["conflicts"]:
+            lines += ["", "## 跨规划表地址冲突", ""]
+            for conflict in data["conflicts"]:
+                owners = ", ".join(
+                    f"{Path(owner['plan_file']).name}({owner['role']})" for owner in conflict["owners"]
+                )
+                lines.append(f"- [{conflict['severity']}] {conflict['ip']}: {owners}")
+        problems = [item for item in data["items"] if item.get("errors") or item.get("warnings")]
+        if problems:
+            lines += ["", "## 明细", ""]
+            for item in problems:
+                lines.append(f"### {Path(item['plan_file']).name}")
+                lines += [f"- 错误: {message}" for message in item.get("errors", [])]
+                lines += [f"- 警告: {message}" for message in item.get("warnings", [])]
+        return "\n".join(lines) + "\n"
+
+
+def _default_executor(max_workers: int) -> Executor:
+    # 与批量部署一致使用 spawn，避免 fork 带锁状态
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def validate_plans(
+    plan_files: Sequence[str | Path],
+    *,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+    runner: Callable[[str], Dict[str, Any]] = validate_plan_file,
+) -> BatchValidationResult:
+    """并行校验多份规划表，返回逐个文件的报告、用时与跨规划表地址冲突。"""
+
+    started_at = datetime.now(timezone.utc)
+    paths = [str(Path(raw).resolve()) for raw in plan_files]
+    workers = max(1, min(max_workers or multiprocessing.cpu_count(), len(paths) or 1))
+    owns_executor = executor is None
+    pool = executor or _default_executor(workers)
+    try:
+        futures = [pool.submit(runner, path) for path in paths]
+        items: List[Dict[str, Any]] = []
+        for path, future in zip(paths, futures):
+            try:
+                items.append(future.result())
+            except Exception as exc:  # noqa: BLE001 - 工作进程崩溃等
+                items.append({"plan_file": path, "status": "failed", "error": str(exc) or exc.__class__.__name__})
+    finally:
+        if owns_executor:
+            pool.shutdown(wait=True)
+
+    result = BatchValidationResult(
+        started_at=started_at,
+        finished_at=datetime.now(timezone.utc),
+        items=items,
+        conflicts=find_cross_plan_conflicts(items),
+    )
+    logger.info(
+        "批量校验完成：规划表=%d，未通过=%d，跨规划表冲突=%d，用时 %.2fs",
+        len(items),
+        sum(1 for item in items if item["status"] != "ok"),
+        len(result.conflicts),
+        (result.finished_at - started_at).total_seconds(),
+    )
+    return result
+
+
+__all__ = [
+    "BatchValidationResult",
+    "find_cross_plan_conflicts",
+    "validate_plan_file",
+    "validate_plans",
+]
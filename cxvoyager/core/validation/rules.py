@@ -18,6 +18,7 @@
 from __future__ import annotations
 from typing import List, Set
 from cxvoyager.models import PlanModel
+from cxvoyager.common.address_index import AddressIndex
 from cxvoyager.common.ip_utils import validate_cidrs, is_ipv6
 
 ALLOWED_BOND = {"active-backup", "balance-tcp", "balance-slb"}
@@ -57,15 +58,19 @@ def validate_plan_model(model: PlanModel) -> dict:
         if not model.mgmt.root密码:
             errors.append("缺少Cloudtower root密码")
 
-    # 管理地址重复
+    # 管理地址重复、VIP 与主机地址冲突：规划表地址建一次索引后排序比较
+    index = AddressIndex.from_plan(model)
     mgmt_ips = [str(h.管理地址) for h in model.hosts if h.管理地址]
-    dup = {ip for ip in mgmt_ips if mgmt_ips.count(ip) > 1}
+    dup = {ip for ip, _ in index.duplicates(roles={"mgmt"})}
     if dup:
         errors.append(f"重复管理地址: {dup}")
 
-    # VIP 与主机地址冲突
     vips: Set[str] = {str(h.集群VIP) for h in model.hosts if h.集群VIP}
-    conflict = vips.intersection(mgmt_ips)
+    conflict = {
+        ip
+        for ip, entries in index.duplicates(roles={"mgmt", "cluster_vip"})
+        if {"mgmt", "cluster_vip"} <= {entry.role_group for entry in entries}
+    }
     if conflict:
         errors.append(f"VIP 与 管理地址冲突: {conflict}")
 
@@ -21,6 +21,7 @@ from ipaddress import ip_address, ip_network
 from typing import Any, Dict, Iterable, List, Tuple
 
 from .rules import validate_plan_model
+from cxvoyager.common.address_index import KIND_NETWORK, AddressIndex
 from cxvoyager.integrations.excel.planning_sheet_parser import to_model
 
 
@@ -76,25 +77,21 @@ def _check_ips_in_any_network(ips: Iterable[str], cidrs: List[str]) -> List[str]
     if not cidrs:
         return []
 
-    networks = []
+    # 非法子网会在前置校验中报错，这里由索引忽略以避免重复。
+    index = AddressIndex()
     for cidr in cidrs:
-        try:
-            networks.append(ip_network(cidr, strict=False))
-        except ValueError:
-            # 非法子网会在前置校验中报错，这里忽略以避免重复。
-            continue
+        index.add_network(cidr)
+    declared = ", ".join(sorted({ip_network(e.value, strict=False).with_prefixlen for e in index.entries(KIND_NETWORK)}))
 
     errors: List[str] = []
     for ip_str in ips:
         try:
-            addr = ip_address(ip_str)
+            ip_address(ip_str)
         except ValueError:
             errors.append(f"管理组件 IP {ip_str} 非法，无法校验所属网络")
             continue
-        if not any(addr in net for net in networks):
-            errors.append(
-                f"管理组件 IP {ip_str} 未落在任何声明的子网 {', '.join(sorted({n.with_prefixlen for n in networks}))} 内"
-            )
+        if not index.containing(ip_str, kind=KIND_NETWORK):
+            errors.append(f"管理组件 IP {ip_str} 未落在任何声明的子网 {declared} 内")
     return errors
 
 
@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""编译后的 JSON 规划：由 Excel 规划表导出，无需 openpyxl 即可毫秒级加载。
+
+文件结构见 ``CompiledPlanDocument``：外层带格式名与版本号，``plan`` 与 ``parse_plan``
+的返回值一致，因此 ``parse_plan`` 遇到 ``.json`` 文件时直接加载，各阶段、批量部署与
+``/api/run`` 无需区分规划来源。``plan.variables`` 是权威数据：阶段回写的单元格（如序列号）
+按变量登记表映射回变量，再由变量重建其余分段后保存。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from uuid import uuid4
+
+from pydantic import ValidationError
+
+from cxvoyager.application_version import __version__
+from cxvoyager.common.system_constants import PROJECT_ROOT
+from cxvoyager.models import CompiledPlanDocument
+from . import field_variables as plan_vars
+
+logger = logging.getLogger(__name__)
+
+COMPILED_PLAN_FORMAT = "cxvoyager-plan"
+COMPILED_PLAN_VERSION = 1
+COMPILED_PLAN_SUFFIX = ".plan.json"
+
+
+class CompiledPlanError(ValueError):
+    """JSON 规划文件无法解析或不符合格式定义。"""
+
+
+def plan_store_dir() -> Path:
+    """经 API 内联提交的 JSON 规划保存目录；环境变量 ``CXVOYAGER_PLAN_STORE_DIR`` 可覆盖。"""
+
+    configured = os.environ.get("CXVOYAGER_PLAN_STORE_DIR")
+    if configured and configured.strip():
+        return Path(configured.strip())
+    return PROJECT_ROOT / "artifacts" / "plans"
+
+
+def is_compiled_plan(file_path: Path | str) -> bool:
+    return Path(file_path).suffix.lower() == ".json"
+
+
+def default_output_path(workbook: Path | str) -> Path:
+    path = Path(workbook)
+    return path.with_name(path.stem + COMPILED_PLAN_SUFFIX)
+
+
+def _json_default(value: Any) -> Any:
+    # 单元格中的日期时间按 ISO 格式保存，其余无法表示的值转为字符串
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def validate_compiled_plan(document: Any, *, source: str = "<inline>") -> CompiledPlanDocument:
+    """按格式定义校验 JSON 规划文档，不支持的版本或结构错误抛出 ``CompiledPlanError``。"""
+
+    if not isinstance(document, dict) or document.get("format") != COMPILED_PLAN_FORMAT:
+        raise CompiledPlanError(f"{source} 不是 CXVoyager JSON 规划文件（format 应为 {COMPILED_PLAN_FORMAT}）")
+    version = document.get("version")
+    if isinstance(version, int) and version > COMPILED_PLAN_VERSION:
+        raise CompiledPlanError(
+            f"{source} 的格式版本 {version} 高于当前支持的版本 {COMPILED_PLAN_VERSION}，请升级 CXVoyager 或重新编译"
+        )
+    try:
+        return CompiledPlanDocument.model_validate(document)
+    except ValidationError as exc:
+        raise CompiledPlanError(f"{source} 格式校验失败: {exc}") from exc
+
+
+def build_compiled_plan(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """把 ``parse_plan`` 的结果包装为 JSON 规划文档。"""
+
+    meta = parsed.get("_meta", {})
+    source_file = meta.get("source_file")
+    return {
+        "format": COMPILED_PLAN_FORMAT,
+        "version": COMPILED_PLAN_VERSION,
+        "compiled_at": datetime.now(timezone.utc).isoformat(),
+        "generator": f"cxvoyager {__version__}",
+        "source": {
+            "file": Path(source_file).name if source_file else None,
+            "content_hash": meta.get("content_hash"),
+            "missing_sheets": list(meta.get("missing_sheets") or []),
+        },
+        "plan": {key: value for key, value in parsed.items() if key != "_meta"},
+    }
+
+
+def _atomic_write_json(path: Path, document: Dict[str, Any]) -> None:
+    text = json.dumps(document, ensure_ascii=False, indent=2, default=_json_default)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid4().hex[:8]}.tmp")
+    try:
+        tmp.write_text(text + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def compile_plan(workbook: Path | str, output: Path | str | None = None) -> Path:
+    """解析 Excel 规划表并导出 JSON 规划，返回输出路径（缺省为 ``<规划表名>.plan.json``）。
+
+    导出前先转换为 ``PlanModel``，字段类型不合法的规划表不会被编译。
+    """
+
+    from .planning_sheet_parser import parse_plan, to_model
+
+    source = Path(workbook)
+    parsed = parse_plan(source)
+    to_model(parsed)
+    document = build_compiled_plan(parsed)
+    validate_compiled_plan(json.loads(json.dumps(document, default=_json_default)), source=str(source))
+    target = Path(output) if output else default_output_path(source)
+    _atomic_write_json(target, document)
+    logger.info("规划表已编译为 JSON: %s -> %s", source, target)
+    return target
+
+
+def store_compiled_plan(document: Dict[str, Any], directory: Path | str | None = None) -> Path:
+    """校验后把 JSON 规划文档保存到目录中，文件名取内容哈希，相同内容只保存一份。"""
+
+    validate_compiled_plan(document)
+    text = json.dumps(document, ensure_ascii=False, sort_keys=True, default=_json_default)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    target = Path(directory or plan_store_dir()) / f"{digest}{COMPILED_PLAN_SUFFIX}"
+    if not target.exists():
+        _atomic_write_json(target, document)
+    return target
+
+
+def load_compiled_plan(file_path: Path | str) -> Dict[str, Any]:
+    """加载 JSON 规划，返回与 ``parse_plan`` 相同结构的字典。"""
+
+    path = Path(file_path)
+    raw = path.read_bytes()
+    try:
+        document = json.loads(raw.decode("utf-8"))
+    except ValueError as exc:
+        raise CompiledPlanError(f"{path} 不是合法的 JSON: {exc}") from exc
+    validate_compiled_plan(document, source=str(path))
+
+    data: Dict[str, Any] = dict(document["plan"])
+    source = document.get("source") or {}
+    data["_meta"] = {
+        "source_file": str(path),
+        "content_hash": hashlib.sha256(raw).hexdigest(),
+        "format": COMPILED_PLAN_FORMAT,
+        "format_version": document["version"],
+        "compiled_from": source,
+        "missing_sheets": list(source.get("missing_sheets") or []),
+    }
+    return data
+
+
+def write_compiled_plan_cells(file_path: Path | str, cells: Dict[Tuple[str, str], Any]) -> None:
+    """把按 ``(sheet, 单元格)`` 登记的回写映射到 ``plan.variables``，重建各分段后原子保存，原文件保留为 ``.bak``。"""
+
+    from .planning_sheet_parser import build_plan_sections
+
+    path = Path(file_path)
+    by_cell = {(var.sheet, var.cell): key for key, var in plan_vars.PLAN_VARIABLES.items()}
+    document = json.loads(path.read_text(encoding="utf-8"))
+    validate_compiled_plan(document, source=str(path))
+    variables = document["plan"].setdefault("variables", {})
+    for (sheet, cell), value in cells.items():
+        key = by_cell.get((sheet, cell))
+        if key is None:
+            raise KeyError(f"JSON 规划中没有与 {sheet}!{cell} 对应的变量")
+        variables[key] = value
+    document["plan"] = build_plan_sections(variables, document["plan"].get("tables") or {})
+    shutil.copy2(path, path.with_name(path.name + ".bak"))
+    _atomic_write_json(path, document)
+
+
+__all__ = [
+    "COMPILED_PLAN_FORMAT",
+    "COMPILED_PLAN_SUFFIX",
+    "COMPILED_PLAN_VERSION",
+    "CompiledPlanError",
+    "build_compiled_plan",
+    "compile_plan",
+    "default_output_path",
+    "is_compiled_plan",
+    "load_compiled_plan",
+    "plan_store_dir",
+    "store_compiled_plan",
+    "validate_compiled_plan",
+    "write_compiled_plan_cells",
+]
@@ -14,35 +14,99 @@
 # You should have received a copy of the GNU General Public License
 # along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
 
-"""规划表固定坐标变量表。"""
+"""规划表固定坐标变量表与行数不固定的表格区域定义。"""
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 
 @dataclass(frozen=True)
 class PlanVariable:
-    """单个规划表字段的坐标定义。"""
+    """单个规划表字段的坐标定义；``sensitive`` 标记密码等不得明文落盘的字段。"""
 
     key: str
     sheet: str
     cell: str
     description: str = ""
     default: Any = None
+    sensitive: bool = False
 
 
-PLAN_VARIABLES: Dict[str, PlanVariable] = {}
+@dataclass(frozen=True)
+class TableColumn:
+    """表格区域中的一列：按表头文字定位，找不到表头时回退到模板中的列号。
+
+    ``after`` 指定另一列字段名，用于区分重名表头（如主机表中的两个“密码”）。
+    """
+
+    field: str
+    column: str
+    headers: Tuple[str, ...]
+    default: Any = None
+    after: str | None = None
+    sensitive: bool = False
+
+
+@dataclass(frozen=True)
+class PlanTable:
+    """行数不固定的表格区域（主机表、业务网络表）。
+
+    从 ``first_row``（缺省为表头下一行）开始逐行读取。给出 ``footer``（列号与标签文字）时读到该标签
+    所在行为止，中间 ``sentinel`` 字段全部为空的行不结束表格；未给出或找不到标签时遇到 ``sentinel``
+    字段全部为空的行结束。同一 sheet 中位于模板 ``footer_row`` 及以下的变量随表格实际结束行整体平移。
+    """
+
+    key: str
+    sheet: str
+    columns: Tuple[TableColumn, ...]
+    header_row: int
+    sentinel: Tuple[str, ...]
+    footer_row: int
+    first_row: int | None = None
+    footer: Tuple[str, Tuple[str, ...]] | None = None
 
 
-def register_variable(key: str, sheet: str, cell: str, description: str = "", default: Any = None) -> PlanVariable:
+PLAN_VARIABLES: Dict[str, PlanVariable] = {}
+PLAN_TABLES: Dict[str, PlanTable] = {}
+
+
+def register_variable(
+    key: str,
+    sheet: str,
+    cell: str,
+    description: str = "",
+    default: Any = None,
+    *,
+    sensitive: bool = False,
+) -> PlanVariable:
     if key in PLAN_VARIABLES:
         raise ValueError(f"重复的变量声明: {key}")
-    var = PlanVariable(key=key, sheet=sheet, cell=cell, description=description, default=default)
+    var = PlanVariable(key=key, sheet=sheet, cell=cell, description=description, default=default, sensitive=sensitive)
     PLAN_VARIABLES[key] = var
     return var
 
 
+def register_table(
+    key: str,
+    sheet: str,
+    *,
+    columns: List[TableColumn],
+    header_row: int,
+    sentinel: Tuple[str, ...],
+    footer_row: int,
+    first_row: int | None = None,
+    footer: Tuple[str, Tuple[str, ...]] | None = None,
+) -> PlanTable:
+    if key in PLAN_TABLES:
+        raise ValueError(f"重复的表格声明: {key}")
+    if any(existing.sheet == sheet for existing in PLAN_TABLES.values()):
+        raise ValueError(f"每个 sheet 只支持一个表格区域: {sheet}")
+    table = PlanTable(key, sheet, tuple(columns), header_row, tuple(sentinel), footer_row, first_row, footer)
+    PLAN_TABLES[key] = table
+    return table
+
+
 # --- 虚拟网络 sheet 固定字段 ---
 CLUSTER_NAME = register_variable("CLUSTER_NAME", "虚拟网络", "B3", "集群名称")
 MGMT_VDS_NAME = register_variable("MGMT_VDS_NAME", "虚拟网络", "C4", "管理虚拟交换机名称")
@@ -86,30 +150,22 @@ BACKUP_BOND_MODE = register_variable("BACKUP_BOND_MODE", "虚拟网络", "K7", "
 BUSINESS_BOND_MODE = register_variable("BUSINESS_BOND_MODE", "虚拟网络", "K8", "业务交换机网口绑定模式")
 
 
-BUSINESS_NETWORK_MAX = 11
-BUSINESS_NETWORK_NAME_KEYS: List[str] = []
-BUSINESS_NETWORK_VLAN_ID_KEYS: List[str] = []
-BUSINESS_NETWORK_VLAN_TYPE_KEYS: List[str] = []
-BUSINESS_NETWORK_SUBNET_KEYS: List[str] = []
-BUSINESS_NETWORK_GATEWAY_KEYS: List[str] = []
-
-for idx, row in enumerate(range(8, 19), start=1):
-    suffix = f"{idx:02d}"
-    BUSINESS_NETWORK_NAME_KEYS.append(
-        register_variable(f"BUSINESS_NETWORK_{suffix}_NAME", "虚拟网络", f"D{row}", "业务虚拟网络名称").key
-    )
-    BUSINESS_NETWORK_VLAN_ID_KEYS.append(
-        register_variable(f"BUSINESS_NETWORK_{suffix}_VLAN_ID", "虚拟网络", f"F{row}", "业务 VLAN ID").key
-    )
-    BUSINESS_NETWORK_VLAN_TYPE_KEYS.append(
-        register_variable(f"BUSINESS_NETWORK_{suffix}_VLAN_TYPE", "虚拟网络", f"G{row}", "业务 VLAN 类型").key
-    )
-    BUSINESS_NETWORK_SUBNET_KEYS.append(
-        register_variable(f"BUSINESS_NETWORK_{suffix}_SUBNET", "虚拟网络", f"H{row}", "业务子网").key
-    )
-    BUSINESS_NETWORK_GATEWAY_KEYS.append(
-        register_variable(f"BUSINESS_NETWORK_{suffix}_GATEWAY", "虚拟网络", f"I{row}", "业务网关").key
-    )
+# 业务虚拟网络从第 8 行（业务虚拟交换机所在行）开始逐行读取，直到虚拟网络名称、VLAN、子网与网关均为空的行
+BUSINESS_NETWORK_TABLE = register_table(
+    "business_networks",
+    "虚拟网络",
+    columns=[
+        TableColumn("name", "D", ("虚拟网络",)),
+        TableColumn("vlan_id", "F", ("VLAN ID", "VLANID")),
+        TableColumn("vlan_type", "G", ("VLAN类型", "VLAN 类型")),
+        TableColumn("subnet", "H", ("SubNetwork", "子网")),
+        TableColumn("gateway", "I", ("Gateway", "网关")),
+    ],
+    header_row=2,
+    first_row=8,
+    sentinel=("name", "vlan_id", "subnet", "gateway"),
+    footer_row=19,
+)
 
 
 # --- 主机规划 sheet 固定字段 ---
@@ -117,63 +173,39 @@ HOST_CLUSTER_NAME = register_variable("HOST_CLUSTER_NAME", "主机规划", "C3",
 CLUSTER_VIP = register_variable("CLUSTER_VIP", "主机规划", "I19", "集群 VIP")
 CLUSTER_FUNCTION = register_variable("CLUSTER_FUNCTION", "主机规划", "O19", "集群功能")
 FISHEYE_ADMIN_USER = register_variable("FISHEYE_ADMIN_USER", "主机规划", "L19", "Fisheye 集群管理员用户名", default="root")
-FISHEYE_ADMIN_PASSWORD = register_variable("FISHEYE_ADMIN_PASSWORD", "主机规划", "M19", "Fisheye 集群管理员密码", default="HC!r0cks")
+FISHEYE_ADMIN_PASSWORD = register_variable("FISHEYE_ADMIN_PASSWORD", "主机规划", "M19", "Fisheye 集群管理员密码", default="HC!r0cks", sensitive=True)
 CLUSTER_SERIAL = register_variable("CLUSTER_SERIAL", "主机规划", "E19", "集群序列号")
 STORAGE_ARCHITECTURE = register_variable("STORAGE_ARCHITECTURE","主机规划","Q19","存储架构（混闪-分层 / 全闪-不分层）",default="混闪-分层")
 NETWORK_ARCHITECTURE = register_variable("NETWORK_ARCHITECTURE","主机规划","Q20","网络架构（三网融合 / 存储独立 / 三网独立）",default="三网独立")
 
-HOST_MAX = 16
-HOST_ROW_RANGE = range(3, 3 + HOST_MAX)
-
-HOST_BMC_IP_KEYS: List[str] = []
-HOST_BMC_USER_KEYS: List[str] = []
-HOST_BMC_PASSWORD_KEYS: List[str] = []
-HOST_HOSTNAME_KEYS: List[str] = []
-HOST_MGMT_IP_KEYS: List[str] = []
-HOST_STORAGE_IP_KEYS: List[str] = []
-HOST_SSH_USER_KEYS: List[str] = []
-HOST_SSH_PASSWORD_KEYS: List[str] = []
-
-for idx, row in enumerate(HOST_ROW_RANGE, start=1):
-    suffix = f"{idx:02d}"
-    HOST_BMC_IP_KEYS.append(
-        register_variable(f"HOST_{suffix}_BMC_IP", "主机规划", f"E{row}", "主机带外管理 IP").key
-    )
-    HOST_BMC_USER_KEYS.append(
-        register_variable(
-            f"HOST_{suffix}_BMC_USER", "主机规划", f"F{row}", "主机带外用户名", default="ADMIN"
-        ).key
-    )
-    HOST_BMC_PASSWORD_KEYS.append(
-        register_variable(
-            f"HOST_{suffix}_BMC_PASSWORD", "主机规划", f"G{row}", "主机带外密码", default="ADMIN"
-        ).key
-    )
-    HOST_HOSTNAME_KEYS.append(
-        register_variable(f"HOST_{suffix}_HOSTNAME", "主机规划", f"H{row}", "SMTX OS 主机名").key
-    )
-    HOST_MGMT_IP_KEYS.append(
-        register_variable(f"HOST_{suffix}_MGMT_IP", "主机规划", f"I{row}", "管理地址").key
-    )
-    HOST_SSH_USER_KEYS.append(
-        register_variable(
-            f"HOST_{suffix}_SSH_USER", "主机规划", f"J{row}", "主机 SSH 用户名", default="smartx"
-        ).key
-    )
-    HOST_SSH_PASSWORD_KEYS.append(
-        register_variable(
-            f"HOST_{suffix}_SSH_PASSWORD", "主机规划", f"K{row}", "主机 SSH 密码", default="HC!r0cks"
-        ).key
-    )
-    HOST_STORAGE_IP_KEYS.append(
-        register_variable(f"HOST_{suffix}_STORAGE_IP", "主机规划", f"N{row}", "存储地址").key
-    )
+# 主机表从表头下一行开始逐行读取，直到 H 列标签为“集群VIP”的行；中间带外地址、主机名、管理地址、存储IP
+# 全部为空的行（包括只预填了“序号”的行）不结束表格。找不到该标签时退回到遇到上述四列全空的行结束。
+# 表下方的集群字段（集群 VIP 等，模板第 19、20 行）随主机表实际结束位置整体平移，主机数量不受模板预留行数限制
+HOST_TABLE = register_table(
+    "hosts",
+    "主机规划",
+    columns=[
+        TableColumn("index", "B", ("序号",)),
+        TableColumn("bmc_ip", "E", ("带外地址",)),
+        TableColumn("bmc_user", "F", ("带外账号", "带外用户名"), default="ADMIN"),
+        TableColumn("bmc_password", "G", ("带外密码",), default="ADMIN", sensitive=True),
+        TableColumn("hostname", "H", ("主机名", "SMTX主机名")),
+        TableColumn("mgmt_ip", "I", ("管理地址",)),
+        TableColumn("ssh_user", "J", ("SSH 用户名", "SSH用户名"), default="smartx"),
+        TableColumn("ssh_password", "K", ("SSH 密码", "密码"), default="HC!r0cks", after="ssh_user", sensitive=True),
+        TableColumn("storage_ip", "N", ("存储IP", "存储地址")),
+    ],
+    header_row=2,
+    sentinel=("bmc_ip", "hostname", "mgmt_ip", "storage_ip"),
+    footer_row=19,
+    footer=("H", ("集群VIP",)),
+)
 
 
 # --- 集群管理信息 sheet 固定字段 ---
 CLOUDTOWER_IP = register_variable("CLOUDTOWER_IP", "集群管理信息", "E3", "CloudTower IP")
 CLOUDTOWER_ROOT_PASSWORD = register_variable(
-    "CLOUDTOWER_ROOT_PASSWORD", "集群管理信息", "G3", "CloudTower web 管理员 root 密码", default="HC!r0cks"
+    "CLOUDTOWER_ROOT_PASSWORD", "集群管理信息", "G3", "CloudTower web 管理员 root 密码", default="HC!r0cks", sensitive=True
 )
 CLOUDTOWER_SERIAL = register_variable("CLOUDTOWER_SERIAL", "集群管理信息", "M3", "CloudTower 序列号")
 OBS_IP = register_variable("OBS_IP", "集群管理信息", "E4", "OBS IP")
@@ -230,6 +262,12 @@ __all__ = [
     "PlanVariable",
     "PLAN_VARIABLES",
     "register_variable",
+    "PlanTable",
+    "TableColumn",
+    "PLAN_TABLES",
+    "register_table",
+    "BUSINESS_NETWORK_TABLE",
+    "HOST_TABLE",
     "CLUSTER_NAME",
     "MGMT_VDS_NAME",
     "STORAGE_VDS_NAME",
@@ -263,28 +301,12 @@ __all__ = [
     "STORAGE_BOND_MODE",
     "BACKUP_BOND_MODE",
     "BUSINESS_BOND_MODE",
-    "BUSINESS_NETWORK_MAX",
-    "BUSINESS_NETWORK_NAME_KEYS",
-    "BUSINESS_NETWORK_VLAN_ID_KEYS",
-    "BUSINESS_NETWORK_VLAN_TYPE_KEYS",
-    "BUSINESS_NETWORK_SUBNET_KEYS",
-    "BUSINESS_NETWORK_GATEWAY_KEYS",
     "HOST_CLUSTER_NAME",
     "CLUSTER_VIP",
     "CLUSTER_FUNCTION",
     "FISHEYE_ADMIN_USER",
     "FISHEYE_ADMIN_PASSWORD",
     "CLUSTER_SERIAL",
-    "HOST_MAX",
-    "HOST_ROW_RANGE",
-    "HOST_BMC_IP_KEYS",
-    "HOST_BMC_USER_KEYS",
-    "HOST_BMC_PASSWORD_KEYS",
-    "HOST_HOSTNAME_KEYS",
-    "HOST_MGMT_IP_KEYS",
-    "HOST_STORAGE_IP_KEYS",
-    "HOST_SSH_USER_KEYS",
-    "HOST_SSH_PASSWORD_KEYS",
     "CLOUDTOWER_IP",
     "CLOUDTOWER_ROOT_PASSWORD",
     "CLOUDTOWER_SERIAL",
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""规划表回写日志：汇总各阶段的单元格更新，一次加载、一次原子保存。
+
+阶段通过 ``queue_plan_update`` 登记要写回规划表的值（如集群、CloudTower 序列号）。
+运行上下文中存在回写日志时只登记不落盘，由 ``execute_run`` 在运行结束（或阶段显式调用
+``flush_plan_writeback`` 作为检查点）时统一写入；保存先写临时文件再替换原文件，原文件保留为
+``<文件名>.bak``，中途失败不会留下损坏的规划表。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Tuple
+from uuid import uuid4
+
+import openpyxl
+
+from .compiled_plan import is_compiled_plan, write_compiled_plan_cells
+from .field_variables import PlanVariable
+from .planning_sheet_parser import variable_cell
+
+logger = logging.getLogger(__name__)
+
+PLAN_WRITEBACK_KEY = "plan_writeback"
+
+
+class PlanWriteBackJournal:
+    """按规划表文件分组的待写入单元格，同一单元格多次登记时以最后一次为准。"""
+
+    def __init__(self) -> None:
+        self._pending: Dict[Path, Dict[Tuple[str, str], Any]] = {}
+        self._sources: Dict[Tuple[Path, str, str], str | None] = {}
+        self._lock = Lock()
+
+    def record(self, plan_path: Path | str, variable: PlanVariable, value: Any, *, source: str | None = None) -> None:
+        path = Path(plan_path).resolve()
+        with self._lock:
+            self._pending.setdefault(path, {})[(variable.sheet, variable.cell)] = value
+            self._sources[(path, variable.sheet, variable.cell)] = source
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """待写入条目（路径、sheet、单元格、值、登记来源），用于日志与摘要。"""
+
+        with self._lock:
+            return [
+                {
+                    "path": str(path),
+                    "sheet": sheet,
+                    "cell": cell,
+                    "value": value,
+                    "source": self._sources.get((path, sheet, cell)),
+                }
+                for path, cells in self._pending.items()
+                for (sheet, cell), value in cells.items()
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(cells) for cells in self._pending.values())
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """把待写入条目按文件各自一次加载、一次保存；失败的文件保留条目，等待下次 flush。"""
+
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        results: List[Dict[str, Any]] = []
+        for path, cells in pending.items():
+            try:
+                write_plan_cells(path, cells)
+            except Exception as exc:  # noqa: BLE001 - 逐个文件记录失败
+                logger.warning("规划表回写失败 %s: %s", path, exc)
+                with self._lock:
+                    merged = self._pending.setdefault(path, {})
+                    for key, value in cells.items():
+                        merged.setdefault(key, value)
+                results.append({"path": str(path), "status": "failed", "cells": len(cells), "error": str(exc)})
+                continue
+            with self._lock:
+                for sheet, cell in cells:
+                    self._sources.pop((path, sheet, cell), None)
+            logger.info("规划表回写完成 %s: %d 个单元格", path, len(cells))
+            results.append({"path": str(path), "status": "ok", "cells": len(cells)})
+        return results
+
+
+def write_plan_cells(plan_path: Path | str, cells: Dict[Tuple[str, str], Any]) -> None:
+    """一次加载工作簿写入多个单元格，并以临时文件 + 替换的方式原子保存；JSON 规划写入对应变量。"""
+
+    path = Path(plan_path)
+    if is_compiled_plan(path):
+        write_compiled_plan_cells(path, cells)
+        return
+    workbook = openpyxl.load_workbook(path)
+    try:
+        for (sheet, cell), value in cells.items():
+            if sheet not in workbook.sheetnames:
+                raise KeyError(f"规划表缺少 sheet: {sheet}")
+            # 主机表等行数不固定时，表格下方的字段（如集群序列号）随表格结束行平移
+            workbook[sheet][variable_cell(workbook[sheet], sheet, cell)] = value
+        tmp = path.with_name(f".{path.stem}.{uuid4().hex[:8]}.tmp{path.suffix}")
+        try:
+            workbook.save(tmp)
+            shutil.copy2(path, path.with_name(path.name + ".bak"))
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+    finally:
+        workbook.close()
+
+
+def get_plan_writeback(ctx: Any) -> PlanWriteBackJournal | None:
+    extra = getattr(ctx, "extra", None)
+    journal = extra.get(PLAN_WRITEBACK_KEY) if isinstance(extra, dict) else None
+    return journal if isinstance(journal, PlanWriteBackJournal) else None
+
+
+def queue_plan_update(
+    ctx: Any, plan_path: Path | str, variable: PlanVariable, value: Any, *, source: str | None = None
+) -> bool:
+    """登记一次规划表回写，返回是否延迟写入。
+
+    运行上下文没有回写日志（单独调用阶段函数等场景）时立即原子写入，返回 False。
+    """
+
+    journal = get_plan_writeback(ctx)
+    if journal is None:
+        write_plan_cells(plan_path, {(variable.sheet, variable.cell): value})
+        return False
+    journal.record(plan_path, variable, value, source=source)
+    return True
+
+
+def flush_plan_writeback(ctx: Any) -> List[Dict[str, Any]]:
+    """立即写入已登记的回写（运行结束时自动调用，阶段也可在需要时作为检查点调用）。"""
+
+    journal = get_plan_writeback(ctx)
+    if journal is None or not len(journal):
+        return []
+    return journal.flush()
+
+
+__all__ = [
+    "PLAN_WRITEBACK_KEY",
+    "PlanWriteBackJournal",
+    "flush_plan_writeback",
+    "get_plan_writeback",
+    "queue_plan_update",
+    "write_plan_cells",
+]
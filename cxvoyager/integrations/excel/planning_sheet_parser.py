@@ -14,22 +14,51 @@
 # You should have received a copy of the GNU General Public License
 # along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
 
-"""Excel 规划表解析与数据清洗。"""
+"""Excel 规划表解析与数据清洗。
+
+解析结果按工作簿内容哈希缓存（进程内 + ``artifacts/plan_cache`` 磁盘文件），同一份
+规划表在多个阶段、多次运行中只解析一次；文件内容变化后哈希随之变化，缓存自然失效。
+磁盘缓存不保存密码：标记为 ``sensitive`` 的字段取值不同于模板缺省值时替换为占位符，
+这类条目只供声明不需要凭据的调用方（``parse_plan(..., credentials=False)``）使用。
+"""
 from __future__ import annotations
 
+import copy
+import hashlib
+import hmac
+import json
 import logging
+import os
 import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from threading import Lock
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Tuple
+from uuid import uuid4
 
 import openpyxl
+from openpyxl.utils.cell import column_index_from_string, coordinate_to_tuple, get_column_letter
 
-from cxvoyager.common.system_constants import PLAN_KEYWORDS, PLAN_SHEETS
+from cxvoyager.common.system_constants import PLAN_KEYWORDS, PLAN_SHEETS, PROJECT_ROOT
 from cxvoyager.models import HostRow, MgmtInfo, PlanModel, VirtualNetworkRow
 from . import field_variables as plan_vars
+from .compiled_plan import is_compiled_plan, load_compiled_plan
 
 logger = logging.getLogger(__name__)
 
+# 解析逻辑或输出结构变化时递增，使旧的磁盘缓存失效
+_PARSE_CACHE_VERSION = 5
+_MEMORY_CACHE_SIZE = 16
+# 磁盘缓存最多保留的条目数与最长保留时间（按最近使用时间淘汰）
+_DISK_CACHE_MAX_ENTRIES = 64
+_DISK_CACHE_MAX_AGE = 7 * 24 * 3600
+REDACTED = "******"
+_memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = Lock()
+
 
 def find_plan_file(base_dir: Path) -> Path | None:
     """模糊匹配定位规划表文件。"""
@@ -61,18 +90,209 @@ def _resolve_value(raw: Any, default: Any) -> Any:
     return cleaned
 
 
-def _extract_variables(workbook: openpyxl.Workbook) -> Tuple[Dict[str, Any], List[str]]:
+_SheetPlan = Tuple[Tuple[int, int, int, int], List[Tuple[str, int, int, Any]]]
+# 表头可能因插入说明行而下移，最多向下查找的行数
+_HEADER_SEARCH_ROWS = 10
+
+
+@lru_cache(maxsize=1)
+def _variables_by_sheet() -> Dict[str, _SheetPlan]:
+    """按 sheet 分组变量，并计算每个 sheet 需要读取的最小矩形区域 (min_row, max_row, min_col, max_col)。"""
+
+    entries: Dict[str, List[Tuple[str, int, int, Any]]] = {}
+    for key, var in plan_vars.PLAN_VARIABLES.items():
+        row, col = coordinate_to_tuple(var.cell)
+        entries.setdefault(var.sheet, []).append((key, row, col, var.default))
+    plans: Dict[str, _SheetPlan] = {}
+    for sheet, items in entries.items():
+        rows = [row for _, row, _, _ in items]
+        cols = [col for _, _, col, _ in items]
+        plans[sheet] = ((min(rows), max(rows), min(cols), max(cols)), items)
+    return plans
+
+
+class _RowReader:
+    """按需从流式行迭代器中取行并缓存，行号从 1 开始；越过工作表末尾返回 None。"""
+
+    def __init__(self, rows: Iterator[Tuple[Any, ...]]) -> None:
+        self._rows = rows
+        self._buffer: List[Tuple[Any, ...]] = []
+        self._exhausted = False
+
+    def __call__(self, number: int) -> Tuple[Any, ...] | None:
+        while len(self._buffer) < number and not self._exhausted:
+            try:
+                self._buffer.append(next(self._rows))
+            except StopIteration:
+                self._exhausted = True
+        return self._buffer[number - 1] if number <= len(self._buffer) else None
+
+
+def _stream_rows(worksheet: Any) -> _RowReader:
+    """从第一行开始按行流式读取整个工作表。
+
+    只读模式下不带边界的 ``iter_rows`` 以文件中记录的 ``<dimension>`` 为准，部分工具写出的该值
+    偏小（如 ``A1``），会截断表格；读取前先清除，改为读到实际数据的末尾。
+    """
+
+    if hasattr(worksheet, "reset_dimensions"):
+        worksheet.reset_dimensions()
+    return _RowReader(worksheet.iter_rows(min_row=1, min_col=1, values_only=True))
+
+
+def _header_key(value: Any) -> str:
+    return re.sub(r"\s+", "", str(value)).lower() if value is not None else ""
+
+
+def _match_header(cells: Tuple[Any, ...], table: plan_vars.PlanTable) -> Dict[str, int] | None:
+    """按表头文字定位各列（0 起始列下标）；哨兵列缺失时视为不是表头行。"""
+
+    keys = [_header_key(value) for value in cells]
+    located: Dict[str, int] = {}
+    for column in table.columns:
+        labels = {_header_key(label) for label in column.headers}
+        floor = located.get(column.after, -1) if column.after else -1
+        index = next((i for i, key in enumerate(keys) if i > floor and key in labels), None)
+        if index is not None:
+            located[column.field] = index
+    if not all(field in located for field in table.sentinel):
+        return None
+    return located
+
+
+@dataclass
+class _TableScan:
+    records: List[Dict[str, Any]]
+    header_shift: int  # 表头相对模板的下移行数
+    end_shift: int  # 表格结束行相对模板 footer_row 的偏移
+
+    def shift_row(self, table: plan_vars.PlanTable, row: int) -> int:
+        """同一 sheet 中固定坐标变量的实际行号：表格下方的变量随表格结束行平移。"""
+
+        if row >= table.footer_row:
+            return row + self.end_shift
+        if row >= table.header_row:
+            return row + self.header_shift
+        return row
+
+
+def _find_footer(read_row: Callable[[int], Tuple[Any, ...] | None], table: plan_vars.PlanTable, start: int) -> int | None:
+    """从 ``start`` 行向下查找表格下方的标签行，返回其行号；表格未声明标签或找不到时返回 None。"""
+
+    if table.footer is None:
+        return None
+    column, labels = table.footer
+    index = column_index_from_string(column) - 1
+    wanted = {_header_key(label) for label in labels}
+    number = start
+    while (cells := read_row(number)) is not None:
+        if index < len(cells) and _header_key(_clean_cell(cells[index])) in wanted:
+            return number
+        number += 1
+    return None
+
+
+def _scan_table(read_row: Callable[[int], Tuple[Any, ...] | None], table: plan_vars.PlanTable) -> _TableScan:
+    """定位表头后从首行开始逐行读取，读取量与实际行数成正比。
+
+    找到表格下方的标签行时读到该行为止，中间哨兵列全部为空的行照常收录（由调用方跳过）；
+    否则遇到哨兵列全部为空的行结束。
+    """
+
+    columns = {column.field: column_index_from_string(column.column) - 1 for column in table.columns}
+    header_row: int | None = None
+    for number in range(1, table.header_row + _HEADER_SEARCH_ROWS + 1):
+        cells = read_row(number)
+        if cells is None:
+            break
+        located = _match_header(cells, table)
+        if located is not None:
+            header_row = number
+            columns.update(located)
+            break
+    if header_row is None:
+        logger.warning("未识别到表格 %s 的表头（sheet: %s），按模板位置读取", table.key, table.sheet)
+
+    header_shift = header_row - table.header_row if header_row is not None else 0
+    number = (table.first_row or table.header_row + 1) + header_shift
+    # 未识别到表头时同样无法确认标签行属于本表，退回到哨兵列判断
+    footer = _find_footer(read_row, table, number) if header_row is not None else None
+    records: List[Dict[str, Any]] = []
+    while footer is None or number < footer:
+        cells = read_row(number)
+        if cells is None:
+            break
+        raw = {field: _clean_cell(cells[index]) if index < len(cells) else None for field, index in columns.items()}
+        if footer is None and all(raw[field] in (None, "") for field in table.sentinel):
+            break
+        records.append(
+            {column.field: _resolve_value(raw[column.field], column.default) for column in table.columns}
+        )
+        number += 1
+    # 未识别到表头时无法判断表格边界，表格下方的变量保持模板坐标
+    end_shift = number - table.footer_row if header_row is not None else 0
+    return _TableScan(records=records, header_shift=header_shift, end_shift=end_shift)
+
+
+def _table_for_sheet(sheet: str) -> plan_vars.PlanTable | None:
+    return next((table for table in plan_vars.PLAN_TABLES.values() if table.sheet == sheet), None)
+
+
+def variable_cell(worksheet: Any, sheet: str, cell: str) -> str:
+    """模板坐标在给定工作表中的实际单元格（表格行数与模板不同时，表格下方的变量随之平移）。"""
+
+    table = _table_for_sheet(sheet)
+    if table is None:
+        return cell
+    row, col = coordinate_to_tuple(cell)
+    scan = _scan_table(_stream_rows(worksheet), table)
+    return f"{get_column_letter(col)}{scan.shift_row(table, row)}"
+
+
+def _extract_variables(
+    workbook: openpyxl.Workbook,
+) -> Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]], List[str]]:
+    """读取固定坐标变量与表格区域。
+
+    没有表格的 sheet 一次读取变量所在的矩形区域再按坐标取值；含表格的 sheet 按行流式读取，
+    表格结束后只再读到表格下方变量所在的行为止。返回 ``(变量, 表格行, 缺失的 sheet)``。
+    """
+
     values: Dict[str, Any] = {}
+    tables: Dict[str, List[Dict[str, Any]]] = {key: [] for key in plan_vars.PLAN_TABLES}
     missing_sheets: List[str] = []
-    for key, var in plan_vars.PLAN_VARIABLES.items():
-        if var.sheet not in workbook.sheetnames:
-            if var.sheet not in missing_sheets:
-                missing_sheets.append(var.sheet)
-            values[key] = var.default
+    sheet_plans = _variables_by_sheet()
+    sheets = list(sheet_plans) + [
+        table.sheet for table in plan_vars.PLAN_TABLES.values() if table.sheet not in sheet_plans
+    ]
+    for sheet in sheets:
+        (min_row, max_row, min_col, max_col), items = sheet_plans.get(sheet, ((0, 0, 0, 0), []))
+        if sheet not in workbook.sheetnames:
+            missing_sheets.append(sheet)
+            for key, _, _, default in items:
+                values[key] = default
             continue
-        ws = workbook[var.sheet]
-        values[key] = _resolve_value(ws[var.cell].value, var.default)
-    return values, missing_sheets
+        table = _table_for_sheet(sheet)
+        if table is not None:
+            read_row = _stream_rows(workbook[sheet])
+            scan = _scan_table(read_row, table)
+            tables[table.key] = scan.records
+            for key, row, col, default in items:
+                cells = read_row(scan.shift_row(table, row)) or ()
+                values[key] = _resolve_value(cells[col - 1] if col - 1 < len(cells) else None, default)
+            continue
+        # 显式给出行列边界，不受文件中 <dimension> 记录的影响
+        grid = list(
+            workbook[sheet].iter_rows(
+                min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True
+            )
+        )
+        for key, row, col, default in items:
+            cells = grid[row - min_row] if row - min_row < len(grid) else ()
+            raw = cells[col - min_col] if col - min_col < len(cells) else None
+            values[key] = _resolve_value(raw, default)
+    # 保持变量登记顺序，与逐格读取时的输出一致
+    return {key: values[key] for key in plan_vars.PLAN_VARIABLES}, tables, missing_sheets
 
 
 def _value(values: Dict[str, Any], ref: plan_vars.PlanVariable | str | None) -> Any:
@@ -82,7 +302,9 @@ def _value(values: Dict[str, Any], ref: plan_vars.PlanVariable | str | None) ->
     return values.get(key)
 
 
-def _build_virtual_network_records(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _build_virtual_network_records(
+    values: Dict[str, Any], business_rows: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
     cluster_name = _value(values, plan_vars.CLUSTER_NAME) or _value(values, plan_vars.HOST_CLUSTER_NAME)
     records: List[Dict[str, Any]] = []
     mgmt_ports_value = _value(values, plan_vars.MGMT_SWITCH_PORTS)
@@ -178,9 +400,9 @@ def _build_virtual_network_records(values: Dict[str, Any]) -> List[Dict[str, Any
     business_vds = _value(values, plan_vars.BUSINESS_VDS_NAME)
     business_ports = _value(values, plan_vars.BUSINESS_SWITCH_PORTS)
     business_bond = _value(values, plan_vars.BUSINESS_BOND_MODE)
-    for idx in range(plan_vars.BUSINESS_NETWORK_MAX):
-        name = _value(values, plan_vars.BUSINESS_NETWORK_NAME_KEYS[idx])
-        subnet = _value(values, plan_vars.BUSINESS_NETWORK_SUBNET_KEYS[idx])
+    for idx, row in enumerate(business_rows):
+        name = row.get("name")
+        subnet = row.get("subnet")
         if isinstance(name, str):
             name = name.strip() or None
         if isinstance(subnet, str):
@@ -195,25 +417,25 @@ def _build_virtual_network_records(values: Dict[str, Any]) -> List[Dict[str, Any
             "subnetwork": subnet,
             "主机端口": business_ports,
             "网口绑定模式": business_bond,
-            "vlan_id": _value(values, plan_vars.BUSINESS_NETWORK_VLAN_ID_KEYS[idx]),
-            "vlan_type": _value(values, plan_vars.BUSINESS_NETWORK_VLAN_TYPE_KEYS[idx]),
-            "gateway": _value(values, plan_vars.BUSINESS_NETWORK_GATEWAY_KEYS[idx]),
+            "vlan_id": row.get("vlan_id"),
+            "vlan_type": row.get("vlan_type"),
+            "gateway": row.get("gateway"),
         }
         records.append(record)
 
     return records
 
 
-def _build_host_records(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _build_host_records(values: Dict[str, Any], host_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     records: List[Dict[str, Any]] = []
     cluster_name = _value(values, plan_vars.HOST_CLUSTER_NAME) or _value(values, plan_vars.CLUSTER_NAME)
     cluster_vip = _value(values, plan_vars.CLUSTER_VIP)
 
-    for idx in range(plan_vars.HOST_MAX):
-        mgmt_ip = _value(values, plan_vars.HOST_MGMT_IP_KEYS[idx])
-        hostname = _value(values, plan_vars.HOST_HOSTNAME_KEYS[idx])
-        bmc_ip = _value(values, plan_vars.HOST_BMC_IP_KEYS[idx])
-        storage_ip = _value(values, plan_vars.HOST_STORAGE_IP_KEYS[idx])
+    for idx, row in enumerate(host_rows):
+        mgmt_ip = row.get("mgmt_ip")
+        hostname = row.get("hostname")
+        bmc_ip = row.get("bmc_ip")
+        storage_ip = row.get("storage_ip")
         if not any([mgmt_ip, hostname, bmc_ip, storage_ip]):
             continue
         record = {
@@ -224,10 +446,10 @@ def _build_host_records(values: Dict[str, Any]) -> List[Dict[str, Any]]:
             "管理地址": mgmt_ip,
             "存储地址": storage_ip,
             "带外地址": bmc_ip,
-            "带外用户名": _value(values, plan_vars.HOST_BMC_USER_KEYS[idx]),
-            "带外密码": _value(values, plan_vars.HOST_BMC_PASSWORD_KEYS[idx]),
-            "主机SSH用户名": _value(values, plan_vars.HOST_SSH_USER_KEYS[idx]),
-            "主机SSH密码": _value(values, plan_vars.HOST_SSH_PASSWORD_KEYS[idx]),
+            "带外用户名": row.get("bmc_user"),
+            "带外密码": row.get("bmc_password"),
+            "主机SSH用户名": row.get("ssh_user"),
+            "主机SSH密码": row.get("ssh_password"),
         }
         records.append(record)
 
@@ -334,35 +556,229 @@ def _build_derived_network(records: List[Dict[str, Any]]) -> Dict[str, Any]:
     return {"vdses": list(vds_map.values()), "networks": networks}
 
 
-def parse_plan(file_path: Path) -> Dict[str, Any]:
-    """解析核心 sheet，返回结构化字典。"""
-    workbook = openpyxl.load_workbook(file_path, data_only=True)
+@lru_cache(maxsize=1)
+def _parser_fingerprint() -> str:
+    """解析器版本与变量、表格登记表的摘要，定义调整后缓存随之失效。"""
+
+    registry = [
+        (key, var.sheet, var.cell, repr(var.default)) for key, var in sorted(plan_vars.PLAN_VARIABLES.items())
+    ]
+    tables = [repr(table) for _, table in sorted(plan_vars.PLAN_TABLES.items())]
+    raw = json.dumps([_PARSE_CACHE_VERSION, registry, tables], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def plan_cache_dir() -> Path | None:
+    """磁盘缓存目录；环境变量 ``CXVOYAGER_PLAN_CACHE_DIR`` 可覆盖，设为 ``0``/``off`` 时仅使用进程内缓存。"""
+
+    configured = os.environ.get("CXVOYAGER_PLAN_CACHE_DIR")
+    if configured is not None:
+        if configured.strip().lower() in {"", "0", "off", "false", "no"}:
+            return None
+        return Path(configured)
+    return PROJECT_ROOT / "artifacts" / "plan_cache"
+
+
+def plan_fingerprint(file_path: Path | str) -> str:
+    """规划表的内容哈希（含解析器指纹），用作解析缓存的键。"""
+
+    digest = hashlib.sha256(_parser_fingerprint().encode("ascii"))
+    with Path(file_path).open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clear_plan_cache() -> None:
+    """清空进程内的解析缓存（磁盘缓存保留，测试与长驻进程排障时使用）。"""
+
+    with _cache_lock:
+        _memory_cache.clear()
+
+
+def _cache_lookup(key: str, *, allow_redacted: bool = False) -> Dict[str, Any] | None:
+    with _cache_lock:
+        cached = _memory_cache.get(key)
+        if cached is not None:
+            _memory_cache.move_to_end(key)
+            return cached
+    cache_dir = plan_cache_dir()
+    if cache_dir is None:
+        return None
+    path = cache_dir / f"{key}.json"
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            cached = json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.debug("规划表解析缓存读取失败，重新解析: %s", exc)
+        return None
+    try:
+        os.utime(path)  # 记录最近使用时间，供淘汰时参考
+    except OSError:  # pragma: no cover - filesystem interaction
+        pass
+    if cached.get("_meta", {}).get("redacted"):
+        # 去掉了密码的条目不进入进程内缓存，需要凭据的调用方重新读取 Excel
+        return cached if allow_redacted else None
+    _cache_store_memory(key, cached)
+    return cached
+
+
+def _cache_store_memory(key: str, data: Dict[str, Any]) -> None:
+    with _cache_lock:
+        _memory_cache[key] = data
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > _MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _redact_credentials(data: Dict[str, Any]) -> Dict[str, Any]:
+    """返回去掉密码的副本：``sensitive`` 字段取值不同于模板缺省值时替换为 ``REDACTED``，并重建各分段。"""
+
+    redacted: List[str] = []
+    variables = dict(data.get("variables") or {})
+    for key, var in plan_vars.PLAN_VARIABLES.items():
+        value = variables.get(key)
+        if var.sensitive and value not in (None, "", var.default):
+            variables[key] = REDACTED
+            redacted.append(key)
+    tables: Dict[str, List[Dict[str, Any]]] = {}
+    for table_key, rows in (data.get("tables") or {}).items():
+        table = plan_vars.PLAN_TABLES.get(table_key)
+        columns = [column for column in (table.columns if table else ()) if column.sensitive]
+        scrubbed = []
+        for row in rows:
+            row = dict(row)
+            for column in columns:
+                if row.get(column.field) not in (None, "", column.default):
+                    row[column.field] = REDACTED
+                    name = f"{table_key}.{column.field}"
+                    if name not in redacted:
+                        redacted.append(name)
+            scrubbed.append(row)
+        tables[table_key] = scrubbed
+    if not redacted:
+        return data
+    result = build_plan_sections(variables, tables)
+    result["_meta"] = dict(data.get("_meta") or {}, redacted=redacted)
+    return result
+
+
+def _write_private(path: Path, text: str) -> None:
+    """原子写入仅属主可读写（0600）的文件。"""
+
+    tmp = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _prune_disk_cache(cache_dir: Path) -> None:
+    """删除超过保留时间的条目，并只保留最近使用的 ``_DISK_CACHE_MAX_ENTRIES`` 份。"""
+
+    try:
+        entries = sorted(
+            ((path.stat().st_mtime, path) for path in cache_dir.glob("*.json")),
+            reverse=True,
+        )
+    except OSError:  # pragma: no cover - 并发删除
+        return
+    cutoff = time.time() - _DISK_CACHE_MAX_AGE
+    for position, (mtime, path) in enumerate(entries):
+        if position >= _DISK_CACHE_MAX_ENTRIES or mtime < cutoff:
+            try:
+                path.unlink()
+            except OSError:  # pragma: no cover - 并发删除
+                pass
+
+
+def _cache_store(key: str, data: Dict[str, Any]) -> None:
+    _cache_store_memory(key, data)
+    cache_dir = plan_cache_dir()
+    if cache_dir is None:
+        return
+    text = json.dumps(data, ensure_ascii=False)
+    if json.loads(text) != data:  # 含日期等无法无损表示为 JSON 的值时只保留进程内缓存
+        return
+    redacted = _redact_credentials(data)
+    if redacted is not data:
+        text = json.dumps(redacted, ensure_ascii=False)
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _write_private(cache_dir / f"{key}.json", text)
+        _prune_disk_cache(cache_dir)
+    except OSError as exc:  # pragma: no cover - filesystem interaction
+        logger.debug("规划表解析缓存写入失败: %s", exc)
+
+
+def parse_plan(file_path: Path, *, use_cache: bool = True, credentials: bool = True) -> Dict[str, Any]:
+    """解析核心 sheet，返回结构化字典。
+
+    结果按内容哈希缓存，返回的是缓存的深拷贝，调用方可以自由修改；``use_cache=False`` 强制重新读取 Excel。
+    ``credentials=False`` 表示调用方不使用密码（如批量校验），可以直接使用密码已替换为 ``REDACTED`` 的磁盘缓存。
+    ``.json`` 文件按编译后的 JSON 规划直接加载（见 ``compiled_plan``），不经过 Excel 解析与缓存。
+    """
+    if is_compiled_plan(file_path):
+        return load_compiled_plan(file_path)
+    if not use_cache:
+        return _parse_workbook(file_path)
+    key = plan_fingerprint(file_path)
+    cached = _cache_lookup(key, allow_redacted=not credentials)
+    if cached is None:
+        cached = _parse_workbook(file_path)
+        _cache_store(key, cached)
+    else:
+        logger.debug("规划表解析命中缓存: %s (%s)", file_path, key[:12])
+    data = copy.deepcopy(cached)
+    data["_meta"]["source_file"] = str(file_path)
+    data["_meta"]["content_hash"] = key
+    return data
+
+
+def _parse_workbook(file_path: Path) -> Dict[str, Any]:
+    # 只读模式按需流式读取 sheet XML，不加载样式，内存与耗时均远低于完整加载
+    workbook = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+    try:
+        missing_declared = [sheet for sheet in PLAN_SHEETS.values() if sheet not in workbook.sheetnames]
+        variables, tables, missing_from_vars = _extract_variables(workbook)
+    finally:
+        workbook.close()
 
-    missing_declared = [sheet for sheet in PLAN_SHEETS.values() if sheet not in workbook.sheetnames]
     for sheet_name in missing_declared:
         logger.warning("缺少 sheet: %s", sheet_name)
-
-    variables, missing_from_vars = _extract_variables(workbook)
     for sheet_name in missing_from_vars:
         if sheet_name not in missing_declared:
             logger.warning("变量读取时缺少 sheet: %s", sheet_name)
 
-    virtual_network_records = _build_virtual_network_records(variables)
-    host_records = _build_host_records(variables)
-    mgmt_records = _build_mgmt_records(variables)
+    data = build_plan_sections(variables, tables)
+    data["_meta"] = {
+        "source_file": str(file_path),
+        "missing_sheets": sorted(set(missing_declared) | set(missing_from_vars)),
+    }
+    return data
+
 
+def build_plan_sections(variables: Dict[str, Any], tables: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """由变量值与表格行构建 ``parse_plan`` 的各分段（JSON 规划回写变量后也据此重建）。"""
+
+    virtual_network_records = _build_virtual_network_records(
+        variables, tables.get(plan_vars.BUSINESS_NETWORK_TABLE.key, [])
+    )
     data: Dict[str, Any] = {
         "variables": variables,
+        "tables": tables,
         "virtual_network": {"records": virtual_network_records},
         "hosts": {
-            "records": host_records,
+            "records": _build_host_records(variables, tables.get(plan_vars.HOST_TABLE.key, [])),
             "extra": _build_hosts_extra(variables),
         },
-        "mgmt": {"records": mgmt_records},
-        "_meta": {
-            "source_file": str(file_path),
-            "missing_sheets": sorted(set(missing_declared) | set(missing_from_vars)),
-        },
+        "mgmt": {"records": _build_mgmt_records(variables)},
     }
 
     try:
@@ -441,3 +857,121 @@ def to_model(parsed: Dict[str, Any]) -> PlanModel:
         network_architecture=_extract_network_architecture(),
     )
 
+
+
+# 运行过程中会被回写到规划表的字段（序列号）与纯展示字段，不参与分段指纹
+_SECTION_VOLATILE_KEYS = frozenset(
+    {"序号", "Cloudtower 序列号", "OBS 序列号", "备份 序列号", "ER 控制器序列号", "cluster_serial"}
+)
+_NTP_DNS_KEYS = ("NTP 服务器", "DNS 服务器")
+
+
+def _normalize_section_value(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, dict):
+        return {str(key): _normalize_section_value(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_section_value(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def _digest(value: Any) -> str:
+    raw = json.dumps(_normalize_section_value(value), ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _keyed_digest(secret: bytes, value: Any) -> str:
+    raw = json.dumps(_normalize_section_value(value), ensure_ascii=False, sort_keys=True, default=str)
+    return hmac.new(secret, raw.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _sensitive_section_keys() -> FrozenSet[str]:
+    """分段记录中承载 ``sensitive`` 变量或表格列的字段名（如“带外密码”“root密码”）。
+
+    以占位值构建一次各分段，找出取值为占位值的键，字段映射调整后无需另行维护名单。
+    """
+
+    marker = "\x00sensitive\x00"
+    variables = {key: marker if var.sensitive else None for key, var in plan_vars.PLAN_VARIABLES.items()}
+    tables = {
+        key: [{column.field: marker if column.sensitive else "probe" for column in table.columns}]
+        for key, table in plan_vars.PLAN_TABLES.items()
+    }
+    found: set[str] = set()
+
+    def _walk(node: Any) -> None:
+        if isinstance(node, dict):
+            for key, item in node.items():
+                if item == marker:
+                    found.add(key)
+                else:
+                    _walk(item)
+        elif isinstance(node, list):
+            for item in node:
+                _walk(item)
+
+    _walk(build_plan_sections(variables, tables))
+    return frozenset(found)
+
+
+def plan_section_fields(parsed: Dict[str, Any], *, secret: bytes | None = None) -> Dict[str, Dict[str, str]]:
+    """按逻辑分段给出各字段的归一化摘要：``{分段: {字段: 摘要}}``。
+
+    分段为 ``hosts``、``cluster``、每个 ``network:<网络标识>``、``mgmt_components`` 与
+    ``ntp_dns``；字符串去除首尾空白，空值统一为 None，序列号等回写字段不参与比较。
+    密码等 ``sensitive`` 字段不做普通摘要（短摘要可被离线穷举）：未给出 ``secret`` 时不参与比较，
+    给出时以该密钥计算 HMAC，密码变化仍能反映为分段变化。
+    """
+
+    sensitive = _sensitive_section_keys()
+
+    def _fields(record: Dict[str, Any], skip: Iterable[str] = ()) -> Dict[str, str]:
+        fields: Dict[str, str] = {}
+        for key, value in record.items():
+            if key in _SECTION_VOLATILE_KEYS or key in skip:
+                continue
+            if key not in sensitive:
+                fields[key] = _digest(value)
+            elif secret is not None:
+                fields[key] = _keyed_digest(secret, value)
+        return fields
+
+    def _records(name: str) -> List[Dict[str, Any]]:
+        section = parsed.get(name, {})
+        records = section.get("records", []) if isinstance(section, dict) else []
+        return [record for record in records if isinstance(record, dict)]
+
+    sections: Dict[str, Dict[str, str]] = {}
+
+    hosts: Dict[str, str] = {}
+    for position, record in enumerate(_records("hosts"), start=1):
+        name = _normalize_section_value(record.get("SMTX主机名")) or f"#{position}"
+        hosts.update({f"{name}/{key}": digest for key, digest in _fields(record).items()})
+    sections["hosts"] = hosts
+
+    hosts_section = parsed.get("hosts", {})
+    extra = hosts_section.get("extra", {}) if isinstance(hosts_section, dict) else {}
+    if isinstance(extra, dict):
+        sections["cluster"] = _fields(extra)
+
+    for position, record in enumerate(_records("virtual_network"), start=1):
+        ident = _normalize_section_value(record.get("网络标识") or record.get("虚拟机网络")) or f"#{position}"
+        sections[f"network:{ident}"] = _fields(record)
+
+    mgmt_records = _records("mgmt")
+    if mgmt_records:
+        record = mgmt_records[0]
+        sections["mgmt_components"] = _fields(record, skip=_NTP_DNS_KEYS)
+        sections["ntp_dns"] = {key: _digest(record.get(key)) for key in _NTP_DNS_KEYS}
+    return sections
+
+
+def section_fingerprints(parsed: Dict[str, Any]) -> Dict[str, str]:
+    """各逻辑分段的稳定指纹，字段顺序与单元格格式差异不影响结果。"""
+
+    return {name: _digest(fields) for name, fields in plan_section_fields(parsed).items()}
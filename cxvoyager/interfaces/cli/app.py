@@ -17,13 +17,16 @@
 """命令行接口。"""
 from __future__ import annotations
 
+import json
 import os
 from pathlib import Path
 import typer
 from rich.console import Console
 from cxvoyager.common.logging_config import setup_logging
+from cxvoyager.integrations.excel.compiled_plan import compile_plan
 from cxvoyager.integrations.excel.planning_sheet_parser import find_plan_file, parse_plan, to_model
 from cxvoyager.core.validation.validator import validate
+from cxvoyager.core.validation.batch_validation import validate_plans
 from cxvoyager.core.deployment.host_discovery_scanner import scan_hosts, get_host_scan_defaults
 from cxvoyager.core.deployment.payload_builder import generate_deployment_payload
 from cxvoyager.core.deployment.deployment_executor import (
@@ -32,6 +35,10 @@ from cxvoyager.core.deployment.deployment_executor import (
     list_stage_infos,
     resolve_stages,
 )
+from cxvoyager.core.deployment.batch_runner import collect_plan_files, run_batch
+from cxvoyager.core.deployment.plan_checkpoint import diff_plan
+from cxvoyager.core.deployment.task_queue import DurableTaskQueue, resolve_queue_settings
+from cxvoyager.core.deployment.task_worker import DeploymentWorker
 
 def _is_en() -> bool:
     lang = os.environ.get("CXVOYAGER_LANG", "").lower()
@@ -43,6 +50,8 @@ def _t(cn: str, en: str) -> str:
 
 
 app = typer.Typer(help=_t("CXVoyager 自动化部署 CLI", "CXVoyager Automation CLI"))
+plan_app = typer.Typer(help=_t("规划文件工具。", "Plan file tools."))
+app.add_typer(plan_app, name="plan")
 console = Console()
 
 
@@ -342,13 +351,66 @@ def check(
         raise typer.Exit(code=2)
 
 
+@app.command(help=_t("并行校验多份规划表并检查集群之间的地址冲突。", "Validate many plan files in parallel, including cross-plan IP conflicts."))
+def validate_batch(
+    plans: list[str] = typer.Argument(..., help=_t("规划表文件、目录或 glob 模式", "Plan files, directories or glob patterns")),
+    max_workers: int | None = typer.Option(None, help=_t("并行进程数，缺省为 CPU 核数", "Worker processes; defaults to CPU count")),
+    json_report: Path | None = typer.Option(None, "--json", help=_t("写入 JSON 报告的路径", "Write JSON report to this path")),
+    markdown_report: Path | None = typer.Option(None, "--markdown", help=_t("写入 Markdown 报告的路径", "Write Markdown report to this path")),
+):
+    # 切换到仓库根目录前解析相对路径与 glob
+    plan_files = collect_plan_files(plans)
+    json_report = json_report.resolve() if json_report else None
+    markdown_report = markdown_report.resolve() if markdown_report else None
+    _ensure_cwd_repo_root()
+    setup_logging()
+    if not plan_files:
+        console.print(_t("[red]未找到任何规划表文件[/red]", "[red]No plan files found[/red]"))
+        raise typer.Exit(code=1)
+
+    result = validate_plans(plan_files, max_workers=max_workers)
+    data = result.to_dict()
+    if json_report:
+        json_report.parent.mkdir(parents=True, exist_ok=True)
+        json_report.write_text(json.dumps(data, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    if markdown_report:
+        markdown_report.parent.mkdir(parents=True, exist_ok=True)
+        markdown_report.write_text(result.to_markdown(), encoding="utf-8")
+    console.print_json(data=data)
+    if not result.ok:
+        raise typer.Exit(code=2)
+
+
+@app.command(help=_t("对比规划表与上次成功运行，列出受影响的阶段与子步骤。", "Diff the plan against the last successful run and list affected stages."))
+def diff(plan: Path | None = typer.Option(None, help=_t("规划表路径", "Plan file path"))):
+    plan = plan.resolve() if plan else None  # 切换到仓库根目录前解析相对路径
+    _ensure_cwd_repo_root()
+    setup_logging()
+    f = plan or find_plan_file(Path.cwd())
+    if not f:
+        console.print(_t("[red]未找到规划表文件[/red]", "[red]Plan file not found[/red]"))
+        raise typer.Exit(1)
+
+    result = diff_plan(f)
+    console.print_json(data=result)
+    if not result["checkpoint"]:
+        console.print(_t("[yellow]尚无成功运行的检查点，需要完整执行[/yellow]", "[yellow]No checkpoint yet; run the full workflow[/yellow]"))
+    elif result["rerun_stages"]:
+        stages = ",".join(result["rerun_stages"])
+        console.print(_t(f"[cyan]建议重跑: run --stages {stages}[/cyan]", f"[cyan]Suggested re-run: run --stages {stages}[/cyan]"))
+    else:
+        console.print(_t("[green]规划表自上次成功运行后没有影响已完成阶段的变更[/green]", "[green]No changes affecting completed stages[/green]"))
+
+
 @app.command(help=_t("执行指定阶段（新增 dry-run 与严格验证开关）。", "Execute selected stages (with dry-run and strict options)."))
 def run(
     stages: str = typer.Option("prepare,init_cluster,deploy_obs", help=_t("逗号分隔阶段列表", "Comma-separated stages")),
     dry_run: bool | None = typer.Option(None, "--dry-run/--no-dry-run", help=_t("部署提交阶段是否仅dry-run预览载荷", "Whether deploy step is dry-run only")),
     strict_validation: bool | None = typer.Option(None, "--strict-validation/--no-strict-validation", help=_t("严格验证：警告视为错误", "Strict validation: treat warnings as errors")),
     debug: bool | None = typer.Option(None, "--debug/--no-debug", help=_t("调试模式：启用额外调试日志", "Debug mode: enable extra logging")),
+    plan: Path | None = typer.Option(None, help=_t("规划表或 JSON 规划路径（缺省在当前目录查找 Excel 规划表）", "Plan workbook or compiled JSON plan (default: search the working directory)")),
 ):
+    plan = plan.resolve() if plan else None  # 切换到仓库根目录前解析相对路径
     _ensure_cwd_repo_root()
     tokens = [part.strip() for part in stages.split(",") if part.strip()]
     if not tokens:
@@ -360,10 +422,13 @@ def run(
     except ValueError as exc:
         console.print(f"[red]{exc}[/red]")
         raise typer.Exit(code=1) from exc
+    if plan is not None and not plan.is_file():
+        console.print(_t(f"[red]规划文件不存在: {plan}[/red]", f"[red]Plan file not found: {plan}[/red]"))
+        raise typer.Exit(code=1)
 
     opts = RunOptions(dry_run=dry_run, strict_validation=strict_validation, debug=debug)
     try:
-        result = execute_run(selected, opts)
+        result = execute_run(selected, opts, plan_file=plan)
     except Exception as exc:  # pragma: no cover - surfaced to user as error message
         console.print(_t(f"[red]执行失败: {exc}[/red]", f"[red]Execution failed: {exc}[/red]"))
         raise typer.Exit(code=2) from exc
@@ -371,6 +436,75 @@ def run(
     console.print_json(data={"status": "ok", **result.to_dict()})
 
 
+@app.command(help=_t("批量执行多份规划表（每个集群独立进程、日志与构件）。", "Run the workflow for many plan files, each cluster isolated."))
+def batch_run(
+    plans: list[str] = typer.Argument(..., help=_t("规划表文件、目录或 glob 模式", "Plan files, directories or glob patterns")),
+    stages: str = typer.Option("prepare,init_cluster,deploy_obs", help=_t("逗号分隔阶段列表", "Comma-separated stages")),
+    max_parallel: int | None = typer.Option(None, help=_t("同时运行的集群数量，缺省读取配置 batch.max_parallel", "Clusters running at once; defaults to batch.max_parallel")),
+    per_cloudtower: int | None = typer.Option(None, help=_t("同一 CloudTower 的并发上限，缺省读取配置", "Concurrent clusters per CloudTower; defaults from config")),
+    output_dir: Path | None = typer.Option(None, help=_t("批量输出目录，缺省 artifacts/batch/<时间戳>", "Output directory; defaults to artifacts/batch/<timestamp>")),
+    dry_run: bool | None = typer.Option(None, "--dry-run/--no-dry-run", help=_t("部署提交阶段是否仅dry-run预览载荷", "Whether deploy step is dry-run only")),
+    strict_validation: bool | None = typer.Option(None, "--strict-validation/--no-strict-validation", help=_t("严格验证：警告视为错误", "Strict validation: treat warnings as errors")),
+    debug: bool | None = typer.Option(None, "--debug/--no-debug", help=_t("调试模式：启用额外调试日志", "Debug mode: enable extra logging")),
+):
+    # 切换到仓库根目录前解析相对路径与 glob
+    plan_files = collect_plan_files(plans)
+    output_dir = output_dir.resolve() if output_dir else None
+    _ensure_cwd_repo_root()
+    setup_logging()
+    if not plan_files:
+        console.print(_t("[red]未找到任何规划表文件[/red]", "[red]No plan files found[/red]"))
+        raise typer.Exit(code=1)
+
+    tokens = [part.strip() for part in stages.split(",") if part.strip()]
+    try:
+        selected = resolve_stages(tokens)
+    except ValueError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1) from exc
+    if not selected:
+        console.print(_t("[red]请至少指定一个阶段[/red]", "[red]Please specify at least one stage[/red]"))
+        raise typer.Exit(code=1)
+
+    console.print(_t(f"[cyan]批量部署 {len(plan_files)} 份规划表[/cyan]", f"[cyan]Batch deploying {len(plan_files)} plan files[/cyan]"))
+    opts = RunOptions(dry_run=dry_run, strict_validation=strict_validation, debug=debug)
+    result = run_batch(
+        plan_files,
+        selected,
+        opts,
+        max_parallel=max_parallel,
+        per_cloudtower_limit=per_cloudtower,
+        output_dir=output_dir,
+    )
+    console.print_json(data=result.to_dict())
+    if not result.ok:
+        raise typer.Exit(code=2)
+
+
+@app.command(help=_t("以工作者身份认领持久化队列中的部署任务（协调者/工作者模式）。", "Claim deployment tasks from the durable queue as a worker."))
+def worker(
+    queue: Path | None = typer.Option(None, help=_t("队列文件，缺省读取配置 task_queue.path", "Queue file; defaults to task_queue.path")),
+    worker_id: str | None = typer.Option(None, help=_t("工作者标识，缺省为 主机名-进程号", "Worker id; defaults to hostname-pid")),
+    max_tasks: int | None = typer.Option(None, help=_t("处理指定数量任务后退出", "Exit after handling this many tasks")),
+):
+    queue = queue.resolve() if queue else None  # 切换到仓库根目录前解析相对路径
+    _ensure_cwd_repo_root()
+    setup_logging()
+    settings = resolve_queue_settings()
+    runner = DeploymentWorker(
+        DurableTaskQueue(queue or settings["path"]),
+        worker_id=worker_id,
+        poll_interval=settings["poll_interval"],
+        heartbeat_interval=settings["heartbeat_interval"],
+    )
+    console.print(_t(f"[cyan]工作者 {runner.worker_id} 已启动，队列={runner.queue.path}[/cyan]", f"[cyan]Worker {runner.worker_id} started, queue={runner.queue.path}[/cyan]"))
+    try:
+        handled = runner.run_forever(max_tasks=max_tasks)
+    except KeyboardInterrupt:
+        raise typer.Exit(code=130)
+    console.print_json(data={"worker_id": runner.worker_id, "handled": handled})
+
+
 @app.command(help=_t("扫描规划表内的所有主机并输出硬件信息。", "Scan all hosts in plan and output inventory."))
 def scan(
     plan: Path | None = typer.Option(None, help=_t("规划表路径", "Plan file path")),
@@ -433,6 +567,27 @@ def deploy(plan: Path | None = typer.Option(None, help=_t("规划表路径", "Pl
     console.print_json(data={"status": "ok", **result.to_dict()})
 
 
+@plan_app.command("compile", help=_t("把 Excel 规划表编译为带版本的 JSON 规划，供 run / API 直接使用。", "Compile the plan workbook into a versioned JSON plan for run / API use."))
+def plan_compile(
+    plan: Path | None = typer.Argument(None, help=_t("规划表路径（缺省在当前目录查找）", "Plan workbook path (default: search the working directory)")),
+    output: Path | None = typer.Option(None, "--output", "-o", help=_t("输出路径，缺省为 <规划表名>.plan.json", "Output path, defaults to <workbook>.plan.json")),
+):
+    plan, output = (path.resolve() if path else None for path in (plan, output))
+    _ensure_cwd_repo_root()
+    setup_logging()
+    f = plan or find_plan_file(Path.cwd())
+    if not f:
+        console.print(_t("[red]未找到规划表文件[/red]", "[red]Plan file not found[/red]"))
+        raise typer.Exit(1)
+
+    try:
+        target = compile_plan(f, output)
+    except Exception as exc:  # noqa: BLE001 - 以错误信息提示用户
+        console.print(_t(f"[red]编译失败: {exc}[/red]", f"[red]Compile failed: {exc}[/red]"))
+        raise typer.Exit(2) from exc
+    console.print(_t(f"[green]已生成 JSON 规划: {target}[/green]", f"[green]Compiled JSON plan written to {target}[/green]"))
+
+
 @app.command(help=_t("列出所有可用阶段及说明。", "List all available stages with descriptions."))
 def stages_list():
     _ensure_cwd_repo_root()
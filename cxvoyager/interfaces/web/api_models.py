@@ -27,7 +27,7 @@ from cxvoyager.core.deployment.deployment_executor import RunOptions, StageInfo
 from cxvoyager.core.deployment.stage_manager import Stage
 from cxvoyager.common.config import load_config
 
-from .task_scheduler import TaskRecord, TaskStatus, serialize_task
+from .task_scheduler import TaskRecord, TaskStatus, last_progress_seq, serialize_task
 
 
 logger = logging.getLogger(__name__)
@@ -129,16 +129,30 @@ class StageEventModel(BaseModel):
 
 
 class ProgressMessageModel(BaseModel):
+    seq: int | None = None
     message: str
     stage: str | None = None
     level: str = "info"
     at: datetime | None = None
     extra: Dict[str, Any] | None = None
+    gauge: str | None = None
 
 
 class RunRequestModel(BaseModel):
     stages: List[Stage] = Field(default_factory=_resolve_default_stage_selection)
     options: RunOptionsModel = Field(default_factory=_resolve_default_run_options)
+    priority: int | None = Field(default=None, description="调度优先级，数值越大越先执行；缺省时快速检查自动提升")
+    plan_file: str | None = Field(default=None, description="服务端的规划表或 JSON 规划路径，缺省在工作目录查找")
+    plan: Dict[str, Any] | None = Field(default=None, description="内联的 JSON 规划文档（plan compile 的输出），与 plan_file 二选一")
+
+
+class BatchRunRequestModel(BaseModel):
+    plan_files: List[str] = Field(..., min_length=1, description="规划表路径、目录或 glob 模式")
+    stages: List[Stage] = Field(default_factory=_resolve_default_stage_selection)
+    options: RunOptionsModel = Field(default_factory=_resolve_default_run_options)
+    max_parallel: int | None = Field(default=None, ge=1, description="同时运行的集群数量")
+    per_cloudtower_limit: int | None = Field(default=None, ge=1, description="同一 CloudTower 的并发上限")
+    priority: int | None = Field(default=None, description="调度优先级，数值越大越先执行")
 
 
 class RunResponseModel(BaseModel):
@@ -163,10 +177,27 @@ class TaskSummaryModel(BaseModel):
     abort_requested: bool = False
     abort_reason: str | None = None
     aborted_at: datetime | None = None
+    kind: str = "run"
+    plan_files: List[str] = Field(default_factory=list)
+    priority: int = 0
+    resource_keys: List[str] = Field(default_factory=list)
+    queue_position: int | None = None
+    progress_count: int = 0
+    last_progress_seq: int = 0
+    stage_event_count: int = 0
+    version: int = 0
 
     @classmethod
-    def from_record(cls, record: TaskRecord) -> "TaskSummaryModel":
-        payload = serialize_task(record)
+    def from_record(cls, record: TaskRecord, *, detail: bool = True) -> "TaskSummaryModel":
+        """``detail=False`` 时省略进度消息与阶段事件（列表轮询用），只保留当前阶段与计数，
+        二者改由 ``/tasks/{id}/progress``、``/tasks/{id}/stages`` 按游标增量拉取。"""
+
+        last_seq = last_progress_seq(record)
+        stage_count = len(record.stage_history)
+        payload = serialize_task(record, history_from=None if detail else (stage_count, last_seq))
+        payload["progress_count"] = len(record.progress_messages)
+        payload["stage_event_count"] = stage_count
+        payload["last_progress_seq"] = last_seq
         effective = payload.get("effective_options")
         payload["requested_options"] = RunOptionsModel(**payload["requested_options"])
         if effective:
@@ -180,6 +211,19 @@ class TaskSummaryModel(BaseModel):
         return cls(**payload)
 
 
+def task_summary_json(record: TaskRecord, *, detail: bool = True) -> bytes:
+    """返回任务摘要的 JSON 字节，按 ``record.version`` 缓存，任务未变更时不再重复序列化。"""
+
+    version = record.version
+    cached = record._json_cache.get(detail)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    body = TaskSummaryModel.from_record(record, detail=detail).model_dump_json().encode("utf-8")
+    if record.version == version:  # 序列化期间任务又有变更时不缓存，下次请求重新生成
+        record._json_cache[detail] = (version, body)
+    return body
+
+
 class TaskAbortRequest(BaseModel):
     reason: str | None = Field(default=None, description="终止任务的原因说明")
 
@@ -188,3 +232,17 @@ class TaskListResponse(BaseModel):
     items: List[TaskSummaryModel]
     total: int
 
+
+class StageHistoryPageModel(BaseModel):
+    task_id: str
+    items: List[StageEventModel] = Field(default_factory=list)
+    next_after: int = Field(0, description="下次请求使用的 after 游标（已返回的阶段事件条数）")
+
+
+class ProgressPageModel(BaseModel):
+    task_id: str
+    items: List[ProgressMessageModel] = Field(default_factory=list)
+    next_after: int = Field(0, description="下次请求使用的 after 游标")
+    last_seq: int = Field(0, description="任务当前最大的进度序号")
+    has_more: bool = False
+
@@ -0,0 +1,227 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Live task event stream (Server-Sent Events) for the web console.
+
+TaskManager 在任务变更时发布事件（task / stage / progress / deleted），每个 SSE
+连接持有一个有界缓冲：慢速客户端的任务摘要事件按任务合并，其余事件丢弃最旧的并在
+下一次读取时插入 ``overflow`` 提示，客户端据此通过游标接口补齐。最近的事件保存在
+重放环中，断线重连时按 ``Last-Event-ID`` 续传。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Deque, Dict, List, Set
+from uuid import uuid4
+
+from cxvoyager.common.config import load_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    kind: str
+    task_id: str | None
+    data: Dict[str, Any] = field(default_factory=dict)
+    id: str | None = None  # ``<epoch>-<序号>``；合成的提示事件没有 id，不影响续传位置
+    seq: int = 0
+
+    def encode(self) -> str:
+        """编码为 SSE 帧。"""
+
+        lines = []
+        if self.id:
+            lines.append(f"id: {self.id}")
+        lines.append(f"event: {self.kind}")
+        lines.append("data: " + json.dumps(self.data, ensure_ascii=False, default=str))
+        return "\n".join(lines) + "\n\n"
+
+
+class StreamSubscriber:
+    """单个 SSE 连接的有界缓冲，由发布线程写入、事件循环读取。"""
+
+    def __init__(self, task_id: str | None, buffer_size: int, loop: asyncio.AbstractEventLoop | None) -> None:
+        self.task_id = task_id
+        self.buffer_size = max(1, buffer_size)
+        self.dropped = 0  # 累计因缓冲已满丢弃的事件数
+        self.closed = False
+        self._buffer: Deque[StreamEvent] = deque()
+        self._pending_dropped = 0
+        self._resync = False
+        self._lock = Lock()
+        self._loop = loop
+        self._ready = asyncio.Event() if loop is not None else None
+
+    def wants(self, event: StreamEvent) -> bool:
+        return self.task_id is None or event.task_id == self.task_id
+
+    def offer(self, event: StreamEvent) -> None:
+        with self._lock:
+            if event.kind == "task":
+                # 任务摘要只关心最新状态，缓冲中尚未发送的旧摘要直接替换
+                for index, pending in enumerate(self._buffer):
+                    if pending.kind == "task" and pending.task_id == event.task_id:
+                        del self._buffer[index]
+                        break
+            if len(self._buffer) >= self.buffer_size:
+                self._buffer.popleft()
+                self.dropped += 1
+                self._pending_dropped += 1
+            self._buffer.append(event)
+        self._notify()
+
+    def request_resync(self) -> None:
+        with self._lock:
+            self._resync = True
+        self._notify()
+
+    def drain(self) -> List[StreamEvent]:
+        """取出缓冲中的全部事件；发生过丢弃或无法续传时在最前面插入提示事件。"""
+
+        with self._lock:
+            events = list(self._buffer)
+            self._buffer.clear()
+            if self._ready is not None:
+                self._ready.clear()
+            if self._resync:
+                events.insert(0, StreamEvent("reset", self.task_id, {"task_id": self.task_id}))
+                self._resync = False
+            if self._pending_dropped:
+                events.insert(0, StreamEvent("overflow", self.task_id, {"dropped": self._pending_dropped}))
+                self._pending_dropped = 0
+        return events
+
+    @property
+    def lag(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    async def wait(self, timeout: float) -> bool:
+        """等待新事件，超时返回 False（调用方据此发送心跳）。"""
+
+        if self._ready is None:
+            raise RuntimeError("subscriber is not bound to an event loop")
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._loop is None or self._ready is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:  # 事件循环已关闭，连接随之结束
+            self.closed = True
+
+
+class ProgressStreamHub:
+    """任务事件的发布中心：维护重放环与全部订阅者，发布方从不等待客户端。"""
+
+    def __init__(self, *, replay_size: int = 1000, client_buffer: int = 500, heartbeat_interval: float = 15.0) -> None:
+        self.epoch = uuid4().hex[:8]  # 服务重启后旧的 Last-Event-ID 失效
+        self.client_buffer = client_buffer
+        self.heartbeat_interval = heartbeat_interval
+        self._seq = 0
+        self._replay: Deque[StreamEvent] = deque(maxlen=max(1, replay_size))
+        self._subscribers: Set[StreamSubscriber] = set()
+        self._lock = Lock()
+
+    def publish(self, kind: str, task_id: str | None, data: Dict[str, Any]) -> StreamEvent:
+        with self._lock:
+            self._seq += 1
+            event = StreamEvent(kind, task_id, data, id=f"{self.epoch}-{self._seq}", seq=self._seq)
+            self._replay.append(event)
+            for subscriber in self._subscribers:
+                if subscriber.wants(event):
+                    subscriber.offer(event)
+        return event
+
+    def subscribe(
+        self,
+        *,
+        task_id: str | None = None,
+        last_event_id: str | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> StreamSubscriber:
+        """登记订阅者；``last_event_id`` 仍在重放环内时补发其后的事件，否则要求客户端重新同步。"""
+
+        subscriber = StreamSubscriber(task_id, self.client_buffer, loop)
+        with self._lock:
+            if last_event_id:
+                after = self._parse_event_id(last_event_id)
+                oldest = self._replay[0].seq if self._replay else self._seq + 1
+                if after is None or after > self._seq or after < oldest - 1:
+                    subscriber.request_resync()
+                else:
+                    for event in self._replay:
+                        if event.seq > after and subscriber.wants(event):
+                            subscriber.offer(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各订阅者的积压与丢弃计数，用于观察慢速客户端。"""
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return [{"task_id": item.task_id, "lag": item.lag, "dropped": item.dropped} for item in subscribers]
+
+    def _parse_event_id(self, value: str) -> int | None:
+        epoch, _, seq = value.strip().rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+
+def resolve_stream_settings(cfg: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """读取配置 ``web.stream`` 段，返回 ProgressStreamHub 的参数。"""
+
+    data = cfg if isinstance(cfg, dict) else load_config()
+    web_cfg = data.get("web", {}) if isinstance(data, dict) else {}
+    section = web_cfg.get("stream", {}) if isinstance(web_cfg, dict) else {}
+    if not isinstance(section, dict):
+        section = {}
+    return {
+        "replay_size": max(1, int(section.get("replay_size", 1000) or 1000)),
+        "client_buffer": max(1, int(section.get("client_buffer", 500) or 500)),
+        "heartbeat_interval": float(section.get("heartbeat_interval", 15.0) or 15.0),
+    }
+
+
+__all__ = ["ProgressStreamHub", "StreamEvent", "StreamSubscriber", "resolve_stream_settings"]
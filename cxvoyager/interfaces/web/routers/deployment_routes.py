@@ -17,20 +17,34 @@
 """REST API router for deployment operations."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable
 
-from fastapi import APIRouter, HTTPException, Response, status
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..api_models import (
+    BatchRunRequestModel,
+    ProgressPageModel,
     TaskAbortRequest,
     RunRequestModel,
+    StageHistoryPageModel,
     StageInfoModel,
     TaskListResponse,
     TaskSummaryModel,
     UIDefaultsModel,
+    task_summary_json,
 )
+from cxvoyager.core.deployment.batch_runner import collect_plan_files
 from cxvoyager.core.deployment.deployment_executor import list_stage_infos
-from ..task_scheduler import TaskStatus, task_manager
+from cxvoyager.core.deployment.plan_checkpoint import diff_plan
+from cxvoyager.integrations.excel.compiled_plan import CompiledPlanError, store_compiled_plan
+from cxvoyager.integrations.excel.planning_sheet_parser import find_plan_file
+from ..task_scheduler import TaskRecord, TaskStatus, get_task_manager
 
 router = APIRouter(prefix="", tags=["deploy"])
 logger = logging.getLogger(__name__)
@@ -57,39 +71,218 @@ def ui_defaults() -> UIDefaultsModel:
     return defaults
 
 
+@router.get("/plan/diff")
+def plan_diff(plan_file: str | None = Query(default=None, description="规划表路径，缺省自动查找")) -> dict:
+    target = Path(plan_file) if plan_file else find_plan_file(Path.cwd())
+    if not target or not target.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan file not found")
+    result = diff_plan(target)
+    logger.info("规划表差异 %s：受影响阶段=%s", target.name, [item["stage"] for item in result["stages"]])
+    return result
+
+
+def _resolve_run_plan(request: RunRequestModel) -> str | None:
+    """内联 JSON 规划校验后落盘（按内容去重），返回交给任务执行的规划文件路径。"""
+
+    if request.plan is not None and request.plan_file:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Specify either plan or plan_file, not both")
+    if request.plan is not None:
+        try:
+            stored = store_compiled_plan(request.plan)
+        except CompiledPlanError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+        logger.info("内联 JSON 规划已保存: %s", stored)
+        return str(stored)
+    if request.plan_file:
+        target = Path(request.plan_file)
+        if not target.is_file():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan file not found")
+        return str(target.resolve())
+    return None
+
+
 @router.post("/run", response_model=TaskSummaryModel, status_code=status.HTTP_202_ACCEPTED)
 def run(request: RunRequestModel) -> TaskSummaryModel:
     stage_names = [getattr(stage, "value", stage) for stage in request.stages]
     logger.info("创建部署任务，请求阶段=%s，选项=%s", stage_names, request.options.model_dump())
-    record = task_manager.submit(request.stages, request.options.to_domain())
+    plan_file = _resolve_run_plan(request)
+    record = get_task_manager().submit(
+        request.stages, request.options.to_domain(), priority=request.priority, plan_file=plan_file
+    )
     logger.info("任务 %s 已提交", record.id)
-    return TaskSummaryModel.from_record(record)
+    return TaskSummaryModel.from_record(get_task_manager().get(record.id) or record)
+
+
+@router.post("/batch", response_model=TaskSummaryModel, status_code=status.HTTP_202_ACCEPTED)
+def run_batch(request: BatchRunRequestModel) -> TaskSummaryModel:
+    plan_files = collect_plan_files(request.plan_files)
+    if not plan_files:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No plan files found")
+    logger.info("创建批量部署任务，规划表=%d 份，阶段=%s", len(plan_files), [stage.value for stage in request.stages])
+    record = get_task_manager().submit_batch(
+        [str(path) for path in plan_files],
+        request.stages,
+        request.options.to_domain(),
+        max_parallel=request.max_parallel,
+        per_cloudtower_limit=request.per_cloudtower_limit,
+        priority=request.priority,
+    )
+    logger.info("批量任务 %s 已提交", record.id)
+    return TaskSummaryModel.from_record(get_task_manager().get(record.id) or record)
+
+
+def _etag(scope: str, records: Iterable[TaskRecord]) -> str:
+    """由管理器实例标识与各任务的 (id, version) 计算弱 ETag。"""
+
+    digest = hashlib.sha1(f"{get_task_manager().epoch}|{scope}".encode("utf-8"))
+    for record in records:
+        digest.update(f"|{record.id}:{record.version}".encode("utf-8"))
+    return f'W/"{digest.hexdigest()[:20]}"'
+
+
+def _json_or_not_modified(etag: str, if_none_match: str | None, build: Callable[[], bytes]) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in {item.strip() for item in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=build(), media_type="application/json", headers=headers)
 
 
 @router.get("/tasks", response_model=TaskListResponse)
-def list_tasks(status: TaskStatus | None = None) -> TaskListResponse:
-    records_raw = task_manager.list()
+async def list_tasks(status: TaskStatus | None = None, if_none_match: str | None = Header(default=None)) -> Response:
+    records_raw = get_task_manager().list()
     if status is not None:
         records_raw = [item for item in records_raw if item.status == status]
         logger.debug("按状态 %s 过滤任务: %d", status.value, len(records_raw))
     else:
         logger.debug("列出所有任务: %d", len(records_raw))
-    records = [TaskSummaryModel.from_record(item) for item in records_raw]
-    return TaskListResponse(items=records, total=len(records))
+
+    # 列表只返回轻量摘要，进度消息通过 /tasks/{id}/progress 按游标增量获取；
+    # 各任务的 JSON 按版本缓存，轮询时没有变更的任务不再重复序列化
+    def _body() -> bytes:
+        items = b",".join(task_summary_json(item, detail=False) for item in records_raw)
+        return b'{"items":[' + items + b'],"total":' + str(len(records_raw)).encode("ascii") + b"}"
+
+    etag = _etag(f"list:{status.value if status else '*'}", records_raw)
+    return _json_or_not_modified(etag, if_none_match, _body)
+
+
+async def _stream_events(request: Request, task_id: str | None, last_event_id: str | None) -> AsyncIterator[str]:
+    hub = get_task_manager().events
+    subscriber = hub.subscribe(task_id=task_id, last_event_id=last_event_id, loop=asyncio.get_running_loop())
+    logger.debug("实时流连接: task=%s last_event_id=%s", task_id or "*", last_event_id)
+    try:
+        yield "retry: 3000\n\n"
+        while not subscriber.closed:
+            if await request.is_disconnected():
+                break
+            events = subscriber.drain()
+            if events:
+                yield "".join(event.encode() for event in events)
+            elif not await subscriber.wait(hub.heartbeat_interval):
+                yield ": ping\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
+        logger.debug("实时流断开: task=%s 丢弃=%d", task_id or "*", subscriber.dropped)
+
+
+def _sse_response(request: Request, task_id: str | None, last_event_id: str | None) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_events(request, task_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _find_task(task_id: str) -> TaskRecord | None:
+    """先查内存快照；本进程未知的任务需要读取 SQLite，放到线程池中执行以免阻塞事件循环。"""
+
+    manager = get_task_manager()
+    record = manager.get_cached(task_id)
+    if record is None:
+        record = await run_in_threadpool(manager.get, task_id)
+    return record
+
+
+@router.get("/tasks/stream", include_in_schema=False)
+async def stream_all_tasks(request: Request, last_event_id: str | None = Header(default=None)) -> StreamingResponse:
+    """所有任务的实时事件流（SSE），支持 ``Last-Event-ID`` 续传。"""
+
+    return _sse_response(request, None, last_event_id)
+
+
+@router.get("/tasks/{task_id}/stream", include_in_schema=False)
+async def stream_task(
+    task_id: str, request: Request, last_event_id: str | None = Header(default=None)
+) -> StreamingResponse:
+    """单个任务的实时事件流（SSE）。"""
+
+    if await _find_task(task_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return _sse_response(request, task_id, last_event_id)
 
 
 @router.get("/tasks/{task_id}", response_model=TaskSummaryModel)
-def get_task(task_id: str) -> TaskSummaryModel:
-    record = task_manager.get(task_id)
+async def get_task(task_id: str, if_none_match: str | None = Header(default=None)) -> Response:
+    record = await _find_task(task_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     logger.debug("获取任务详情: %s", task_id)
-    return TaskSummaryModel.from_record(record)
+    # 快照只读且按版本缓存，直接在事件循环中序列化，无需线程池
+    return _json_or_not_modified(_etag("task", [record]), if_none_match, lambda: task_summary_json(record))
+
+
+@router.get("/tasks/{task_id}/progress", response_model=ProgressPageModel)
+def task_progress(
+    task_id: str,
+    after: int = Query(0, ge=0, description="只返回序号大于该值的消息"),
+    limit: int = Query(200, ge=1, le=1000, description="单次返回的最大条数"),
+) -> ProgressPageModel:
+    page = get_task_manager().progress(task_id, after=after, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    items, last_seq = page
+    next_after = items[-1]["seq"] if items else max(after, 0)
+    logger.debug("任务 %s 增量进度: after=%d 返回=%d last=%d", task_id, after, len(items), last_seq)
+    return ProgressPageModel(
+        task_id=task_id,
+        items=items,
+        next_after=next_after,
+        last_seq=last_seq,
+        has_more=next_after < last_seq,
+    )
+
+
+@router.get("/tasks/{task_id}/stages", response_model=StageHistoryPageModel)
+def task_stages(
+    task_id: str,
+    after: int = Query(0, ge=0, description="跳过的阶段事件条数（上次响应的 next_after）"),
+) -> StageHistoryPageModel:
+    """阶段事件只追加，按条数游标增量返回；任务列表只给出 ``stage_event_count``。"""
+
+    record = get_task_manager().get(task_id)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    events = [
+        {"event": event.get("event"), "stage": event.get("stage"), "at": event.get("at")}
+        for event in record.stage_history[after:]
+    ]
+    return StageHistoryPageModel(task_id=task_id, items=events, next_after=after + len(events))
+
+
+@router.get("/progress/payloads/{ref}")
+def progress_payload(ref: str) -> JSONResponse:
+    """按引用读取外置的进度附加数据（消息 ``extra._payload.ref``）。"""
+
+    payload = get_task_manager().payloads.load(ref)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payload not found")
+    # 内容寻址，同一引用的内容永不改变
+    return JSONResponse(payload, headers={"Cache-Control": "public, max-age=31536000, immutable"})
 
 
 @router.delete("/tasks/{task_id}")
 def delete_task(task_id: str) -> Response:
-    if not task_manager.delete(task_id):
+    if not get_task_manager().delete(task_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     logger.info("任务 %s 删除完成", task_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -97,7 +290,7 @@ def delete_task(task_id: str) -> Response:
 
 @router.post("/tasks/{task_id}/abort", response_model=TaskSummaryModel)
 def abort_task(task_id: str, payload: TaskAbortRequest | None = None) -> TaskSummaryModel:
-    record, accepted = task_manager.abort(task_id, payload.reason if payload else None)
+    record, accepted = get_task_manager().abort(task_id, payload.reason if payload else None)
     if record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     if not accepted:
@@ -1,4 +1,4 @@
-import { createProgressFeed } from './progress-feed.js';
+import { createProgressFeed, createProgressStream } from './progress-feed.js';
 
 const API_BASE = '/api';
 const STATUS_TEXT = {
@@ -11,6 +11,10 @@ const STATUS_TEXT = {
 
 const DEFAULT_ABORT_REASON = '用户主动中止';
 const GLOBAL_PROGRESS_LIMIT = 300;
+const PROGRESS_PAGE_SIZE = 200;
+const POLL_INTERVAL_MS = 2000;
+// 实时流连接期间只做低频校准轮询
+const STREAM_RESYNC_INTERVAL_MS = 30000;
 
 const stageGridEl = document.getElementById('stage-grid');
 const deployBtn = document.getElementById('deploy-btn');
@@ -53,6 +57,10 @@ const defaultRunOptions = {
 };
 
 const abortRequestCache = new Map();
+// 每个任务已拉取的进度消息与游标：taskId -> { after, messages }
+const progressCache = new Map();
+// 每个任务已拉取的阶段事件（只追加，条数即游标）：taskId -> events
+const stageCache = new Map();
 
 const taskProgressFeed = createProgressFeed({
   title: '最近进展',
@@ -727,10 +735,111 @@ function formatDuration(durationMs) {
   return parts.join(':');
 }
 
+function getProgressEntry(taskId) {
+  let entry = progressCache.get(taskId);
+  if (!entry) {
+    entry = { after: 0, messages: [] };
+    progressCache.set(taskId, entry);
+  }
+  return entry;
+}
+
+function appendProgress(entry, items) {
+  for (const item of items) {
+    const seq = Number(item?.seq) || 0;
+    if (seq <= entry.after) {
+      continue;
+    }
+    if (item.gauge) {
+      // 仪表类消息（上传进度、轮询状态）原地更新，只保留最新值
+      const previous = entry.messages.findIndex((message) => message.gauge === item.gauge);
+      if (previous !== -1) {
+        entry.messages.splice(previous, 1);
+      }
+    }
+    entry.messages.push(item);
+    entry.after = seq;
+  }
+  if (entry.messages.length > GLOBAL_PROGRESS_LIMIT) {
+    entry.messages.splice(0, entry.messages.length - GLOBAL_PROGRESS_LIMIT);
+  }
+}
+
+async function syncTaskProgress(task) {
+  let entry = getProgressEntry(task.id);
+  const lastSeq = Number(task.last_progress_seq) || 0;
+  if (lastSeq < entry.after) {
+    progressCache.delete(task.id);
+    entry = getProgressEntry(task.id);
+  }
+  let hasMore = lastSeq > entry.after;
+  while (hasMore) {
+    const page = await fetchJSON(
+      `${API_BASE}/tasks/${task.id}/progress?after=${entry.after}&limit=${PROGRESS_PAGE_SIZE}`,
+    );
+    if (!page || !Array.isArray(page.items)) {
+      break;
+    }
+    const before = entry.after;
+    appendProgress(entry, page.items);
+    entry.after = Math.max(entry.after, Number(page.next_after) || 0);
+    hasMore = Boolean(page.has_more) && entry.after > before;
+  }
+  task.progress_messages = entry.messages;
+}
+
+function getStageEvents(taskId) {
+  let events = stageCache.get(taskId);
+  if (!events) {
+    events = [];
+    stageCache.set(taskId, events);
+  }
+  return events;
+}
+
+async function syncTaskStages(task) {
+  let events = getStageEvents(task.id);
+  const count = Number(task.stage_event_count) || 0;
+  if (count < events.length) {
+    stageCache.delete(task.id);
+    events = getStageEvents(task.id);
+  }
+  if (count > events.length) {
+    const page = await fetchJSON(`${API_BASE}/tasks/${task.id}/stages?after=${events.length}`);
+    if (page && Array.isArray(page.items)) {
+      events.push(...page.items);
+    }
+  }
+  task.stage_history = events;
+}
+
 async function fetchTasks() {
   try {
     const data = await fetchJSON(`${API_BASE}/tasks`);
     if (data && Array.isArray(data.items)) {
+      const liveIds = new Set(data.items.map((task) => task.id));
+      for (const cache of [progressCache, stageCache]) {
+        for (const taskId of cache.keys()) {
+          if (!liveIds.has(taskId)) {
+            cache.delete(taskId);
+          }
+        }
+      }
+      // 列表只含轻量摘要，进度消息与阶段事件按游标增量拉取后合并到本地缓存
+      await Promise.all(
+        data.items.map((task) =>
+          Promise.all([
+            syncTaskProgress(task).catch((err) => {
+              console.warn('Failed to fetch task progress', task.id, err);
+              task.progress_messages = progressCache.get(task.id)?.messages ?? [];
+            }),
+            syncTaskStages(task).catch((err) => {
+              console.warn('Failed to fetch task stages', task.id, err);
+              task.stage_history = stageCache.get(task.id) ?? [];
+            }),
+          ]),
+        ),
+      );
       taskStore = data.items;
       renderTasks(getFilteredTasks());
       renderGlobalProgress(taskStore);
@@ -786,11 +895,110 @@ function requestAbortTask(taskId, triggerBtn) {
     });
 }
 
-function startPolling() {
+function startPolling(interval = POLL_INTERVAL_MS) {
   if (pollTimer) {
     clearInterval(pollTimer);
   }
-  pollTimer = setInterval(fetchTasks, 2000);
+  pollTimer = setInterval(fetchTasks, interval);
+}
+
+let renderScheduled = false;
+
+function scheduleRender() {
+  if (renderScheduled) {
+    return;
+  }
+  renderScheduled = true;
+  requestAnimationFrame(() => {
+    renderScheduled = false;
+    renderTasks(getFilteredTasks());
+    renderGlobalProgress(taskStore);
+    if (flowStepperEl) {
+      setStep(computeNextStep());
+    }
+  });
+}
+
+function findTask(taskId) {
+  return taskStore.find((item) => item.id === taskId);
+}
+
+const progressStream = createProgressStream({
+  url: `${API_BASE}/tasks/stream`,
+  onOpen: () => {
+    // 连接（或重连）成功后先补齐一次，再降低轮询频率
+    fetchTasks();
+    startPolling(STREAM_RESYNC_INTERVAL_MS);
+  },
+  // 断线重连期间临时恢复常规轮询
+  onInterrupt: () => startPolling(POLL_INTERVAL_MS),
+  onFallback: () => startPolling(POLL_INTERVAL_MS),
+  handlers: {
+    task: (data) => {
+      if (!data?.id) return;
+      const existing = findTask(data.id);
+      if (existing) {
+        Object.assign(existing, data, {
+          stage_history: existing.stage_history,
+          progress_messages: existing.progress_messages,
+        });
+      } else {
+        taskStore.unshift({
+          ...data,
+          stage_history: getStageEvents(data.id),
+          progress_messages: getProgressEntry(data.id).messages,
+        });
+      }
+      scheduleRender();
+    },
+    stage: (data) => {
+      const task = findTask(data?.task_id);
+      if (!task) return;
+      const events = getStageEvents(data.task_id);
+      const index = Number(data.index);
+      if (Number.isInteger(index) && index < events.length) {
+        return; // 已经通过列表补齐
+      }
+      if (Number.isInteger(index) && index > events.length) {
+        // 中间有事件缺失，改由游标接口补齐
+        fetchTasks();
+        return;
+      }
+      events.push({ event: data.event, stage: data.stage, at: data.at });
+      task.stage_history = events;
+      scheduleRender();
+    },
+    progress: (data) => {
+      if (!data?.task_id) return;
+      const entry = getProgressEntry(data.task_id);
+      const after = Number(data.after) || 0;
+      if (after > entry.after) {
+        // 中间有消息缺失（慢速连接被丢弃），改由游标接口补齐
+        fetchTasks();
+        return;
+      }
+      appendProgress(entry, [data]);
+      const task = findTask(data.task_id);
+      if (task) {
+        task.progress_messages = entry.messages;
+      }
+      scheduleRender();
+    },
+    deleted: (data) => {
+      if (!data?.id) return;
+      progressCache.delete(data.id);
+      stageCache.delete(data.id);
+      taskStore = taskStore.filter((item) => item.id !== data.id);
+      scheduleRender();
+    },
+    overflow: () => fetchTasks(),
+    reset: () => fetchTasks(),
+  },
+});
+
+function startLiveUpdates() {
+  startPolling(POLL_INTERVAL_MS);
+  progressStream.start();
 }
 
 async function bootstrap() {
@@ -848,7 +1056,7 @@ async function bootstrap() {
       });
     });
     await fetchTasks();
-    startPolling();
+    startLiveUpdates();
   } catch (err) {
     console.error(err);
     setFormHint('加载阶段信息失败：' + err.message, 'error');
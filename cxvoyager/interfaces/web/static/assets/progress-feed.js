@@ -175,3 +175,81 @@ export class ProgressFeed {
 export function createProgressFeed(options) {
   return new ProgressFeed(options);
 }
+
+const STREAM_EVENT_KINDS = ['task', 'stage', 'progress', 'deleted', 'overflow', 'reset'];
+
+/**
+ * 订阅 `/api/tasks/stream`（SSE）推送的任务事件。
+ * 浏览器不支持 EventSource 或连续多次连接失败时调用 onFallback，由调用方恢复轮询；
+ * EventSource 自带断线重连并携带 Last-Event-ID，服务端据此补发错过的事件。
+ */
+export class ProgressStream {
+  constructor(options = {}) {
+    this.url = options.url ?? '/api/tasks/stream';
+    this.handlers = options.handlers ?? {};
+    this.onOpen = options.onOpen ?? (() => {});
+    this.onFallback = options.onFallback ?? (() => {});
+    this.onInterrupt = options.onInterrupt ?? (() => {});
+    this.maxFailures = options.maxFailures ?? 3;
+    this.source = null;
+    this.failures = 0;
+  }
+
+  get supported() {
+    return typeof window !== 'undefined' && typeof window.EventSource === 'function';
+  }
+
+  get connected() {
+    return Boolean(this.source) && this.source.readyState === 1;
+  }
+
+  start() {
+    if (!this.supported) {
+      this.onFallback();
+      return false;
+    }
+    this.stop();
+    const source = new EventSource(this.url);
+    this.source = source;
+    source.onopen = () => {
+      this.failures = 0;
+      this.onOpen();
+    };
+    source.onerror = () => {
+      this.failures += 1;
+      this.onInterrupt();
+      if (this.failures >= this.maxFailures) {
+        this.stop();
+        this.onFallback();
+      }
+    };
+    for (const kind of STREAM_EVENT_KINDS) {
+      source.addEventListener(kind, (event) => {
+        const handler = this.handlers[kind];
+        if (!handler) {
+          return;
+        }
+        let data = null;
+        try {
+          data = event.data ? JSON.parse(event.data) : null;
+        } catch (err) {
+          console.warn('Invalid stream payload', kind, err);
+          return;
+        }
+        handler(data);
+      });
+    }
+    return true;
+  }
+
+  stop() {
+    if (this.source) {
+      this.source.close();
+      this.source = null;
+    }
+  }
+}
+
+export function createProgressStream(options) {
+  return new ProgressStream(options);
+}
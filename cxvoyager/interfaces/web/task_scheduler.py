@@ -17,28 +17,60 @@
 """Background deployment task orchestration for the web API."""
 from __future__ import annotations
 
-import json
+import copy
 import logging
+import multiprocessing
 import os
-from concurrent.futures import ThreadPoolExecutor
+import queue as queue_module
+import socket
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from threading import Event, Lock
-from typing import Any, Dict, List, Sequence, Tuple
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 from uuid import uuid4
 
-from cxvoyager.core.deployment.deployment_executor import EffectiveRunOptions, RunOptions, execute_run
-from cxvoyager.core.deployment.runtime_context import RunContext
+from cxvoyager.common.config import load_config
+from cxvoyager.core.deployment.batch_runner import describe_batch_event, run_batch
+from cxvoyager.core.deployment.deployment_executor import EffectiveRunOptions, RunOptions
+from cxvoyager.core.deployment.progress import (
+    DEFAULT_PROGRESS_RETENTION,
+    ProgressBuffer,
+    ProgressPayloadStore,
+    resolve_progress_payload_store,
+    resolve_progress_retention,
+)
 from cxvoyager.core.deployment.stage_manager import AbortRequestedError, Stage
+from cxvoyager.core.deployment.task_queue import DurableTaskQueue, QueueEvent, resolve_queue_settings
+from cxvoyager.core.deployment.task_worker import run_payload_in_process
+
+from .event_stream import ProgressStreamHub, resolve_stream_settings
+from .task_store import SqliteTaskStore, import_legacy_json
 
 logger = logging.getLogger(__name__)
 
-_DEFAULT_TASK_STORAGE = Path(__file__).resolve().parents[2] / "logs" / "web_tasks.json"
+_DEFAULT_TASK_STORAGE = Path(__file__).resolve().parents[2] / "logs" / "web_tasks.db"
+LEGACY_TASK_STORAGE = _DEFAULT_TASK_STORAGE.with_suffix(".json")
 TASK_STORAGE_PATH = Path(os.environ.get("CXVOYAGER_TASK_STORAGE", _DEFAULT_TASK_STORAGE))
 
 
+def _owner_alive(owner: str | None) -> bool:
+    """判断写入任务的服务进程是否仍存活（多 uvicorn worker 共用存档时避免误判中断）。"""
+
+    if not owner or ":" not in owner:
+        return False
+    host, _, pid_text = owner.rpartition(":")
+    if host != socket.gethostname() or not pid_text.isdigit() or int(pid_text) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid_text), 0)
+    except OSError:
+        return False
+    return True
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -51,6 +83,11 @@ class TaskStatus(str, Enum):
     aborted = "aborted"
 
 
+_TERMINAL_STATUSES = frozenset({TaskStatus.done, TaskStatus.failed, TaskStatus.aborted})
+# 已结束任务的队列事件保留时长（秒），超过后视为其协调者已退出，直接清理
+_ORPHAN_EVENT_RETENTION = 3600.0
+
+
 class TaskAbortedError(RuntimeError):
     """部署任务被用户中止时抛出的异常。"""
 
@@ -74,15 +111,100 @@ class TaskRecord:
     total_stages: int = 0
     current_stage: str | None = None
     stage_history: List[Dict[str, Any]] = field(default_factory=list)
-    progress_messages: List[Dict[str, Any]] = field(default_factory=list)
+    # 按级别限额保留，淘汰的消息已在存档中；pinned_after=0 表示尚无落盘消息、全部暂不淘汰
+    progress_messages: List[Dict[str, Any]] = field(default_factory=lambda: ProgressBuffer(spill=None, pinned_after=0))
     abort_requested: bool = False  # 是否已收到终止请求
     abort_reason: str | None = None  # 终止原因文字描述
     aborted_at: datetime | None = None  # 终止完成时间戳
+    kind: str = "run"  # run: 单集群工作流；batch: 多集群批量部署
+    plan_files: List[str] = field(default_factory=list)  # 批量任务的规划表列表；单集群任务指定规划文件时只含一项
+    priority: int = 0  # 调度优先级，数值越大越先执行
+    resource_keys: List[str] = field(default_factory=list)  # 互斥资源键，如 cluster:<VIP>、cloudtower:<IP>
+    queue_position: int | None = None  # 排队中的位置（1 起），非排队状态为 None
+    version: int = 0  # 每次变更（_persist_locked）递增，用作 ETag 与序列化缓存的键
+    # detail -> (version, JSON 字节)，由 api_models.task_summary_json 维护
+    _json_cache: Dict[bool, Tuple[int, bytes]] = field(default_factory=dict, repr=False, compare=False)
 
     def snapshot(self) -> Dict[str, Any]:
         return serialize_task(self)
 
 
+class _SharedPrefix:
+    """只追加列表的前 ``length`` 项：快照按引用共享阶段事件，而不是每次复制整个列表。"""
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, items: List[Dict[str, Any]], length: int) -> None:
+        self._items = items
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        items = self._items
+        return (items[index] for index in range(self._length))
+
+    def __getitem__(self, index):
+        positions = range(self._length)[index]
+        if isinstance(positions, range):
+            return [self._items[position] for position in positions]
+        return self._items[positions]
+
+
+class _ProgressView:
+    """快照中的进度消息：引用任务的进度缓冲与冻结时的最大序号，读取时才截取。
+
+    每条进度都会生成新快照，冻结时复制缓冲的代价与保留条数成正比且发生在锁内，因此推迟到
+    读取时：一次性复制缓冲（``list.copy`` 在持有 GIL 时完成，不会与追加、淘汰交错）并只保留
+    序号不超过 ``last_seq`` 的消息。此后被淘汰的旧消息已在存档中，可经进度接口按游标读取；
+    ``len`` 为冻结时的条数。
+    """
+
+    __slots__ = ("_buffer", "_count", "_items", "last_seq")
+
+    def __init__(self, buffer: List[Dict[str, Any]], last_seq: int) -> None:
+        self._buffer = buffer
+        self._count = len(buffer)
+        self._items: Tuple[Dict[str, Any], ...] | None = None
+        self.last_seq = last_seq
+
+    def _materialize(self) -> Tuple[Dict[str, Any], ...]:
+        items = self._items
+        if items is None:
+            last_seq = self.last_seq
+            items = tuple(item for item in list.copy(self._buffer) if (item.get("seq") or 0) <= last_seq)
+            self._items = items
+        return items
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __getitem__(self, index):
+        return self._materialize()[index]
+
+
+def _freeze_task(record: TaskRecord) -> TaskRecord:
+    """生成任务的只读快照，供 API 读取方在不加锁的情况下使用。
+
+    只复制阶段列表等小容器；阶段事件只追加，按长度共享前缀，进度消息按序号延迟截取，
+    冻结的开销与任务已运行的时长无关。
+    """
+
+    snapshot = copy.copy(record)
+    snapshot.stages = list(record.stages)
+    snapshot.completed_stages = list(record.completed_stages)
+    snapshot.stage_history = _SharedPrefix(record.stage_history, len(record.stage_history))
+    snapshot.progress_messages = _ProgressView(record.progress_messages, last_progress_seq(record))
+    snapshot.plan_files = list(record.plan_files)
+    snapshot.resource_keys = list(record.resource_keys)
+    snapshot._json_cache = {}
+    return snapshot
+
+
 def _serialize_datetime(value: datetime | None) -> str | None:
     if value is None:
         return None
@@ -91,7 +213,17 @@ def _serialize_datetime(value: datetime | None) -> str | None:
     return str(value)
 
 
-def serialize_task(record: TaskRecord) -> Dict[str, Any]:
+def _progress_since(record: TaskRecord, seq: int) -> List[Dict[str, Any]]:
+    messages = record.progress_messages
+    if isinstance(messages, ProgressBuffer):
+        return messages.since(seq)
+    return [item for item in messages if (item.get("seq") or 0) > seq]
+
+
+def serialize_task(record: TaskRecord, *, history_from: Tuple[int, int] | None = None) -> Dict[str, Any]:
+    """序列化任务；``history_from=(阶段事件数, 进度序号)`` 时只输出该位置之后的历史（增量持久化与推送）。"""
+
+    stage_start, progress_after = history_from or (0, 0)
     return {
         "id": record.id,
         "status": record.status.value,
@@ -111,21 +243,29 @@ def serialize_task(record: TaskRecord) -> Dict[str, Any]:
                 "stage": event.get("stage"),
                 "at": _serialize_datetime(event.get("at")),
             }
-            for event in record.stage_history
+            for event in record.stage_history[stage_start:]
         ],
         "progress_messages": [
             {
+                "seq": item.get("seq"),
                 "message": item.get("message"),
                 "stage": item.get("stage"),
                 "level": item.get("level", "info"),
                 "at": _serialize_datetime(item.get("at")),
                 "extra": item.get("extra"),
+                "gauge": item.get("gauge"),
             }
-            for item in record.progress_messages
+            for item in (_progress_since(record, progress_after) if progress_after else record.progress_messages)
         ],
         "abort_requested": record.abort_requested,
         "abort_reason": record.abort_reason,
         "aborted_at": _serialize_datetime(record.aborted_at),
+        "kind": record.kind,
+        "plan_files": list(record.plan_files),
+        "priority": record.priority,
+        "resource_keys": list(record.resource_keys),
+        "queue_position": record.queue_position,
+        "version": record.version,
     }
 
 
@@ -140,6 +280,23 @@ def _parse_datetime(value: Any) -> datetime | None:
     return None
 
 
+def _next_progress_seq(record: TaskRecord) -> int:
+    """进度消息序号在任务内单调递增（从 1 开始），前端以此作为增量拉取的游标。"""
+
+    messages = record.progress_messages
+    if isinstance(messages, (ProgressBuffer, _ProgressView)):  # 淘汰旧消息后仍记得最大序号
+        return messages.last_seq + 1
+    if not messages:
+        return 1
+    return int(messages[-1].get("seq") or len(messages)) + 1
+
+
+def last_progress_seq(record: TaskRecord) -> int:
+    """任务当前最大的进度序号，没有消息时为 0。"""
+
+    return _next_progress_seq(record) - 1
+
+
 def _deserialize_task(payload: Dict[str, Any]) -> TaskRecord:
     stages_raw = payload.get("stages", [])
     stages = [Stage(item) if not isinstance(item, Stage) else item for item in stages_raw]
@@ -176,71 +333,440 @@ def _deserialize_task(payload: Dict[str, Any]) -> TaskRecord:
         at = _parse_datetime(item.get("at"))
         progress_messages.append(
             {
+                # 旧存档没有序号，按出现顺序补齐
+                "seq": item.get("seq") or (progress_messages[-1]["seq"] + 1 if progress_messages else 1),
                 "message": item.get("message"),
                 "stage": item.get("stage"),
                 "level": item.get("level", "info"),
                 "at": at,
                 "extra": item.get("extra"),
+                "gauge": item.get("gauge"),
             }
         )
-    record.progress_messages = progress_messages
+    record.progress_messages = ProgressBuffer(progress_messages, spill=None)
     record.abort_requested = bool(payload.get("abort_requested", False))
     record.abort_reason = payload.get("abort_reason")
     record.aborted_at = _parse_datetime(payload.get("aborted_at"))
+    record.kind = payload.get("kind") or "run"
+    record.plan_files = list(payload.get("plan_files") or [])
+    record.priority = int(payload.get("priority") or 0)
+    record.resource_keys = list(payload.get("resource_keys") or [])
+    record.queue_position = payload.get("queue_position")
+    record.version = int(payload.get("version") or 0)
     return record
 
 
+def resolve_resource_keys(plan_files: Sequence[str | Path] | None = None) -> List[str]:
+    """从规划表提取互斥资源键（集群 VIP、CloudTower IP）。
+
+    未指定规划表时按工作流的默认规则在当前目录查找；无法解析时返回空列表，
+    任务不参与互斥调度。
+    """
+
+    from cxvoyager.integrations.excel.planning_sheet_parser import find_plan_file, parse_plan
+
+    paths = [Path(item) for item in plan_files] if plan_files else [find_plan_file(Path.cwd())]
+    keys: List[str] = []
+    for path in paths:
+        if path is None:
+            continue
+        try:
+            variables = parse_plan(path).get("variables", {})
+        except Exception as exc:  # noqa: BLE001 - 交由 prepare 阶段给出明确错误
+            logger.warning("解析规划表资源键失败 %s: %s", path, exc)
+            continue
+        for prefix, name in (("cluster", "CLUSTER_VIP"), ("cloudtower", "CLOUDTOWER_IP")):
+            value = variables.get(name)
+            key = f"{prefix}:{value}" if value else None
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def _default_resource_resolver(record: "TaskRecord") -> List[str]:
+    return resolve_resource_keys(record.plan_files or None)
+
+
 class TaskManager:
-    def __init__(self, max_workers: int = 4, storage_path: Path | None = None) -> None:
-        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deploy-task")
+    """Web 任务管理器。
+
+    缺省在本机子进程池执行任务；传入 ``queue`` 时切换为协调者模式：任务写入
+    持久化队列，由独立的工作者进程认领执行，后台线程增量同步队列事件到任务记录。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        storage_path: Path | None = None,
+        *,
+        queue: DurableTaskQueue | None = None,
+        poll_interval: float = 1.0,
+        lease_timeout: float = 60.0,
+        run_fn: Callable[..., Any] | None = None,
+        quick_concurrency: int = 2,
+        quick_stages: Sequence[str] = (Stage.prepare.value,),
+        quick_priority: int = 10,
+        resource_limit: int = 1,
+        resource_resolver: Callable[[TaskRecord], List[str]] | None = None,
+        flush_interval: float = 1.0,
+        flush_threshold: int = 200,
+        events: ProgressStreamHub | None = None,
+        progress_retention: Dict[str, int | None] | None = None,
+        payloads: ProgressPayloadStore | None = None,
+    ) -> None:
+        # 线程池只承载轻量的调度线程，工作流本身在子进程池中执行
+        self._max_workers = max_workers + quick_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="deploy-task")
+        # 资源键解析需要读取规划表，放在独立线程中进行，不阻塞 API 请求
+        self._admission = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-admission")
+        self._max_concurrent = max_workers
+        self._quick_concurrency = quick_concurrency
+        self._quick_stages = frozenset(quick_stages)
+        self._quick_priority = quick_priority
+        self._resource_limit = max(1, resource_limit)
+        self._resource_resolver = resource_resolver or _default_resource_resolver
+        self._pending: List[TaskRecord] = []  # 本地模式下等待调度的任务
+        self._active: Dict[str, bool] = {}  # 已调度任务 -> 是否为快速任务
+        self._resource_load: Dict[str, int] = {}
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._ipc_manager: Any = None
+        self._run_fn = run_fn  # 子进程内替换 execute_run（需可 pickle），供测试使用
         self._tasks: Dict[str, TaskRecord] = {}
         self._running: Dict[str, Dict[str, Any]] = {}  # 保存正在执行的任务线程信息
         self._lock = Lock()
-        self._storage_path = storage_path or TASK_STORAGE_PATH
+        storage = Path(storage_path or TASK_STORAGE_PATH)
+        # 兼容旧配置：指向 .json 时改用同名 .db，并在首次启动时导入旧文件
+        self._legacy_path = storage if storage.suffix == ".json" else LEGACY_TASK_STORAGE
+        self._storage_path = storage.with_suffix(".db") if storage.suffix == ".json" else storage
+        self._persisted: Dict[str, Tuple[int, int]] = {}  # 任务 -> 已持久化的 (阶段事件数, 进度序号)
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue = queue
+        self._poll_interval = poll_interval
+        self._lease_timeout = lease_timeout
+        self._stop_event = Event()
+        self._sync_lock = Lock()  # 串行化队列同步，避免重复应用同一批事件
+        self._coordinator: Thread | None = None
         try:
             self._storage_path.parent.mkdir(parents=True, exist_ok=True)
         except Exception:  # pragma: no cover - filesystem interaction
             logger.exception("无法创建任务存档目录: %s", self._storage_path.parent)
+        self._store = SqliteTaskStore(self._storage_path)
+        self._flush_interval = flush_interval
+        self._flush_threshold = max(1, flush_threshold)
+        self._dirty: Dict[str, TaskRecord] = {}  # 待写入存档的任务
+        self._dirty_updates = 0
+        self._flush_lock = Lock()
+        self._flush_wakeup = Event()
+        self.events = events or ProgressStreamHub()  # SSE 实时推送
+        self._progress_retention = dict(progress_retention or DEFAULT_PROGRESS_RETENTION)
+        self.payloads = payloads or resolve_progress_payload_store(None)  # 外置的进度附加数据
+        self._published: Dict[str, Tuple[int, int]] = {}  # 任务 -> 已推送的 (阶段事件数, 进度序号)
+        # 实例标识参与 ETag 计算：重启或请求落到其他 worker 时版本号不可比，客户端重新获取一次
+        self.epoch = uuid4().hex[:8]
+        # 读取方使用的只读快照：每次变更后整体替换字典（copy-on-write），list/get 不需要加锁
+        self._snapshots: Dict[str, TaskRecord] = {}
+        self._foreign: Dict[str, TaskRecord] = {}  # 其他 worker 创建的任务，由写线程定期刷新
+        self._foreign_stamps: Dict[str, str | None] = {}
         self._load_persisted_tasks()
+        self._flusher = Thread(target=self._flusher_loop, name="task-store-flusher", daemon=True)
+        self._flusher.start()
+        if self._queue is not None:
+            self._coordinator = Thread(target=self._coordinator_loop, name="task-coordinator", daemon=True)
+            self._coordinator.start()
+
+    @property
+    def distributed(self) -> bool:
+        return self._queue is not None
 
-    def submit(self, stages: Sequence[Stage], options: RunOptions) -> TaskRecord:
+    def shutdown(self) -> None:
+        """停止后台线程与本地线程池，并把未写入的任务刷入存档（测试与服务退出时使用）。"""
+
+        self._stop_event.set()
+        self.events.close()
+        if self._coordinator is not None:
+            self._coordinator.join(timeout=self._poll_interval * 2)
+        self._flush_wakeup.set()
+        self._flusher.join(timeout=self._flush_interval * 2)
+        self.flush()
+        self._admission.shutdown(wait=False)
+        self._executor.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._ipc_manager.shutdown()
+            self._process_pool = None
+        self._store.close()
+
+    def submit(
+        self,
+        stages: Sequence[Stage],
+        options: RunOptions,
+        *,
+        priority: int | None = None,
+        plan_file: str | None = None,
+    ) -> TaskRecord:
         task_id = uuid4().hex
         stage_names = [stage.value if isinstance(stage, Stage) else str(stage) for stage in stages]
         logger.info(
-            "提交任务 %s，阶段=%s，选项=%s",
+            "提交任务 %s，阶段=%s，选项=%s，规划文件=%s",
             task_id,
             stage_names,
             options.to_dict(),
+            plan_file or "-",
         )
         record = TaskRecord(id=task_id, stages=list(stages), requested_options=RunOptions(**options.to_dict()))
         record.total_stages = len(stage_names)
-        record.status = TaskStatus.running
-        cancel_event = Event()
-        with self._lock:
-            self._tasks[task_id] = record
-            self._running[task_id] = {"cancel_event": cancel_event}
-            self._persist_locked()
-        logger.debug("任务 %s 已加入线程池队列", task_id)
-        future = self._executor.submit(self._run_task, record, cancel_event)
+        payload: Dict[str, Any] = {"kind": "run", "stages": stage_names, "options": options.to_dict()}
+        if plan_file:
+            record.plan_files = [str(plan_file)]
+            payload["plan_file"] = str(plan_file)
+        return self._admit(record, payload, priority)
+
+    def submit_batch(
+        self,
+        plan_files: Sequence[str],
+        stages: Sequence[Stage],
+        options: RunOptions,
+        *,
+        max_parallel: int | None = None,
+        per_cloudtower_limit: int | None = None,
+        priority: int | None = None,
+    ) -> TaskRecord:
+        """提交多集群批量部署任务，整个批次对应一条任务记录。"""
+
+        task_id = uuid4().hex
+        logger.info("提交批量任务 %s，规划表=%d 份，阶段=%s", task_id, len(plan_files), [stage.value for stage in stages])
+        record = TaskRecord(id=task_id, stages=list(stages), requested_options=RunOptions(**options.to_dict()))
+        record.kind = "batch"
+        record.plan_files = [str(item) for item in plan_files]
+        record.total_stages = len(record.stages)
+        payload = {
+            "kind": "batch",
+            "stages": [stage.value for stage in stages],
+            "options": options.to_dict(),
+            "plan_files": list(record.plan_files),
+            "max_parallel": max_parallel,
+            "per_cloudtower_limit": per_cloudtower_limit,
+        }
+        return self._admit(record, payload, priority)
+
+    def _is_quick(self, record: TaskRecord) -> bool:
+        """仅包含快速阶段（如 prepare 预检）的单集群任务走独立并发槽位且不占用资源键。"""
+
+        return record.kind == "run" and bool(record.stages) and all(
+            (stage.value if isinstance(stage, Stage) else str(stage)) in self._quick_stages for stage in record.stages
+        )
+
+    def _admit(self, record: TaskRecord, payload: Dict[str, Any], priority: int | None) -> TaskRecord:
+        quick = self._is_quick(record)
+        record.priority = priority if priority is not None else (self._quick_priority if quick else 0)
+        record.status = TaskStatus.pending
+        self._track_progress(record, pinned_after=0)
         with self._lock:
-            self._running[task_id]["future"] = future
+            self._tasks[record.id] = record
+            self._running[record.id] = {"cancel_event": Event(), "payload": payload}
+            self._persist_locked(record)
+        self._admission.submit(self._resolve_and_schedule, record, payload, quick)
         return record
 
-    def list(self) -> List[TaskRecord]:
+    def _resolve_and_schedule(self, record: TaskRecord, payload: Dict[str, Any], quick: bool) -> None:
+        try:
+            keys = [] if quick else list(self._resource_resolver(record))
+        except Exception:  # pragma: no cover - 解析器异常时不参与互斥
+            logger.exception("任务 %s 资源键解析失败", record.id)
+            keys = []
+        with self._lock:
+            record.resource_keys = keys
+            if record.status != TaskStatus.pending or record.id not in self._tasks:
+                self._running.pop(record.id, None)
+                return
+            if self._queue is None:
+                self._pending.append(record)
+                launches = self._dispatch_locked()
+            else:
+                self._running.pop(record.id, None)
+                launches = []
+            self._persist_locked(record, *launches, *self._pending)
+        if self._queue is not None:
+            self._queue.enqueue(
+                record.id,
+                {**payload, "priority": record.priority, "resource_keys": keys, "resource_limit": self._resource_limit},
+            )
+            if record.abort_requested:  # 入队前已被终止
+                self._queue.request_abort(record.id)
+            logger.debug("任务 %s 已写入持久化队列，资源键=%s", record.id, keys)
+            return
+        logger.debug("任务 %s 进入调度队列，优先级=%d，资源键=%s", record.id, record.priority, keys)
+        self._launch(launches)
+
+    def _dispatch_locked(self) -> List[TaskRecord]:
+        """按优先级挑选可运行的任务并占用资源，被占用资源阻塞的任务不影响后续任务。"""
+
+        self._pending.sort(key=lambda item: (-item.priority, item.created_at))
+        heavy_running = sum(1 for quick in self._active.values() if not quick)
+        quick_running = len(self._active) - heavy_running
+        launches: List[TaskRecord] = []
+        remaining: List[TaskRecord] = []
+        for record in self._pending:
+            if record.status != TaskStatus.pending:
+                continue
+            quick = self._is_quick(record)
+            if quick:
+                runnable = quick_running < self._quick_concurrency
+            else:
+                runnable = heavy_running < self._max_concurrent and all(
+                    self._resource_load.get(key, 0) < self._resource_limit for key in record.resource_keys
+                )
+            if not runnable:
+                remaining.append(record)
+                continue
+            if quick:
+                quick_running += 1
+            else:
+                heavy_running += 1
+            for key in record.resource_keys:
+                self._resource_load[key] = self._resource_load.get(key, 0) + 1
+            self._active[record.id] = quick
+            record.status = TaskStatus.running
+            record.queue_position = None
+            record.updated_at = _utcnow()
+            launches.append(record)
+        self._pending = remaining
+        for position, record in enumerate(remaining, start=1):
+            record.queue_position = position
+        return launches
+
+    def _launch(self, records: List[TaskRecord]) -> None:
+        for record in records:
+            with self._lock:
+                entry = self._running.setdefault(record.id, {"cancel_event": Event(), "payload": {}})
+            payload = entry.get("payload", {})
+            logger.debug("任务 %s 开始调度执行", record.id)
+            if record.kind == "batch":
+                future = self._executor.submit(
+                    self._run_batch_task,
+                    record,
+                    entry["cancel_event"],
+                    payload.get("max_parallel"),
+                    payload.get("per_cloudtower_limit"),
+                )
+            else:
+                future = self._executor.submit(self._run_task, record, entry["cancel_event"])
+            entry["future"] = future
+
+    def _finish_and_dispatch(self, record: TaskRecord) -> None:
+        """释放任务占用的槽位与资源，并调度后续排队任务。"""
+
         with self._lock:
-            return list(self._tasks.values())
+            self._running.pop(record.id, None)
+            if self._active.pop(record.id, None) is not None:
+                for key in record.resource_keys:
+                    remaining = self._resource_load.get(key, 0) - 1
+                    if remaining > 0:
+                        self._resource_load[key] = remaining
+                    else:
+                        self._resource_load.pop(key, None)
+            launches = self._dispatch_locked()
+            if launches:
+                self._persist_locked(*launches, *self._pending)
+        self._launch(launches)
+
+    def _drop_pending_locked(self, record: TaskRecord) -> None:
+        if record in self._pending:
+            self._pending.remove(record)
+            for position, item in enumerate(self._pending, start=1):
+                item.queue_position = position
+            if self._pending:
+                self._persist_locked(*self._pending)
+        record.queue_position = None
+
+    def list(self) -> List[TaskRecord]:
+        """返回全部任务的只读快照，不加锁、不访问数据库，可直接在事件循环中调用。"""
+
+        snapshots = self._snapshots
+        foreign = self._foreign
+        # 多个 uvicorn worker 共用存档时，补充其他进程创建的任务（写线程定期刷新）
+        return [*snapshots.values(), *(record for task_id, record in foreign.items() if task_id not in snapshots)]
 
     def get(self, task_id: str) -> TaskRecord | None:
+        """返回任务的只读快照；本进程未知的任务才回退到数据库读取。"""
+
+        record = self.get_cached(task_id)
+        return record if record is not None else self._load_foreign(task_id)
+
+    def get_cached(self, task_id: str) -> TaskRecord | None:
+        """只查内存快照（含已加载的其他进程任务），不访问数据库，可直接在事件循环中调用。"""
+
+        return self._snapshots.get(task_id) or self._foreign.get(task_id)
+
+    def progress(
+        self, task_id: str, *, after: int = 0, limit: int = 200
+    ) -> Tuple[List[Dict[str, Any]], int] | None:
+        """返回序号大于 ``after`` 的至多 ``limit`` 条进度消息及当前最大序号；任务不存在时返回 None。"""
+
         with self._lock:
-            return self._tasks.get(task_id)
+            record = self._tasks.get(task_id)
+            if record is not None:
+                last_seq = last_progress_seq(record)
+                messages = record.progress_messages
+                complete = not isinstance(messages, ProgressBuffer) or messages.complete_after(after)
+                tail = [dict(item) for item in _progress_since(record, after)]
+                if complete:
+                    return tail[:limit], last_seq
+        if record is not None:
+            # 游标之后有消息已从内存淘汰：先从存档读取（淘汰的消息必定已落盘），再用内存补足
+            loaded = self._store.load_progress(task_id, after=after, limit=limit)
+            items = loaded[0] if loaded else []
+            for item in items:
+                item["at"] = _parse_datetime(item.get("at"))
+            reached = items[-1]["seq"] if items else after
+            items.extend(item for item in tail if item["seq"] > reached)
+            return items[:limit], last_seq
+        # 其他 uvicorn worker 创建的任务直接按序号索引查询存档
+        loaded = self._store.load_progress(task_id, after=after, limit=limit)
+        if loaded is None:
+            return None
+        items, last_seq = loaded
+        for item in items:
+            item["at"] = _parse_datetime(item.get("at"))
+        return items, last_seq
+
+    def _load_foreign(self, task_id: str) -> TaskRecord | None:
+        payload = self._store.load(task_id)
+        if payload is None:
+            return None
+        payload.pop("_owner", None)
+        return _deserialize_task(payload)
+
+    def _refresh_foreign(self) -> None:
+        """按 ``updated_at`` 重新加载其他 worker 创建或更新过的任务，在写线程中执行。"""
+
+        snapshots = self._snapshots
+        stamps = {task_id: stamp for task_id, stamp in self._store.task_stamps().items() if task_id not in snapshots}
+        foreign: Dict[str, TaskRecord] = {}
+        for task_id, stamp in stamps.items():
+            cached = self._foreign.get(task_id)
+            if cached is None or self._foreign_stamps.get(task_id) != stamp:
+                cached = self._load_foreign(task_id)
+            if cached is not None:
+                foreign[task_id] = cached
+        self._foreign_stamps = stamps
+        self._foreign = foreign
 
     def delete(self, task_id: str) -> bool:
-        with self._lock:
-            existed = task_id in self._tasks
+        with self._flush_lock:  # 避免写线程在删除后重新写入该任务
+            with self._lock:
+                existed = task_id in self._tasks
+                if existed:
+                    record = self._tasks.pop(task_id)
+                    self._drop_pending_locked(record)
+                    self._running.pop(task_id, None)
+                    self._persisted.pop(task_id, None)
+                    self._published.pop(task_id, None)
+                    self._dirty.pop(task_id, None)
+                    self._snapshots = {key: value for key, value in self._snapshots.items() if key != task_id}
             if existed:
-                del self._tasks[task_id]
-                self._running.pop(task_id, None)
-                self._persist_locked()
+                self._store.delete(task_id)
+                self.events.publish("deleted", task_id, {"id": task_id})
         if existed:
             logger.info("删除任务记录: %s", task_id)
         return existed
@@ -256,42 +782,52 @@ class TaskManager:
             if not record:
                 return None, False
             if record.status not in {TaskStatus.pending, TaskStatus.running, TaskStatus.aborted}:
-                return record, False
+                return self._snapshots.get(task_id, record), False
             if record.status == TaskStatus.aborted:
-                return record, False
+                return self._snapshots.get(task_id, record), False
             stage = record.current_stage
             timestamp = _utcnow()
             self._mark_aborted_locked(record, stage, reason_text, timestamp)
-            self._persist_locked()
+            self._drop_pending_locked(record)
+            self._persist_locked(record)
             running_entry = self._running.get(task_id)
+            if task_id not in self._active:  # 尚未调度的任务没有执行线程需要通知
+                self._running.pop(task_id, None)
             if running_entry:
                 cancel_event = running_entry.get("cancel_event")
                 future = running_entry.get("future")
+            snapshot = self._snapshots.get(task_id, record)
         if cancel_event:
             cancel_event.set()
         if future and not future.done():
             future.cancel()
+        if self._queue is not None:
+            self._queue.request_abort(task_id)
         logger.info("任务 %s 已收到终止请求: %s", task_id, reason_text)
-        return record, True
+        return snapshot, True
 
     def _load_persisted_tasks(self) -> None:
-        if not self._storage_path.exists():
-            return
-        try:
-            with self._storage_path.open("r", encoding="utf-8") as fh:
-                raw_tasks = json.load(fh)
-        except (OSError, json.JSONDecodeError) as exc:
-            logger.warning("加载任务存档异常，已跳过历史任务: %s", exc)
-            return
-        dirty = False
+        legacy = self._legacy_path
+        if legacy is not None and legacy.exists() and self._store.is_empty():
+            import_legacy_json(self._store, legacy)
+        queued_ids = set(self._queue.active_task_ids()) if self._queue is not None else set()
         with self._lock:
-            for item in raw_tasks or []:
+            for item in self._store.load_all():
+                owner = item.pop("_owner", None)
                 try:
                     record = _deserialize_task(item)
                 except Exception:  # pragma: no cover - unexpected corrupt record
-                    logger.exception("跳过损坏的任务记录: %s", item)
+                    logger.exception("跳过损坏的任务记录: %s", item.get("id"))
                     continue
-                if record.status in {TaskStatus.running, TaskStatus.pending}:
+                self._tasks[record.id] = record
+                self._track_progress(record, pinned_after=last_progress_seq(record))
+                self._persisted[record.id] = (len(record.stage_history), last_progress_seq(record))
+                self._published[record.id] = self._persisted[record.id]
+                if (
+                    record.status in {TaskStatus.running, TaskStatus.pending}
+                    and record.id not in queued_ids
+                    and not _owner_alive(owner)
+                ):
                     record.status = TaskStatus.failed
                     record.error = "服务重启时中断"
                     record.updated_at = _utcnow()
@@ -302,18 +838,104 @@ class TaskManager:
                             "at": record.updated_at,
                         }
                     )
-                    dirty = True
-                self._tasks[record.id] = record
-            if dirty:
-                self._persist_locked()
+                    self._persist_locked(record)
+            self._snapshots = {task_id: _freeze_task(record) for task_id, record in self._tasks.items()}
 
-    def _persist_locked(self) -> None:
-        try:
-            payload = [serialize_task(task) for task in self._tasks.values()]
-            with self._storage_path.open("w", encoding="utf-8") as fh:
-                json.dump(payload, fh, ensure_ascii=False, indent=2)
-        except Exception:  # pragma: no cover - filesystem interaction
-            logger.exception("写入任务存档失败: %s", self._storage_path)
+    def _track_progress(self, record: TaskRecord, *, pinned_after: int) -> None:
+        """为任务的进度消息套用本管理器的保留限额，序号不超过 ``pinned_after`` 的视为已落盘。"""
+
+        messages = record.progress_messages
+        buffer = ProgressBuffer(retention=self._progress_retention, spill=None, pinned_after=pinned_after)
+        buffer.last_seq = last_progress_seq(record)
+        buffer.extend(messages)
+        record.progress_messages = buffer
+
+    def _persist_locked(self, *records: TaskRecord) -> None:
+        """登记待持久化的任务，由后台写线程合并写入，调用方永远不在磁盘 I/O 上等待。
+
+        未指定任务时登记全部任务；终态任务或积压条目达到阈值时立即唤醒写线程。
+        """
+
+        targets = records or tuple(self._tasks.values())
+        # 只替换已有键的值不改变字典大小，无锁读取方遍历时不受影响，无需复制；
+        # 出现新任务时才复制后整体替换
+        snapshots = self._snapshots
+        if any(record.id in self._tasks and record.id not in snapshots for record in targets):
+            snapshots = dict(snapshots)
+        for record in targets:
+            record.version += 1
+            self._dirty[record.id] = record
+            self._publish_locked(record)
+            if record.id in self._tasks:
+                snapshots[record.id] = _freeze_task(record)
+        self._snapshots = snapshots
+        self._dirty_updates += len(targets)
+        if self._dirty_updates >= self._flush_threshold or any(
+            record.status in _TERMINAL_STATUSES for record in targets
+        ):
+            self._flush_wakeup.set()
+
+    def _publish_locked(self, record: TaskRecord) -> None:
+        """向实时流推送任务摘要及新增的阶段事件、进度消息（发布方不等待任何客户端）。"""
+
+        start = self._published.get(record.id, (0, 0))
+        payload = serialize_task(record, history_from=start)
+        self._published[record.id] = (len(record.stage_history), last_progress_seq(record))
+        stage_events = payload.pop("stage_history")
+        progress = payload.pop("progress_messages")
+        for index, item in enumerate(stage_events, start=start[0]):
+            # index 为该事件在阶段历史中的位置，客户端据此去重或发现漏收
+            self.events.publish("stage", record.id, {"task_id": record.id, "index": index, **item})
+        after = start[1]
+        for item in progress:
+            # after 为该消息之前的推送位置，客户端据此判断是否漏收（gauge 被替换时序号会跳跃）
+            self.events.publish("progress", record.id, {"task_id": record.id, "after": after, **item})
+            after = item["seq"]
+        payload["progress_count"] = len(record.progress_messages)  # 内存中保留的条数
+        payload["last_progress_seq"] = last_progress_seq(record)
+        payload["stage_event_count"] = len(record.stage_history)
+        self.events.publish("task", record.id, payload)
+
+    def _flusher_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._flush_wakeup.wait(self._flush_interval)
+            self._flush_wakeup.clear()
+            try:
+                self.flush()
+                self._refresh_foreign()
+            except Exception:  # pragma: no cover - 下个周期重试
+                logger.exception("写入任务存档失败: %s", self._store.path)
+
+    def flush(self) -> int:
+        """把登记的任务增量写入存档（单个事务），返回写入的任务数量。"""
+
+        with self._flush_lock:
+            with self._lock:
+                dirty = [record for record in self._dirty.values() if record.id in self._tasks]
+                self._dirty.clear()
+                self._dirty_updates = 0
+                batch = []
+                counts: Dict[str, Tuple[int, int]] = {}
+                for record in dirty:
+                    start = self._persisted.get(record.id, (0, 0))
+                    payload = serialize_task(record, history_from=start)
+                    batch.append((payload, self._owner, payload["stage_history"], payload["progress_messages"]))
+                    counts[record.id] = (len(record.stage_history), last_progress_seq(record))
+            if not batch:
+                return 0
+            try:
+                self._store.save_many(batch)
+            except Exception:
+                with self._lock:  # 写入失败时重新登记，等待下次重试
+                    for record in dirty:
+                        self._dirty.setdefault(record.id, record)
+                raise
+            with self._lock:
+                self._persisted.update(counts)
+                for record in dirty:  # 已落盘的消息才允许从内存淘汰
+                    if isinstance(record.progress_messages, ProgressBuffer):
+                        record.progress_messages.pin(counts[record.id][1])
+        return len(batch)
 
     def _mark_aborted_locked(
         self,
@@ -342,75 +964,204 @@ class TaskManager:
             )
         record.error = None
 
-    def _run_task(self, record: TaskRecord, cancel_event: Event) -> None:
-        logger.info("任务 %s 开始执行，阶段=%s", record.id, [stage.value for stage in record.stages])
-
-        def _append_progress(event: Dict[str, Any]) -> None:
-            """追加阶段日志，保持时间戳一致。"""
+    @staticmethod
+    def _append_progress_locked(record: TaskRecord, event: Dict[str, Any]) -> None:
+        """在持有锁的情况下追加进度消息，分配任务内递增的序号，时间戳统一转换为 datetime。"""
 
-            timestamp = event.get("at", _utcnow())
-            safe_event = {
+        timestamp = _parse_datetime(event.get("at")) or _utcnow()
+        record.progress_messages.append(
+            {
+                "seq": _next_progress_seq(record),
                 "message": event.get("message"),
                 "stage": event.get("stage"),
                 "level": event.get("level", "info"),
                 "at": timestamp,
                 "extra": event.get("extra"),
+                "gauge": event.get("gauge"),  # 同一 gauge 的新值替换旧值（ProgressBuffer 负责）
+            }
+        )
+        record.updated_at = timestamp
+
+    @staticmethod
+    def _apply_stage_event_locked(
+        record: TaskRecord,
+        event: str,
+        stage: str,
+        completed_stages: List[str] | None,
+        timestamp: datetime,
+    ) -> None:
+        if event == "start":
+            record.current_stage = stage
+        elif event == "complete":
+            if completed_stages is not None:
+                record.completed_stages = list(completed_stages)
+            elif stage not in record.completed_stages:
+                record.completed_stages.append(stage)
+            if record.total_stages and len(record.completed_stages) >= record.total_stages:
+                record.current_stage = None
+        record.stage_history.append(
+            {
+                "event": event,
+                "stage": stage,
+                "at": timestamp,
             }
+        )
+        record.updated_at = timestamp
+
+    def _coordinator_loop(self) -> None:
+        logger.info("任务协调线程启动，队列=%s", self._queue.path)
+        while not self._stop_event.is_set():
+            try:
+                self.sync_queue()
+            except Exception:  # pragma: no cover - 数据库暂不可用时下个周期重试
+                logger.exception("同步任务队列失败")
+            self._stop_event.wait(self._poll_interval)
+
+    def sync_queue(self) -> int:
+        """拉取队列事件并应用到任务记录，返回处理的事件数量。"""
+
+        if self._queue is None:
+            return 0
+        with self._sync_lock:
+            self._queue.expire_stale(self._lease_timeout)
             with self._lock:
-                record.progress_messages.append(safe_event)
-                record.updated_at = timestamp
-                self._persist_locked()
+                owned = list(self._tasks)
+            # 同一队列可能由多个 Web 进程共用，只读取并确认本进程持有的任务事件
+            events = self._queue.fetch_events(task_ids=owned)
+            positions = self._queue.queued_positions()
+            with self._lock:
+                dirty: Dict[str, TaskRecord] = {}
+                for queue_event in events:
+                    record = self._tasks.get(queue_event.task_id)
+                    if record is not None:
+                        self._apply_queue_event_locked(record, queue_event)
+                        dirty[record.id] = record
+                for record in self._tasks.values():
+                    position = positions.get(record.id) if record.status == TaskStatus.pending else None
+                    if record.queue_position != position:
+                        record.queue_position = position
+                        dirty[record.id] = record
+                if dirty:
+                    self._persist_locked(*dirty.values())
+            if events:
+                self._queue.acknowledge(events[-1].seq, task_ids=owned)
+            self._queue.purge_finished_events(_ORPHAN_EVENT_RETENTION)
+        return len(events)
 
-        def _ensure_not_aborted(stage: Stage | None = None) -> None:
-            if cancel_event.is_set():
-                raise TaskAbortedError(stage.value if stage else record.current_stage)
+    def _apply_queue_event_locked(self, record: TaskRecord, queue_event: QueueEvent) -> None:
+        data = queue_event.data
+        timestamp = _parse_datetime(data.get("at")) or _utcnow()
+        if queue_event.kind == "claimed":
+            if record.status == TaskStatus.pending:
+                record.status = TaskStatus.running
+            self._append_progress_locked(
+                record,
+                {
+                    "message": f"任务已由工作者 {data.get('worker_id')} 认领",
+                    "at": timestamp,
+                    "extra": {"worker_id": data.get("worker_id")},
+                },
+            )
+        elif queue_event.kind == "stage":
+            self._apply_stage_event_locked(record, data.get("event"), data.get("stage"), data.get("completed_stages"), timestamp)
+        elif queue_event.kind == "progress":
+            self._append_progress_locked(record, data)
+        elif queue_event.kind == "finished":
+            self._apply_finished_locked(record, data, timestamp)
 
-        def progress_callback(event: str, stage: Stage, run_ctx) -> None:
-            timestamp = _utcnow()
+    def _apply_finished_locked(self, record: TaskRecord, data: Dict[str, Any], timestamp: datetime) -> None:
+        status = data.get("status")
+        result = data.get("result") or {}
+        if status == TaskStatus.aborted.value or record.status == TaskStatus.aborted:
+            if record.status != TaskStatus.aborted:
+                self._mark_aborted_locked(record, record.current_stage, record.abort_reason, timestamp)
+            return
+        if record.kind == "batch":
+            if result.get("batch"):
+                record.summary = {"batch": result["batch"]}
+        elif result:
+            if result.get("options"):
+                record.effective_options = EffectiveRunOptions(**result["options"])
+            record.summary = result.get("summary", {})
+            record.completed_stages = list(result.get("completed_stages", record.completed_stages))
+        if status == TaskStatus.done.value:
+            record.status = TaskStatus.done
+            record.current_stage = None
+        else:
+            record.status = TaskStatus.failed
+            record.error = data.get("error")
+            if record.current_stage:
+                record.stage_history.append({"event": "error", "stage": record.current_stage, "at": timestamp})
+        record.updated_at = timestamp
+        logger.info("任务 %s 由工作者执行结束，状态=%s", record.id, record.status.value)
+
+    def _process_resources(self) -> Tuple[ProcessPoolExecutor, Any]:
+        """惰性创建子进程池与跨进程通信管理器（spawn，避免 fork 带锁状态）。"""
+
+        with self._lock:
+            if self._process_pool is None:
+                ctx = multiprocessing.get_context("spawn")
+                self._ipc_manager = ctx.Manager()
+                self._process_pool = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=ctx)
+            return self._process_pool, self._ipc_manager
+
+    def _run_task(self, record: TaskRecord, cancel_event: Event) -> None:
+        """在子进程中执行工作流，当前线程只负责转发终止信号与应用进度事件。
+
+        解析规划表、哈希校验等 CPU 密集操作与日志重配置都留在子进程，
+        不再与 API 服务争用 GIL。
+        """
+
+        logger.info("任务 %s 开始执行，阶段=%s", record.id, [stage.value for stage in record.stages])
+        payload = {
+            "kind": "run",
+            "stages": [stage.value for stage in record.stages],
+            "options": record.requested_options.to_dict(),
+        }
+        if record.plan_files:
+            payload["plan_file"] = record.plan_files[0]
+
+        def _apply(kind: str, data: Dict[str, Any]) -> None:
             with self._lock:
-                if event == "start":
-                    record.current_stage = stage.value
-                elif event == "complete":
-                    if run_ctx and getattr(run_ctx, "completed_stages", None) is not None:
-                        record.completed_stages = list(run_ctx.completed_stages)
-                    elif stage.value not in record.completed_stages:
-                        record.completed_stages.append(stage.value)
-                    if record.total_stages and len(record.completed_stages) >= record.total_stages:
-                        record.current_stage = None
-                record.stage_history.append(
-                    {
-                        "event": event,
-                        "stage": stage.value,
-                        "at": timestamp,
-                    }
-                )
-                record.updated_at = timestamp
-                self._persist_locked()
-            if run_ctx and isinstance(run_ctx, RunContext):
-                sink = run_ctx.extra.get("progress_log_sink")
-                if not sink:
-                    run_ctx.extra["progress_log_sink"] = _append_progress
-            _ensure_not_aborted(stage)
+                if kind == "stage":
+                    timestamp = _parse_datetime(data.get("at")) or _utcnow()
+                    self._apply_stage_event_locked(record, data.get("event"), data.get("stage"), data.get("completed_stages"), timestamp)
+                elif kind == "progress":
+                    self._append_progress_locked(record, data)
+                self._persist_locked(record)
 
         try:
-            _ensure_not_aborted()
-            result = execute_run(
-                record.stages,
-                record.requested_options,
-                progress_callback=progress_callback,
-                abort_signal=cancel_event,
-            )
+            if cancel_event.is_set():
+                raise TaskAbortedError(record.current_stage)
+            pool, ipc = self._process_resources()
+            events = ipc.Queue()
+            abort_event = ipc.Event()
+            future = pool.submit(run_payload_in_process, payload, events, abort_event, self._run_fn)
+            with self._lock:
+                if record.id in self._running:
+                    self._running[record.id]["process_future"] = future
+            while True:
+                if cancel_event.is_set() and not abort_event.is_set():
+                    abort_event.set()
+                try:
+                    kind, data = events.get(timeout=0.2)
+                except queue_module.Empty:
+                    if future.done():
+                        break
+                    continue
+                _apply(kind, data)
+            result = future.result()
             if cancel_event.is_set() or record.abort_requested:
                 raise TaskAbortedError(record.current_stage)
         except TaskAbortedError as exc:
             with self._lock:
                 self._mark_aborted_locked(record, exc.stage, record.abort_reason)
-                self._persist_locked()
+                self._persist_locked(record)
             logger.info("任务 %s 在阶段 %s 被终止", record.id, exc.stage or "未知阶段")
         except AbortRequestedError:
             with self._lock:
                 self._mark_aborted_locked(record, record.current_stage, record.abort_reason)
-                self._persist_locked()
+                self._persist_locked(record)
             logger.info("任务 %s 在执行过程中检测到终止信号", record.id)
         except Exception as exc:  # pragma: no cover - surfaced to API caller
             with self._lock:
@@ -426,27 +1177,135 @@ class TaskManager:
                             "at": timestamp,
                         }
                     )
-                self._persist_locked()
+                self._persist_locked(record)
             logger.exception("任务 %s 执行失败: %s", record.id, exc)
         else:
+            finished_at = _parse_datetime(result.get("finished_at")) or _utcnow()
+            started_at = _parse_datetime(result.get("started_at")) or finished_at
             with self._lock:
                 record.status = TaskStatus.done
-                record.effective_options = result.options
-                record.summary = result.summary
-                record.completed_stages = result.completed_stages
-                record.updated_at = result.finished_at
-                self._persist_locked()
-            duration = (result.finished_at - result.started_at).total_seconds()
+                record.effective_options = EffectiveRunOptions(**result["options"])
+                record.summary = result.get("summary", {})
+                record.completed_stages = list(result.get("completed_stages", []))
+                record.updated_at = finished_at
+                self._persist_locked(record)
             logger.info(
                 "任务 %s 执行完成，用时 %.2fs，完成阶段=%s",
                 record.id,
-                duration,
-                result.completed_stages,
+                (finished_at - started_at).total_seconds(),
+                record.completed_stages,
             )
         finally:
+            self._finish_and_dispatch(record)
+
+    def _run_batch_task(
+        self,
+        record: TaskRecord,
+        cancel_event: Event,
+        max_parallel: int | None,
+        per_cloudtower_limit: int | None,
+    ) -> None:
+        logger.info("批量任务 %s 开始执行，规划表=%d 份", record.id, len(record.plan_files))
+
+        def _on_event(event: str, item, outcome: Dict[str, Any] | None) -> None:
+            timestamp = _utcnow()
             with self._lock:
-                self._running.pop(record.id, None)
+                self._append_progress_locked(record, {**describe_batch_event(event, item, outcome), "at": timestamp})
+                self._persist_locked(record)
+
+        try:
+            batch = run_batch(
+                record.plan_files,
+                record.stages,
+                record.requested_options,
+                max_parallel=max_parallel,
+                per_cloudtower_limit=per_cloudtower_limit,
+                event_callback=_on_event,
+                abort_signal=cancel_event,
+            )
+        except Exception as exc:  # pragma: no cover - surfaced to API caller
+            with self._lock:
+                record.status = TaskStatus.failed
+                record.error = str(exc)
+                record.updated_at = _utcnow()
+                self._persist_locked(record)
+            logger.exception("批量任务 %s 执行失败: %s", record.id, exc)
+        else:
+            payload = batch.to_dict()
+            with self._lock:
+                record.summary = {"batch": payload}
+                record.updated_at = batch.finished_at
+                if record.status != TaskStatus.aborted:
+                    if batch.ok:
+                        record.status = TaskStatus.done
+                    else:
+                        record.status = TaskStatus.failed
+                        record.error = f"{payload['failed']}/{payload['total']} 个集群部署失败"
+                self._persist_locked(record)
+            logger.info("批量任务 %s 结束：成功 %d / %d", record.id, payload["succeeded"], payload["total"])
+        finally:
+            self._finish_and_dispatch(record)
+
+
+def resolve_scheduler_settings(cfg: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """读取配置 ``web.scheduler`` 段，返回 TaskManager 的调度参数。"""
+
+    data = cfg if isinstance(cfg, dict) else load_config()
+    web_cfg = data.get("web", {}) if isinstance(data, dict) else {}
+    section = web_cfg.get("scheduler", {}) if isinstance(web_cfg, dict) else {}
+    if not isinstance(section, dict):
+        section = {}
+    quick_stages = section.get("quick_stages") or [Stage.prepare.value]
+    return {
+        "max_workers": max(1, int(section.get("max_concurrent", 4) or 4)),
+        "quick_concurrency": max(0, int(section.get("quick_concurrency", 2) or 0)),
+        "quick_stages": [str(item) for item in quick_stages],
+        "quick_priority": int(section.get("quick_priority", 10) or 0),
+        "resource_limit": max(1, int(section.get("resource_limit", 1) or 1)),
+        "flush_interval": float(section.get("flush_interval", 1.0) or 1.0),
+        "flush_threshold": max(1, int(section.get("flush_threshold", 200) or 200)),
+    }
+
+
+def _build_task_manager() -> TaskManager:
+    cfg = load_config()
+    scheduler = resolve_scheduler_settings(cfg)
+    scheduler["events"] = ProgressStreamHub(**resolve_stream_settings(cfg))
+    scheduler["progress_retention"] = resolve_progress_retention(cfg)
+    scheduler["payloads"] = resolve_progress_payload_store(cfg)
+    settings = resolve_queue_settings(cfg)
+    if not settings["enabled"]:
+        return TaskManager(**scheduler)
+    logger.info("启用协调者模式，任务队列=%s", settings["path"])
+    return TaskManager(
+        queue=DurableTaskQueue(settings["path"]),
+        poll_interval=settings["poll_interval"],
+        lease_timeout=settings["lease_timeout"],
+        **scheduler,
+    )
+
+
+_task_manager: TaskManager | None = None
+_task_manager_lock = Lock()
+
+
+def get_task_manager() -> TaskManager:
+    """进程内共享的任务管理器，首次调用时才创建任务库与后台线程，导入本模块没有副作用。"""
+
+    global _task_manager
+    if _task_manager is None:
+        with _task_manager_lock:
+            if _task_manager is None:
+                _task_manager = _build_task_manager()
+    return _task_manager
+
 
+def shutdown_task_manager() -> None:
+    """关闭已创建的任务管理器；尚未创建时不做任何事。"""
 
-task_manager = TaskManager()
+    global _task_manager
+    with _task_manager_lock:
+        manager, _task_manager = _task_manager, None
+    if manager is not None:
+        manager.shutdown()
 
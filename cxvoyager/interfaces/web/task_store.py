@@ -0,0 +1,293 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+# This file is part of CXVoyager.
+#
+# CXVoyager is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# CXVoyager is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with CXVoyager.  If not, see <https://www.gnu.org/licenses/>.
+
+"""SQLite task store for the web API.
+
+任务主体、阶段事件与进度消息分表保存，写入均为单行 upsert / 追加，
+不再随历史长度整体重写；WAL 模式允许多个 uvicorn worker 同时读写。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'run',
+    owner TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at);
+CREATE TABLE IF NOT EXISTS stage_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    event TEXT,
+    stage TEXT,
+    at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_stage_events_task ON stage_events (task_id, id);
+CREATE TABLE IF NOT EXISTS progress_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    seq INTEGER,
+    message TEXT,
+    stage TEXT,
+    level TEXT,
+    at TEXT,
+    extra TEXT,
+    gauge TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_progress_task ON progress_messages (task_id, id);
+CREATE INDEX IF NOT EXISTS idx_progress_at ON progress_messages (at);
+CREATE INDEX IF NOT EXISTS idx_progress_seq ON progress_messages (task_id, seq);
+CREATE INDEX IF NOT EXISTS idx_progress_gauge ON progress_messages (task_id, gauge) WHERE gauge IS NOT NULL;
+"""
+
+_HISTORY_KEYS = ("stage_history", "progress_messages")
+
+
+class SqliteTaskStore:
+    """任务记录的增量持久化。
+
+    ``save`` 只写入任务主体与调用方给出的新增事件，调用方负责记录已持久化的条数。
+    单个连接由内部锁保护，可在线程池中共享。
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def save(
+        self,
+        payload: Mapping[str, Any],
+        *,
+        owner: str | None = None,
+        new_stage_events: Iterable[Mapping[str, Any]] = (),
+        new_progress: Iterable[Mapping[str, Any]] = (),
+    ) -> None:
+        """upsert 任务主体并追加新增的阶段事件与进度消息（``payload`` 为 ``serialize_task`` 结果）。"""
+
+        self.save_many([(payload, owner, new_stage_events, new_progress)])
+
+    def save_many(self, items: Iterable[tuple]) -> None:
+        """在同一事务中写入多条 ``(payload, owner, new_stage_events, new_progress)``，整体成功或整体回滚。"""
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for payload, owner, new_stage_events, new_progress in items:
+                    self._save_one(payload, owner, new_stage_events, new_progress)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _save_one(
+        self,
+        payload: Mapping[str, Any],
+        owner: str | None,
+        new_stage_events: Iterable[Mapping[str, Any]],
+        new_progress: Iterable[Mapping[str, Any]],
+    ) -> None:
+        body = {key: value for key, value in payload.items() if key not in _HISTORY_KEYS}
+        self._conn.execute(
+            """
+            INSERT INTO tasks (id, status, kind, owner, created_at, updated_at, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                status = excluded.status,
+                kind = excluded.kind,
+                owner = COALESCE(excluded.owner, tasks.owner),
+                updated_at = excluded.updated_at,
+                data = excluded.data
+            """,
+            (
+                body["id"],
+                body.get("status"),
+                body.get("kind") or "run",
+                owner,
+                body.get("created_at"),
+                body.get("updated_at"),
+                json.dumps(body, ensure_ascii=False, default=str),
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO stage_events (task_id, event, stage, at) VALUES (?, ?, ?, ?)",
+            [(body["id"], item.get("event"), item.get("stage"), item.get("at")) for item in new_stage_events],
+        )
+        new_progress = list(new_progress)
+        gauges = {item.get("gauge") for item in new_progress if item.get("gauge")}
+        # 仪表类消息只保留最新值：写入新值前删除同一 gauge 的旧行
+        self._conn.executemany(
+            "DELETE FROM progress_messages WHERE task_id = ? AND gauge = ?",
+            [(body["id"], gauge) for gauge in gauges],
+        )
+        self._conn.executemany(
+            "INSERT INTO progress_messages (task_id, seq, message, stage, level, at, extra, gauge)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    body["id"],
+                    item.get("seq"),
+                    item.get("message"),
+                    item.get("stage"),
+                    item.get("level", "info"),
+                    item.get("at"),
+                    json.dumps(item.get("extra"), ensure_ascii=False, default=str) if item.get("extra") is not None else None,
+                    item.get("gauge"),
+                )
+                for item in new_progress
+            ],
+        )
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for table, column in (("progress_messages", "task_id"), ("stage_events", "task_id"), ("tasks", "id")):
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (task_id,))
+            self._conn.execute("COMMIT")
+
+    def _assemble(self, row: sqlite3.Row) -> Dict[str, Any]:
+        payload = json.loads(row["data"])
+        payload["stage_history"] = [
+            {"event": item["event"], "stage": item["stage"], "at": item["at"]}
+            for item in self._conn.execute(
+                "SELECT event, stage, at FROM stage_events WHERE task_id = ? ORDER BY id", (row["id"],)
+            )
+        ]
+        payload["progress_messages"] = [
+            self._progress_row(item)
+            for item in self._conn.execute(
+                "SELECT seq, message, stage, level, at, extra, gauge FROM progress_messages WHERE task_id = ? ORDER BY id",
+                (row["id"],),
+            )
+        ]
+        payload["_owner"] = row["owner"]
+        return payload
+
+    @staticmethod
+    def _progress_row(item: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "seq": item["seq"],
+            "message": item["message"],
+            "stage": item["stage"],
+            "level": item["level"] or "info",
+            "at": item["at"],
+            "extra": json.loads(item["extra"]) if item["extra"] else None,
+            "gauge": item["gauge"],
+        }
+
+    def load_progress(
+        self, task_id: str, *, after: int = 0, limit: int = 200
+    ) -> Tuple[List[Dict[str, Any]], int] | None:
+        """按序号游标读取进度消息，返回 ``(消息列表, 当前最大序号)``；任务不存在时返回 None。"""
+
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is None:
+                return None
+            items = [
+                self._progress_row(item)
+                for item in self._conn.execute(
+                    "SELECT seq, message, stage, level, at, extra, gauge FROM progress_messages"
+                    " WHERE task_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (task_id, after, limit),
+                )
+            ]
+            last = self._conn.execute(
+                "SELECT MAX(seq) FROM progress_messages WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+            return items, int(last or 0)
+
+    def load(self, task_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            return self._assemble(row) if row else None
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM tasks ORDER BY created_at").fetchall()
+            return [self._assemble(row) for row in rows]
+
+    def task_stamps(self) -> Dict[str, str | None]:
+        """全部任务的 ``id -> updated_at``，用于判断其他进程的任务是否需要重新加载。"""
+
+        with self._lock:
+            return {
+                row["id"]: row["updated_at"]
+                for row in self._conn.execute("SELECT id, updated_at FROM tasks ORDER BY created_at")
+            }
+
+    def task_ids(self) -> List[str]:
+        with self._lock:
+            return [row["id"] for row in self._conn.execute("SELECT id FROM tasks ORDER BY created_at")]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is None
+
+
+def import_legacy_json(store: SqliteTaskStore, legacy_path: Path) -> int:
+    """把旧版 ``web_tasks.json`` 导入数据库，完成后将原文件重命名为 ``.migrated``。"""
+
+    try:
+        with legacy_path.open("r", encoding="utf-8") as fh:
+            raw_tasks = json.load(fh) or []
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning("读取旧版任务存档失败，已跳过迁移: %s", exc)
+        return 0
+    imported = 0
+    for item in raw_tasks:
+        if not isinstance(item, dict) or "id" not in item:
+            continue
+        store.save(
+            item,
+            new_stage_events=item.get("stage_history") or [],
+            new_progress=[
+                {**message, "seq": message.get("seq") or index}
+                for index, message in enumerate(item.get("progress_messages") or [], start=1)
+            ],
+        )
+        imported += 1
+    try:
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+    except OSError:  # pragma: no cover - filesystem interaction
+        logger.warning("旧版任务存档重命名失败: %s", legacy_path)
+    logger.info("已从 %s 迁移 %d 条任务记录", legacy_path, imported)
+    return imported
+
+
+__all__ = ["SqliteTaskStore", "import_legacy_json"]
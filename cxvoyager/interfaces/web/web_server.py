@@ -29,6 +29,7 @@ from fastapi.staticfiles import StaticFiles
 from cxvoyager.common.logging_config import setup_logging
 
 from .routers import deployment_routes
+from .task_scheduler import get_task_manager, shutdown_task_manager
 
 logger = logging.getLogger("cxvoyager.web")
 
@@ -87,6 +88,14 @@ def create_app() -> FastAPI:
 
     app.include_router(deployment_routes.router, prefix="/api")
 
+    @app.on_event("startup")
+    def open_task_store() -> None:  # pragma: no cover - server lifecycle
+        get_task_manager()
+
+    @app.on_event("shutdown")
+    def flush_task_store() -> None:  # pragma: no cover - server lifecycle
+        shutdown_task_manager()
+
     assets_dir = STATIC_ROOT / "assets"
     if assets_dir.exists():  # pragma: no cover - filesystem interaction
         app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
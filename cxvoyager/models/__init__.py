@@ -1,7 +1,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 """数据模型公共导出。"""
 
-from .planning_sheet_models import PlanModel, HostRow, MgmtInfo, VirtualNetworkRow
+from .planning_sheet_models import CompiledPlanDocument, PlanModel, HostRow, MgmtInfo, VirtualNetworkRow
 from .deployment_payload_models import (
     ClusterDeploymentPayload,
     ClusterDeployPayload,
@@ -26,6 +26,7 @@ from .deployment_payload_models import (
 )
 
 __all__ = [
+    "CompiledPlanDocument",
     "PlanModel",
     "HostRow",
     "MgmtInfo",
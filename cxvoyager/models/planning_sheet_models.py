@@ -16,8 +16,8 @@
 
 """规划表相关数据模型。"""
 from __future__ import annotations
-from typing import Dict, List, Optional
-from pydantic import BaseModel, IPvAnyAddress, Field
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, IPvAnyAddress, Field
 
 class VirtualNetworkRow(BaseModel):
     集群名称: str = Field(..., description="集群名称")
@@ -66,3 +66,28 @@ class PlanModel(BaseModel):
     storage_architecture: Optional[str] = None
     network_architecture: Optional[str] = None
 
+class CompiledPlanSection(BaseModel):
+    records: List[Dict[str, Any]] = Field(default_factory=list)
+
+class CompiledHostsSection(CompiledPlanSection):
+    extra: Dict[str, Any] = Field(default_factory=dict)
+
+class CompiledPlanBody(BaseModel):
+    """编译后规划的主体，结构与 ``parse_plan`` 的返回值一致（不含 ``_meta``）。"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    variables: Dict[str, Any]
+    tables: Dict[str, List[Dict[str, Any]]] = Field(default_factory=dict, description="主机表、业务网络表等按行读取的表格")
+    virtual_network: CompiledPlanSection = Field(default_factory=CompiledPlanSection)
+    hosts: CompiledHostsSection = Field(default_factory=CompiledHostsSection)
+    mgmt: CompiledPlanSection = Field(default_factory=CompiledPlanSection)
+    derived_network: Optional[Dict[str, Any]] = Field(None, alias="_derived_network")
+
+class CompiledPlanDocument(BaseModel):
+    """JSON 规划文件（``cxvoyager plan compile`` 输出）的外层结构。"""
+    format: Literal["cxvoyager-plan"]
+    version: int = Field(..., ge=1, description="格式版本，高于当前支持版本时拒绝加载")
+    compiled_at: Optional[str] = None
+    generator: Optional[str] = None
+    source: Dict[str, Any] = Field(default_factory=dict, description="来源规划表文件名、内容哈希等")
+    plan: CompiledPlanBody
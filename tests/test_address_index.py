@@ -0,0 +1,57 @@
+import random
+from ipaddress import ip_address, ip_network
+
+from cxvoyager.common.address_index import AddressIndex, plan_address_conflicts
+from cxvoyager.common.ip_utils import validate_cidrs
+from cxvoyager.core.validation.rules import validate_plan_model
+from cxvoyager.models.planning_sheet_models import HostRow, MgmtInfo, PlanModel
+
+
+def test_sweep_matches_pairwise_comparison():
+    rng = random.Random(7)
+    cidrs = [f"10.{rng.randrange(4)}.{rng.randrange(8)}.0/{rng.choice([16, 22, 24, 26])}" for _ in range(60)]
+    cidrs += ["fd00::/64", "fd00::/48", "bad-cidr"]
+    _, errors, overlaps = validate_cidrs(cidrs)
+
+    valid = [c for c in cidrs if c != "bad-cidr"]
+    nets = [ip_network(c, strict=False) for c in valid]
+    expected = [
+        f"CIDR重叠: {valid[i]} <-> {valid[j]}"
+        for i in range(len(nets))
+        for j in range(i + 1, len(nets))
+        if nets[i].overlaps(nets[j])
+    ]
+    assert errors == ["非法CIDR: bad-cidr"]
+    assert overlaps == expected
+
+    index = AddressIndex()
+    for cidr in valid:
+        index.add_network(cidr)
+    for _ in range(200):
+        ip = f"10.{rng.randrange(4)}.{rng.randrange(8)}.{rng.randrange(256)}"
+        hits = {entry.order for entry in index.containing(ip)}
+        assert hits == {i for i, net in enumerate(nets) if ip_address(ip) in net}
+
+
+def test_plan_conflicts_and_rules():
+    plan = PlanModel(
+        hosts=[
+            HostRow(集群名称="c", 集群VIP="10.0.0.10", SMTX主机名="n1", 管理地址="10.0.0.11", 带外地址="10.0.1.11"),
+            HostRow(集群名称="c", 集群VIP="10.0.0.10", SMTX主机名="n2", 管理地址="10.0.0.11"),
+            HostRow(集群名称="c", 集群VIP="10.0.0.10", SMTX主机名="n3", 管理地址="10.0.0.10"),
+        ],
+        mgmt=MgmtInfo(**{"Cloudtower IP": "10.0.1.11", "root密码": "x", "临时测试IP范围": {"start": "10.0.0.9", "end": "10.0.0.20"}}),
+    )
+    index = AddressIndex.from_plan(plan)
+    conflicts = plan_address_conflicts(index)
+    duplicates = {item["ip"]: item["roles"] for item in conflicts if item["type"] == "duplicate"}
+    assert duplicates == {
+        "10.0.0.11": ["mgmt:n1", "mgmt:n2"],
+        "10.0.1.11": ["bmc:n1", "component:cloudtower"],
+        "10.0.0.10": ["mgmt:n3", "cluster_vip"],
+    }
+    assert {item["ip"] for item in conflicts if item["type"] == "in_test_range"} == {"10.0.0.10", "10.0.0.11"}
+
+    report = validate_plan_model(plan)
+    assert "重复管理地址: {'10.0.0.11'}" in report["errors"]
+    assert "VIP 与 管理地址冲突: {'10.0.0.10'}" in report["errors"]
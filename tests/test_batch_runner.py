@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cxvoyager.core.deployment import batch_runner
+from cxvoyager.core.deployment.batch_runner import collect_plan_files, run_batch
+from cxvoyager.core.deployment.stage_manager import Stage
+
+
+def _fake_inspect(mapping):
+    def _inspect(plan_file):
+        return plan_file.stem, mapping[plan_file.stem]
+
+    return _inspect
+
+
+def test_run_batch_respects_per_cloudtower_limit(tmp_path, monkeypatch):
+    towers = {"a1": "10.0.0.1", "a2": "10.0.0.1", "b1": "10.0.0.2", "b2": "10.0.0.2"}
+    plans = []
+    for name in towers:
+        path = tmp_path / f"{name}.xlsx"
+        path.write_bytes(b"")
+        plans.append(path)
+    monkeypatch.setattr(batch_runner, "_inspect_plan", _fake_inspect(towers))
+
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+
+    def _runner(plan_file, stage_names, options, work_dir, log_level):
+        tower = towers[plan_file.rsplit("/", 1)[-1][:-5]]
+        with lock:
+            active[tower] = active.get(tower, 0) + 1
+            peak[tower] = max(peak.get(tower, 0), active[tower])
+        time.sleep(0.05)
+        with lock:
+            active[tower] -= 1
+        if plan_file.endswith("a2.xlsx"):
+            return {"status": "failed", "error": "boom", "duration": 0.05}
+        return {"status": "ok", "result": {}, "duration": 0.05}
+
+    events = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        result = run_batch(
+            plans,
+            [Stage.prepare],
+            max_parallel=4,
+            per_cloudtower_limit=1,
+            output_dir=tmp_path / "out",
+            executor=pool,
+            runner=_runner,
+            event_callback=lambda event, item, _: events.append((event, item.cluster_name)),
+        )
+
+    assert peak == {"10.0.0.1": 1, "10.0.0.2": 1}
+    assert [item.status for item in result.items] == ["ok", "failed", "ok", "ok"]
+    assert not result.ok
+    assert ("failed", "a2") in events
+    assert (tmp_path / "out" / batch_runner.BATCH_SUMMARY_FILE).exists()
+    assert result.items[0].work_dir.endswith("01-a1")
+
+
+def test_run_batch_inspects_plans_on_the_executor(tmp_path, monkeypatch):
+    towers = {"a1": "10.0.0.1", "b1": "10.0.0.2"}
+    plans = []
+    for name in towers:
+        path = tmp_path / f"{name}.xlsx"
+        path.write_bytes(b"")
+        plans.append(path)
+    inspected_on = []
+    fake = _fake_inspect(towers)
+
+    def _inspect(plan_file):
+        inspected_on.append(threading.current_thread())
+        return fake(plan_file)
+
+    monkeypatch.setattr(batch_runner, "_inspect_plan", _inspect)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        result = run_batch(
+            plans,
+            [Stage.prepare],
+            output_dir=tmp_path / "out",
+            executor=pool,
+            runner=lambda *args: {"status": "ok", "result": {}, "duration": 0.0},
+        )
+
+    assert result.ok
+    assert [item.cloudtower_ip for item in result.items] == ["10.0.0.1", "10.0.0.2"]
+    assert len(inspected_on) == 2
+    assert threading.current_thread() not in inspected_on
+
+
+def test_collect_plan_files_expands_dirs_and_globs(tmp_path):
+    plan_dir = tmp_path / "plans"
+    plan_dir.mkdir()
+    keyword_name = "-".join(batch_runner.PLAN_KEYWORDS) + "-A.xlsx"
+    (plan_dir / keyword_name).write_bytes(b"")
+    (plan_dir / "other.xlsx").write_bytes(b"")
+    (plan_dir / "~$lock.xlsx").write_bytes(b"")
+
+    from_dir = collect_plan_files([plan_dir])
+    assert [path.name for path in from_dir] == [keyword_name]
+
+    from_glob = collect_plan_files([str(plan_dir / "*.xlsx"), plan_dir / "other.xlsx"])
+    assert sorted(path.name for path in from_glob) == sorted([keyword_name, "other.xlsx"])
+
+
+def test_run_batch_item_pins_plan_and_isolates_artifacts(tmp_path, monkeypatch):
+    import json
+    from types import SimpleNamespace
+
+    from cxvoyager.core.deployment.handlers import attach_cluster
+    from cxvoyager.core.deployment.runtime_context import RunContext
+
+    plans = tmp_path / "plans"
+    plans.mkdir()
+    first, second = plans / "a.xlsx", plans / "b.xlsx"
+    first.write_bytes(b"")
+    second.write_bytes(b"")
+    calls = {}
+
+    def _execute_run(stages, options, *, plan_file, work_dir, artifact_dir, configure_logging):
+        calls.update(plan_file=plan_file, artifact_dir=artifact_dir)
+        return SimpleNamespace(to_dict=lambda: {})
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(batch_runner, "execute_run", _execute_run)
+    monkeypatch.setattr(batch_runner, "_configure_item_logging", lambda *args: None)
+    outcome = batch_runner.run_batch_item(str(second), ["attach_cluster"], {}, str(tmp_path / "out" / "02-b"))
+    assert outcome["status"] == "ok"
+    assert calls == {"plan_file": second, "artifact_dir": tmp_path / "out" / "02-b" / "artifacts"}
+    assert json.loads((tmp_path / "out" / "02-b" / batch_runner.BATCH_RESULT_FILE).read_text(encoding="utf-8"))["status"] == "ok"
+
+    # 未执行 prepare 的阶段同样按 plan_source 加载规划表，而不是目录中的第一份
+    loaded = []
+    monkeypatch.setattr(attach_cluster, "find_plan_file", lambda base_dir: first)
+    monkeypatch.setattr(attach_cluster, "parse_plan", lambda path: loaded.append(path) or {"path": str(path)})
+    monkeypatch.setattr(attach_cluster, "to_model", lambda parsed: SimpleNamespace(**parsed))
+    ctx = RunContext(work_dir=plans, extra={"plan_source": str(second)})
+    stage_logger = SimpleNamespace(info=lambda *a, **kw: None, warning=lambda *a, **kw: None)
+    plan_model, _ = attach_cluster._ensure_plan_for_attach(ctx, stage_logger)
+    assert loaded == [second] and plan_model.path == str(second)
@@ -407,3 +407,70 @@ def test_update_host_login_passwords_missing_paramiko(monkeypatch: pytest.Monkey
         "error": "missing paramiko",
     }
     assert any(level == "warning" for level, _ in logger.records)
+
+
+def test_create_business_networks_waits_on_all_jobs_together() -> None:
+    class DummyLogger:
+        def __init__(self) -> None:
+            self.records: list[tuple[str, str, Any]] = []
+
+        def info(self, message, progress_extra=None):
+            self.records.append(("info", message, progress_extra))
+
+        def warning(self, message, progress_extra=None):
+            self.records.append(("warning", message, progress_extra))
+
+        def debug(self, message, progress_extra=None):
+            self.records.append(("debug", message, progress_extra))
+
+    class JobClient:
+        def __init__(self) -> None:
+            self.posts: list[dict] = []
+            self.job_queries: list[str] = []
+
+        def post(self, path: str, payload: dict, headers: dict | None = None) -> dict:
+            self.posts.append(payload)
+            if payload["name"] == "direct":
+                return {"data": {"uuid": "vlan-direct"}}
+            if payload["name"] == "broken":
+                raise config_cluster.APIError("vlan conflict")
+            return {"data": {"job_id": f"job-{payload['name']}"}}
+
+        def get(self, path: str, headers: dict | None = None) -> dict:
+            job_id = path.rsplit("/", 1)[-1]
+            self.job_queries.append(job_id)
+            polls = self.job_queries.count(job_id)
+            if job_id == "job-slow" and polls < 2:
+                return {"data": {"job": {"state": "running"}}}
+            if job_id == "job-bad":
+                return {"data": {"job": {"state": "failed", "error": "vlan exists"}}}
+            return {"data": {"job": {"state": "done", "resources": {"x": {"uuid": f"{job_id}-uuid"}}}}}
+
+    payloads = [
+        {"name": name, "vlan_id": vlan, "vds_uuid": "vds-1"}
+        for name, vlan in (("direct", 10), ("slow", 11), ("bad", 12), ("broken", 13), ("fast", 14))
+    ]
+    client = JobClient()
+    results: list[dict[str, Any]] = []
+
+    outcomes = config_cluster._create_business_networks(
+        client=client,  # type: ignore[arg-type]
+        headers={},
+        vds_uuid="vds-1",
+        payloads=payloads,
+        stage_logger=DummyLogger(),
+        results=results,
+        cfg={"business_network": {"poll_interval": 0, "job_timeout": 5}},
+    )
+
+    assert [item["name"] for item in outcomes] == ["direct", "slow", "bad", "broken", "fast"]
+    statuses = {item["name"]: item["status"] for item in outcomes}
+    assert statuses == {"direct": "ok", "slow": "ok", "bad": "warning", "broken": "warning", "fast": "ok"}
+    assert outcomes[2]["error"] == "vlan exists"
+    assert "vlan conflict" in outcomes[3]["error"]
+    assert outcomes[1]["uuid"] == "job-slow-uuid"
+    assert len(client.posts) == 5
+    # 每轮轮询同时覆盖所有未完成任务，慢任务不会让其他任务重复等待
+    assert client.job_queries.count("job-slow") == 2
+    assert client.job_queries.count("job-fast") == 1
+    assert len(results) == 5
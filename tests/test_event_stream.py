@@ -0,0 +1,56 @@
+import asyncio
+
+from cxvoyager.core.deployment.deployment_executor import RunOptions
+from cxvoyager.core.deployment.stage_manager import Stage
+from cxvoyager.interfaces.web.event_stream import ProgressStreamHub
+from cxvoyager.interfaces.web.task_scheduler import TaskManager, TaskRecord
+
+
+def test_slow_subscriber_is_bounded_and_compacted():
+    hub = ProgressStreamHub(client_buffer=3)
+    subscriber = hub.subscribe()
+    for index in range(5):
+        hub.publish("task", "t1", {"updated": index})
+    for seq in range(1, 6):
+        hub.publish("progress", "t1", {"seq": seq})
+
+    events = subscriber.drain()
+    assert events[0].kind == "overflow" and events[0].data == {"dropped": 3}
+    assert [event.data.get("seq") for event in events[1:]] == [3, 4, 5]
+    assert hub.stats() == [{"task_id": None, "lag": 0, "dropped": 3}]
+
+
+def test_resume_from_last_event_id():
+    hub = ProgressStreamHub(replay_size=4)
+    events = [hub.publish("progress", "t1", {"seq": seq}) for seq in range(1, 7)]
+
+    resumed = hub.subscribe(last_event_id=events[3].id)
+    assert [event.data["seq"] for event in resumed.drain()] == [5, 6]
+    # 超出重放范围或来自上一次启动的 id 只能要求客户端重新同步
+    assert [event.kind for event in hub.subscribe(last_event_id=events[0].id).drain()] == ["reset"]
+    assert [event.kind for event in hub.subscribe(last_event_id="stale-3").drain()] == ["reset"]
+
+
+def test_task_manager_publishes_deltas(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+
+    async def collect():
+        subscriber = manager.events.subscribe(task_id="t1", loop=asyncio.get_running_loop())
+        record = TaskRecord(id="t1", stages=[Stage.prepare], requested_options=RunOptions())
+        with manager._lock:
+            manager._tasks[record.id] = record
+            manager._apply_stage_event_locked(record, "start", "prepare", None, record.created_at)
+            manager._append_progress_locked(record, {"message": "hello", "stage": "prepare"})
+            manager._persist_locked(record)
+        assert await subscriber.wait(1.0)
+        return subscriber.drain()
+
+    try:
+        events = asyncio.run(collect())
+        assert [event.kind for event in events] == ["stage", "progress", "task"]
+        assert events[1].data["seq"] == 1 and events[1].data["message"] == "hello"
+        assert events[2].data["last_progress_seq"] == 1
+        assert "progress_messages" not in events[2].data
+        assert events[2].encode().startswith(f"id: {events[2].id}\nevent: task\ndata: ")
+    finally:
+        manager.shutdown()
@@ -0,0 +1,88 @@
+import copy
+
+from cxvoyager.core.deployment import plan_checkpoint
+from cxvoyager.integrations.excel.planning_sheet_parser import section_fingerprints
+
+
+def _parsed():
+    return {
+        "hosts": {
+            "records": [
+                {"序号": 1, "SMTX主机名": "node-01", "管理地址": "10.0.0.11", "集群VIP": "10.0.0.10"},
+                {"序号": 2, "SMTX主机名": "node-02", "管理地址": "10.0.0.12", "集群VIP": "10.0.0.10"},
+            ],
+            "extra": {"cluster_function": "Boost", "cluster_serial": None},
+        },
+        "virtual_network": {
+            "records": [
+                {"网络标识": "default", "subnetwork": "10.0.0.0/24", "vlan_id": 0},
+                {"网络标识": "business_01", "subnetwork": "10.1.0.0/24", "vlan_id": 100},
+            ]
+        },
+        "mgmt": {
+            "records": [
+                {"Cloudtower IP": "10.0.0.2", "Cloudtower 序列号": None, "NTP 服务器": ["10.0.0.1"], "DNS 服务器": ["10.0.0.53"]}
+            ]
+        },
+        "_meta": {"content_hash": "h1"},
+    }
+
+
+def test_section_fingerprints_ignore_formatting_and_write_backs():
+    parsed = _parsed()
+    edited = copy.deepcopy(parsed)
+    edited["hosts"]["records"][0]["管理地址"] = " 10.0.0.11 "
+    edited["mgmt"]["records"][0]["Cloudtower 序列号"] = "SN-1"  # 运行中回写的序列号
+    edited["hosts"]["extra"]["cluster_serial"] = "SN-2"
+    assert section_fingerprints(edited) == section_fingerprints(parsed)
+
+    edited["virtual_network"]["records"][1]["vlan_id"] = 200
+    changed = {k for k, v in section_fingerprints(edited).items() if section_fingerprints(parsed)[k] != v}
+    assert changed == {"network:business_01"}
+
+
+def test_diff_maps_changed_sections_to_stages(tmp_path, monkeypatch):
+    monkeypatch.setenv("CXVOYAGER_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    plan_file = tmp_path / "plan.xlsx"
+    parsed = _parsed()
+    assert plan_checkpoint.diff_plan(plan_file, parsed)["checkpoint"] is None
+
+    plan_checkpoint.record_run_checkpoint(plan_file, parsed, ["prepare", "init_cluster", "config_cluster"])
+    unchanged = plan_checkpoint.diff_plan(plan_file, parsed)
+    assert unchanged["checkpoint"] and unchanged["stages"] == [] and unchanged["rerun_stages"] == []
+
+    edited = copy.deepcopy(parsed)
+    edited["mgmt"]["records"][0]["NTP 服务器"] = ["10.0.0.123"]
+    result = plan_checkpoint.diff_plan(plan_file, edited)
+    assert result["sections"] == {"ntp_dns": {"status": "changed", "fields": ["NTP 服务器"]}}
+    assert [(item["stage"], item["steps"]) for item in result["stages"]] == [
+        ("config_cluster", ["配置 DNS", "配置 NTP"])
+    ]
+    assert result["rerun_stages"] == ["prepare", "config_cluster"]
+    assert "deploy_cloudtower" in result["downstream"]
+
+
+def test_checkpoint_keeps_password_digests_keyed_and_private(tmp_path, monkeypatch):
+    import json
+    import os
+
+    from cxvoyager.integrations.excel.planning_sheet_parser import plan_section_fields
+
+    monkeypatch.setenv("CXVOYAGER_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    plan_file = tmp_path / "plan.xlsx"
+    parsed = _parsed()
+    parsed["hosts"]["records"][0]["主机SSH密码"] = "s3cret-ssh"
+    parsed["mgmt"]["records"][0]["root密码"] = "s3cret-root"
+    assert not any("密码" in key for fields in plan_section_fields(parsed).values() for key in fields)
+
+    path = plan_checkpoint.record_run_checkpoint(plan_file, parsed, ["prepare", "deploy_cloudtower"])
+    assert os.stat(path).st_mode & 0o077 == 0
+    sections = json.loads(path.read_text(encoding="utf-8"))["stages"]["prepare"]["sections"]
+    digest = sections["mgmt_components"]["root密码"]
+    assert len(digest) == 64  # HMAC-SHA256，而非可穷举的短摘要
+    assert digest not in json.dumps(plan_section_fields(parsed, secret=b"other"), ensure_ascii=False)
+
+    edited = copy.deepcopy(parsed)
+    edited["mgmt"]["records"][0]["root密码"] = "rotated"
+    result = plan_checkpoint.diff_plan(plan_file, edited)
+    assert result["sections"] == {"mgmt_components": {"status": "changed", "fields": ["root密码"]}}
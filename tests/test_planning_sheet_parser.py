@@ -0,0 +1,335 @@
+import openpyxl
+
+from cxvoyager.integrations.excel import planning_sheet_parser as parser
+
+
+def _write_plan(path, vip):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "主机规划"
+    sheet["C3"] = "cluster-a"
+    sheet["I19"] = vip
+    workbook.save(path)
+
+
+def test_parse_plan_caches_by_content(tmp_path, monkeypatch):
+    monkeypatch.setenv("CXVOYAGER_PLAN_CACHE_DIR", str(tmp_path / "cache"))
+    parser.clear_plan_cache()
+    plan_path = tmp_path / "plan.xlsx"
+    _write_plan(plan_path, "10.0.0.10")
+
+    calls = []
+    original = openpyxl.load_workbook
+    monkeypatch.setattr(parser.openpyxl, "load_workbook", lambda *a, **kw: calls.append(a) or original(*a, **kw))
+
+    first = parser.parse_plan(plan_path)
+    first["variables"]["CLUSTER_VIP"] = "mutated"  # 调用方修改返回值不影响缓存
+    second = parser.parse_plan(plan_path)
+    assert len(calls) == 1
+    assert second["variables"]["CLUSTER_VIP"] == "10.0.0.10"
+    assert second["_meta"]["content_hash"] == parser.plan_fingerprint(plan_path)
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 1
+
+    # 进程内缓存清空后从磁盘缓存读取
+    parser.clear_plan_cache()
+    assert parser.parse_plan(plan_path)["variables"]["CLUSTER_VIP"] == "10.0.0.10"
+    assert len(calls) == 1
+
+    # 文件内容变化后自动重新解析
+    _write_plan(plan_path, "10.0.0.20")
+    assert parser.parse_plan(plan_path)["variables"]["CLUSTER_VIP"] == "10.0.0.20"
+    assert len(calls) == 2
+
+
+def test_disk_cache_never_stores_passwords(tmp_path, monkeypatch):
+    import os
+    import time
+
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("CXVOYAGER_PLAN_CACHE_DIR", str(cache_dir))
+    parser.clear_plan_cache()
+    plan_path = tmp_path / "plan.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "主机规划"
+    sheet["B3"], sheet["I3"], sheet["K3"] = 1, "10.0.0.11", "s3cret-ssh"
+    sheet["M19"] = "s3cret-fisheye"
+    workbook.save(plan_path)
+
+    stale = cache_dir / "stale.json"
+    cache_dir.mkdir()
+    stale.write_text("{}", encoding="utf-8")
+    os.utime(stale, (time.time() - 30 * 24 * 3600,) * 2)
+
+    parsed = parser.parse_plan(plan_path)
+    assert parsed["hosts"]["records"][0]["主机SSH密码"] == "s3cret-ssh"
+    (entry,) = cache_dir.glob("*.json")  # 过期条目已清理
+    assert "s3cret" not in entry.read_text(encoding="utf-8")
+    assert entry.stat().st_mode & 0o777 == 0o600
+
+    # 新进程：不需要凭据的调用方直接使用磁盘缓存，其余调用方重新读取 Excel
+    parser.clear_plan_cache()
+    calls = []
+    original = openpyxl.load_workbook
+    monkeypatch.setattr(parser.openpyxl, "load_workbook", lambda *a, **kw: calls.append(a) or original(*a, **kw))
+    redacted = parser.parse_plan(plan_path, credentials=False)
+    assert calls == [] and redacted["variables"]["FISHEYE_ADMIN_PASSWORD"] == parser.REDACTED
+    assert redacted["_meta"]["redacted"] == ["FISHEYE_ADMIN_PASSWORD", "hosts.ssh_password"]
+    assert parser.parse_plan(plan_path)["variables"]["FISHEYE_ADMIN_PASSWORD"] == "s3cret-fisheye"
+    assert len(calls) == 1
+
+
+def test_batched_extraction_matches_cell_lookup(tmp_path):
+    plan_path = tmp_path / "plan.xlsx"
+    _write_plan(plan_path, " 10.0.0.10\n")
+    workbook = openpyxl.load_workbook(plan_path, data_only=True, read_only=True)
+    try:
+        values, tables, missing = parser._extract_variables(workbook)
+    finally:
+        workbook.close()
+
+    assert list(values) == list(parser.plan_vars.PLAN_VARIABLES)
+    assert values["CLUSTER_VIP"] == "10.0.0.10"
+    assert values["HOST_CLUSTER_NAME"] == "cluster-a"
+    assert values["FISHEYE_ADMIN_USER"] == "root"  # 空单元格回退默认值
+    assert "虚拟网络" in missing and "主机规划" not in missing
+    assert tables == {"business_networks": [], "hosts": []}
+
+
+def test_plan_writeback_batches_cells_into_one_save(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from cxvoyager.integrations.excel import plan_writeback
+
+    plan_path = tmp_path / "plan.xlsx"
+    _write_plan(plan_path, "10.0.0.10")
+    cluster_serial = parser.plan_vars.PlanVariable("CLUSTER_SERIAL", "主机规划", "D3")
+    tower_serial = parser.plan_vars.PlanVariable("CLOUDTOWER_SERIAL", "主机规划", "D4")
+
+    saves = []
+    original = openpyxl.Workbook.save
+    monkeypatch.setattr(openpyxl.Workbook, "save", lambda self, path: saves.append(path) or original(self, path))
+
+    ctx = SimpleNamespace(extra={plan_writeback.PLAN_WRITEBACK_KEY: plan_writeback.PlanWriteBackJournal()})
+    assert plan_writeback.queue_plan_update(ctx, plan_path, cluster_serial, "SN-1", source="config_cluster")
+    assert plan_writeback.queue_plan_update(ctx, plan_path, tower_serial, "SN-2", source="deploy_cloudtower")
+    assert saves == []
+    assert plan_writeback.flush_plan_writeback(ctx) == [{"path": str(plan_path.resolve()), "status": "ok", "cells": 2}]
+    assert len(saves) == 1
+
+    sheet = openpyxl.load_workbook(plan_path)["主机规划"]
+    assert (sheet["D3"].value, sheet["D4"].value, sheet["I19"].value) == ("SN-1", "SN-2", "10.0.0.10")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["plan.xlsx", "plan.xlsx.bak"]
+    with (tmp_path / "plan.xlsx.bak").open("rb") as backup:  # 备份保留写入前的内容
+        assert openpyxl.load_workbook(backup)["主机规划"]["D3"].value is None
+
+    # 没有回写日志时立即写入
+    assert not plan_writeback.queue_plan_update(SimpleNamespace(extra={}), plan_path, cluster_serial, "SN-3")
+    assert openpyxl.load_workbook(plan_path)["主机规划"]["D3"].value == "SN-3"
+
+
+def test_validate_plans_reports_cross_plan_conflicts(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from cxvoyager.core.validation import batch_validation
+
+    results = {
+        "a.xlsx": [("10.0.0.11", "mgmt:a1"), ("192.168.0.1", "storage:a1")],
+        "b.xlsx": [("10.0.0.11", "mgmt:b1"), ("192.168.0.1", "storage:b1"), ("10.0.0.30", "cluster_vip")],
+        "c.xlsx": None,
+    }
+
+    def _runner(plan_file):
+        addresses = results[plan_file.rsplit("/", 1)[-1]]
+        if addresses is None:
+            raise ValueError("broken workbook")
+        return {"plan_file": plan_file, "status": "ok", "addresses": addresses, "timing": {"parse": 0.01}}
+
+    plans = [tmp_path / name for name in results]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        result = batch_validation.validate_plans(plans, executor=pool, runner=_runner)
+
+    data = result.to_dict()
+    assert not result.ok
+    assert [item["status"] for item in data["items"]] == ["ok", "ok", "failed"]
+    assert [(item["ip"], item["severity"]) for item in data["conflicts"]] == [
+        ("10.0.0.11", "error"),
+        ("192.168.0.1", "warning"),
+    ]
+    assert "addresses" not in data["items"][0]
+    assert "10.0.0.11" in result.to_markdown()
+
+
+def test_validate_plans_allows_shared_cloudtower(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from cxvoyager.core.validation import batch_validation
+
+    results = {
+        "a.xlsx": [("10.0.0.11", "mgmt:a1"), ("10.0.9.5", "component:cloudtower"), ("10.0.9.6", "component:obs")],
+        "b.xlsx": [("10.0.1.11", "mgmt:b1"), ("10.0.9.5", "component:cloudtower"), ("10.0.9.6", "cluster_vip")],
+    }
+
+    def _runner(plan_file):
+        return {"plan_file": plan_file, "status": "ok", "addresses": results[plan_file.rsplit("/", 1)[-1]]}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        result = batch_validation.validate_plans([tmp_path / name for name in results], executor=pool, runner=_runner)
+
+    # 同一 CloudTower 被两个集群接入为共享；OBS 地址在另一规划表中被用作 VIP 仍是错误
+    assert [(item["ip"], item["severity"]) for item in result.conflicts] == [("10.0.9.6", "error"), ("10.0.9.5", "shared")]
+    del results["b.xlsx"][2]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert batch_validation.validate_plans([tmp_path / name for name in results], executor=pool, runner=_runner).ok
+
+
+def test_validate_plan_file_on_template_copies(tmp_path, monkeypatch):
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor
+    from pathlib import Path
+
+    from cxvoyager.core.validation.batch_validation import validate_plans
+
+    monkeypatch.setenv("CXVOYAGER_PLAN_CACHE_DIR", "0")
+    template = next(Path(__file__).resolve().parents[1].glob("05.*.xlsx"))
+    plans = [shutil.copy(template, tmp_path / name) for name in ("a.xlsx", "b.xlsx")]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        result = validate_plans(plans, executor=pool)
+
+    assert [item["status"] for item in result.items] == ["ok", "ok"]
+    assert result.items[0]["timing"]["total"] >= result.items[0]["timing"]["parse"]
+    # 同一份规划表复制两次，全部地址都被两个集群占用
+    assert result.conflicts and not result.ok
+
+
+def test_compiled_json_plan_round_trip(tmp_path, monkeypatch):
+    import json
+    import shutil
+    from pathlib import Path
+
+    import pytest
+
+    from cxvoyager.integrations.excel import compiled_plan, plan_writeback
+
+    monkeypatch.setenv("CXVOYAGER_PLAN_CACHE_DIR", "0")
+    template = next(Path(__file__).resolve().parents[1].glob("05.*.xlsx"))
+    workbook = Path(shutil.copy(template, tmp_path / "plan.xlsx"))
+    target = compiled_plan.compile_plan(workbook)
+    assert target == tmp_path / "plan.plan.json"
+
+    from_excel = parser.parse_plan(workbook)
+    calls = []
+    monkeypatch.setattr(parser.openpyxl, "load_workbook", lambda *a, **kw: calls.append(a))
+    loaded = parser.parse_plan(target)
+    assert calls == []  # JSON 规划不经过 openpyxl
+    assert {k: v for k, v in loaded.items() if k != "_meta"} == {k: v for k, v in from_excel.items() if k != "_meta"}
+    assert loaded["_meta"]["compiled_from"]["content_hash"] == from_excel["_meta"]["content_hash"]
+    assert parser.to_model(loaded).hosts
+
+    # 回写的单元格映射到变量，并同步到由变量派生的分段
+    plan_writeback.write_plan_cells(target, {(parser.plan_vars.CLUSTER_SERIAL.sheet, parser.plan_vars.CLUSTER_SERIAL.cell): "SN-1"})
+    reloaded = parser.parse_plan(target)
+    assert reloaded["variables"]["CLUSTER_SERIAL"] == "SN-1"
+    assert reloaded["hosts"]["extra"]["cluster_serial"] == "SN-1"
+    assert (tmp_path / "plan.plan.json.bak").exists()
+
+    document = json.loads(target.read_text(encoding="utf-8"))
+    document["version"] = compiled_plan.COMPILED_PLAN_VERSION + 1
+    with pytest.raises(compiled_plan.CompiledPlanError):
+        compiled_plan.validate_compiled_plan(document)
+    with pytest.raises(compiled_plan.CompiledPlanError):
+        compiled_plan.store_compiled_plan({"format": "cxvoyager-plan", "version": 1, "plan": {}}, tmp_path)
+    document["version"] = compiled_plan.COMPILED_PLAN_VERSION
+    stored = compiled_plan.store_compiled_plan(document, tmp_path / "store")
+    assert stored == compiled_plan.store_compiled_plan(document, tmp_path / "store")
+
+
+def test_host_and_business_tables_grow_past_template_rows(tmp_path):
+    from cxvoyager.integrations.excel import plan_writeback
+
+    workbook = openpyxl.Workbook()
+    hosts = workbook.active
+    hosts.title = "主机规划"
+    headers = ["序号", "集群名称", "设备S/N", "带外地址", "带外账号", "带外密码", "主机名", "管理地址", "SSH 用户名", "密码", "管理员账号", "密码", "存储IP"]
+    for offset, header in enumerate(headers):
+        hosts.cell(row=2, column=2 + offset, value=header)
+    for number in range(1, 41):  # 模板预留 16 行，这里 40 台主机，集群字段下移到第 43 行
+        row = number + 2
+        hosts[f"B{row}"], hosts[f"H{row}"], hosts[f"I{row}"] = number, f"node-{number:02d}", f"10.0.20.{10 + number}"
+    hosts["K3"] = "ssh-pass"
+    hosts["M3"] = "admin-pass"
+    hosts["H43"], hosts["I43"], hosts["Q44"] = "集群VIP", "10.0.20.10", "存储独立"
+    networks = workbook.create_sheet("虚拟网络")
+    for column, header in zip("BCDFGHI", ["集群名称", "虚拟交换机", "虚拟网络", "VLAN ID", "VLAN类型", "SubNetwork", "Gateway"]):
+        networks[f"{column}2"] = header
+    for offset in range(15):  # 超过原先 11 个业务网络的上限
+        networks[f"D{8 + offset}"], networks[f"H{8 + offset}"] = f"VLAN-{1200 + offset}", f"10.2.{offset}.0/24"
+    plan_path = tmp_path / "plan.xlsx"
+    workbook.save(plan_path)
+
+    parsed = parser.parse_plan(plan_path, use_cache=False)
+    records = parsed["hosts"]["records"]
+    assert len(records) == 40 and records[-1]["SMTX主机名"] == "node-40"
+    assert records[0]["主机SSH密码"] == "ssh-pass"  # 重名表头“密码”按所在列区分
+    assert records[1]["主机SSH用户名"] == "smartx" and records[1]["主机SSH密码"] == "HC!r0cks"
+    assert parsed["variables"]["CLUSTER_VIP"] == "10.0.20.10"
+    assert parsed["variables"]["NETWORK_ARCHITECTURE"] == "存储独立"
+    business = [r for r in parsed["virtual_network"]["records"] if r["网络标识"].startswith("business_")]
+    assert len(business) == 15 and business[-1]["subnetwork"] == "10.2.14.0/24"
+
+    # 回写集群序列号时同样定位到下移后的单元格
+    plan_writeback.write_plan_cells(plan_path, {("主机规划", parser.plan_vars.CLUSTER_SERIAL.cell): "SN-1"})
+    assert openpyxl.load_workbook(plan_path)["主机规划"]["E43"].value == "SN-1"
+    assert parser.parse_plan(plan_path, use_cache=False)["hosts"]["extra"]["cluster_serial"] == "SN-1"
+
+
+def test_host_table_ignores_blank_index_cells(tmp_path):
+    workbook = openpyxl.Workbook()
+    hosts = workbook.active
+    hosts.title = "主机规划"
+    headers = ["序号", "集群名称", "设备S/N", "带外地址", "带外账号", "带外密码", "主机名", "管理地址", "SSH 用户名", "密码", "管理员账号", "密码", "存储IP"]
+    for offset, header in enumerate(headers):
+        hosts.cell(row=2, column=2 + offset, value=header)
+    # 序号全部留空，第 5 行整行空白，第 8 至 11 行只预填了序号
+    for row, number in ((3, 1), (4, 2), (6, 3), (7, 4)):
+        hosts[f"H{row}"], hosts[f"I{row}"] = f"node-{number:02d}", f"10.0.20.{10 + number}"
+    for row in range(8, 12):
+        hosts[f"B{row}"], hosts[f"J{row}"] = row - 2, "smartx"
+    hosts["H12"], hosts["I12"], hosts["E12"] = "集群VIP", "10.0.20.10", "SN-9"
+    plan_path = tmp_path / "plan.xlsx"
+    workbook.save(plan_path)
+
+    parsed = parser.parse_plan(plan_path, use_cache=False)
+    names = [record["SMTX主机名"] for record in parsed["hosts"]["records"]]
+    assert names == ["node-01", "node-02", "node-03", "node-04"]
+    assert parsed["variables"]["CLUSTER_VIP"] == "10.0.20.10"
+    assert parsed["hosts"]["extra"]["cluster_serial"] == "SN-9"
+
+
+def test_read_only_scan_ignores_stale_sheet_dimension(tmp_path):
+    import re
+    import zipfile
+
+    workbook = openpyxl.Workbook()
+    hosts = workbook.active
+    hosts.title = "主机规划"
+    for column, header in zip("EHIN", ["带外地址", "主机名", "管理地址", "存储IP"]):
+        hosts[f"{column}2"] = header
+    for number in range(1, 4):
+        hosts[f"H{number + 2}"], hosts[f"I{number + 2}"] = f"node-{number:02d}", f"10.0.20.{10 + number}"
+    hosts["H6"], hosts["I6"] = "集群VIP", "10.0.20.10"
+    source = tmp_path / "source.xlsx"
+    workbook.save(source)
+
+    # 模拟只记录了 A1 尺寸的第三方工具输出
+    plan_path = tmp_path / "plan.xlsx"
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(plan_path, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb'<dimension ref="[^"]*" */>', b'<dimension ref="A1" />', data)
+            dst.writestr(item, data)
+
+    parsed = parser.parse_plan(plan_path, use_cache=False)
+    assert [record["SMTX主机名"] for record in parsed["hosts"]["records"]] == ["node-01", "node-02", "node-03"]
+    assert parsed["variables"]["CLUSTER_VIP"] == "10.0.20.10"
@@ -186,3 +186,132 @@ def test_run_ip_prechecks_propagates_has_error(monkeypatch, records, expected):
 
     report = run_ip_prechecks(ctx)
     assert report.has_error is expected
+
+
+def test_run_probe_tasks_overlaps_tcp_timeouts(monkeypatch):
+    import asyncio
+    import socket
+    import time
+
+    from cxvoyager.common import network_utils
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+    open_port = listener.getsockname()[1]
+
+    original = asyncio.open_connection
+
+    async def fake_open_connection(host, port, **kwargs):
+        if port == open_port:
+            return await original(host, port, **kwargs)
+        await asyncio.sleep(10)  # 模拟无响应地址，只能等待超时
+
+    monkeypatch.setattr(network_utils.asyncio, "open_connection", fake_open_connection)
+    tasks = [ProbeTask(target="127.0.0.1", kind="tcp", port=open_port, metadata={"ip": "open"})]
+    tasks += [ProbeTask(target="127.0.0.1", kind="tcp", port=1, timeout=0.3, metadata={"ip": f"10.0.0.{n}"}) for n in range(200)]
+    try:
+        started = time.perf_counter()
+        results = network_utils.run_probe_tasks(tasks, max_workers=256)
+        elapsed = time.perf_counter() - started
+    finally:
+        listener.close()
+
+    assert [result.task.metadata["ip"] for result in results] == [task.metadata["ip"] for task in tasks]
+    assert results[0].success and not any(result.success for result in results[1:])
+    assert results[1].detail == "tcp 1 unreachable"
+    assert elapsed < 2  # 200 个超时并行等待，约一个超时周期
+
+
+class FakeIcmpSocket:
+    """用 socketpair 模拟免 root ICMP 套接字：只回显存活地址，并像内核一样改写标识。"""
+
+    def __init__(self, alive):
+        import socket
+
+        self._rx, self._tx = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._rx.setblocking(False)
+        self.alive = set(alive)
+        self.sent = []
+
+    def fileno(self):
+        return self._rx.fileno()
+
+    def sendto(self, packet, address):
+        from cxvoyager.common.icmp_pinger import ICMP_ECHO_REPLY
+
+        self.sent.append(address[0])
+        if address[0] in self.alive:
+            header = self._reply_header(packet)
+            self._tx.send(address[0].encode().ljust(16) + b"\x08" + header[1:] + b"noise")  # 非应答报文被丢弃
+            self._tx.send(address[0].encode().ljust(16) + bytes([ICMP_ECHO_REPLY]) + header[1:] + packet[8:])
+
+    @staticmethod
+    def _reply_header(packet):
+        return packet[:4] + (4242).to_bytes(2, "big") + packet[6:8]
+
+    def recvfrom(self, size):
+        data = self._rx.recv(size)
+        return data[16:], (data[:16].decode().strip(), 0)
+
+    def close(self):
+        self._rx.close()
+        self._tx.close()
+
+
+def test_native_icmp_pings_many_targets_on_one_socket(monkeypatch):
+    import time
+    from functools import partial
+
+    from cxvoyager.common import network_utils
+    from cxvoyager.common.icmp_pinger import AsyncIcmpPinger
+
+    alive = {"10.0.0.1", "10.0.0.7", "10.0.0.42"}
+    sockets = []
+
+    def factory():
+        sockets.append(FakeIcmpSocket(alive))
+        return sockets[-1]
+
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("不应回退到 ping 子进程")
+
+    monkeypatch.setattr(network_utils, "native_icmp_available", lambda: True)
+    monkeypatch.setattr(network_utils, "AsyncIcmpPinger", partial(AsyncIcmpPinger, socket_factory=factory))
+    monkeypatch.setattr(network_utils.subprocess, "run", no_subprocess)
+
+    tasks = [ProbeTask(target=f"10.0.0.{n}", kind="icmp", timeout=0.3, metadata={"n": n}) for n in range(64)]
+    started = time.perf_counter()
+    results = network_utils.run_probe_tasks(tasks, max_workers=256)
+    assert time.perf_counter() - started < 1  # 亚秒级超时，所有目标同时等待
+
+    assert len(sockets) == 1 and len(sockets[0].sent) == 64
+    reachable = {result.task.target for result in results if result.success}
+    assert reachable == alive
+    assert all(result.rtt is not None and result.rtt < 0.3 for result in results if result.success)
+    assert results[2].detail == "icmp unreachable" and results[2].to_dict()["rtt"] is None
+
+    assert network_utils.ping_many(["10.0.0.7", "10.0.0.8"], timeout=0.2)["10.0.0.8"] is None
+    assert network_utils.probe_icmp("10.0.0.42", timeout=0.2).success
+
+
+def test_icmp_falls_back_to_ping_subprocess(monkeypatch):
+    from types import SimpleNamespace
+
+    from cxvoyager.common import network_utils
+
+    commands = []
+
+    def fake_run(command, **kwargs):
+        commands.append(command)
+        up = command[-1] == "10.0.0.1"
+        return SimpleNamespace(returncode=0 if up else 1, stdout="64 bytes from 10.0.0.1: icmp_seq=1 ttl=64 time=0.42 ms")
+
+    monkeypatch.setattr(network_utils, "native_icmp_available", lambda: False)
+    monkeypatch.setattr(network_utils.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(network_utils.subprocess, "run", fake_run)
+
+    result = network_utils.probe_icmp("10.0.0.1", timeout=0.5)
+    assert result.success and result.rtt == pytest.approx(0.00042)
+    assert commands[0] == ["ping", "-c", "1", "-W", "1", "10.0.0.1"]
+    assert network_utils.batch_connectivity(["10.0.0.2"], [22]) == {"10.0.0.2": {-1: False}}
@@ -7,8 +7,14 @@ from typing import cast
 
 from cxvoyager.common.config import Config
 from cxvoyager.core.deployment.progress import (
+    PAYLOAD_REF_KEY,
     PROGRESS_MESSAGES_KEY,
+    PROGRESS_PAYLOAD_STORE_KEY,
+    OverflowPolicy,
+    ProgressBuffer,
+    ProgressPayloadStore,
     create_stage_progress_logger,
+    get_progress_bus,
     record_progress,
 )
 from cxvoyager.core.deployment.runtime_context import RunContext
@@ -75,3 +81,68 @@ def test_stage_handler_uses_progress_logger_integration():
     assert last_entry['level'] == 'info'
     assert last_entry['message'].startswith('Mock 模式') or last_entry['message'].startswith('CloudTower 集群关联成功')
     assert ctx.extra.get('attach_cluster', {}).get('status') == 'SUCCESS'
+
+
+def test_progress_bus_isolates_slow_subscribers():
+    ctx = RunContext()
+    bus = get_progress_bus(ctx)
+    recent = bus.subscribe("recent", maxsize=2)
+    latest = bus.subscribe("latest", maxsize=10, policy=OverflowPolicy.coalesce)
+    delivered = []
+    bus.subscribe("forward", policy=OverflowPolicy.block, handler=delivered.append)
+
+    for index in range(5):
+        record_progress(ctx, f"第 {index} 步", stage=Stage.prepare)
+
+    assert [entry["message"] for entry in recent.drain()] == ["第 3 步", "第 4 步"]
+    assert [entry["message"] for entry in latest.drain()] == ["第 4 步"]
+    metrics = bus.metrics()
+    assert metrics["recent"]["dropped"] == 3
+    assert metrics["latest"]["coalesced"] == 4
+    bus.close()
+    assert [entry["message"] for entry in delivered] == [f"第 {index} 步" for index in range(5)]
+    assert len(ctx.extra[PROGRESS_MESSAGES_KEY]) == 5
+
+
+def test_progress_buffer_caps_levels_and_spills_unlogged_entries(caplog: pytest.LogCaptureFixture):
+    ctx = RunContext()
+    ctx.extra[PROGRESS_MESSAGES_KEY] = ProgressBuffer(retention={"debug": 2, "info": 1, "warning": None})
+    base = logging.getLogger("tests.progress.spill")
+    base.setLevel(logging.INFO)
+    stage_logger = create_stage_progress_logger(ctx, "prepare", logger=base)
+
+    with caplog.at_level(logging.INFO):
+        for index in range(4):
+            stage_logger.debug("调试 %d", index)  # INFO 级别下未写入日志
+        record_progress(ctx, "告警", level="warning")
+        stage_logger.info("信息 0")  # 已由适配器写入日志
+        record_progress(ctx, "信息 1", extra={"step": 1})
+        record_progress(ctx, "信息 2")
+
+    messages = ctx.extra[PROGRESS_MESSAGES_KEY]
+    assert [entry["message"] for entry in messages] == ["调试 2", "调试 3", "告警", "信息 2"]
+    assert messages.evicted == 4
+    text = [record.getMessage() for record in caplog.records]
+    assert sum("调试 0" in line for line in text) == 1 and sum("调试 1" in line for line in text) == 1
+    assert sum("信息 0" in line for line in text) == 1  # 淘汰时不重复写入
+    assert any("信息 1" in line and "'step': 1" in line for line in text)
+
+
+def test_large_progress_extra_is_externalized(tmp_path):
+    store = ProgressPayloadStore(tmp_path, inline_limit=256)
+    ctx = RunContext()
+    ctx.extra[PROGRESS_PAYLOAD_STORE_KEY] = store
+    report = {"hosts": [{"ip": f"10.0.0.{index}", "ok": True} for index in range(50)], "total": 50}
+
+    record_progress(ctx, "小数据", extra={"total": 1})
+    record_progress(ctx, "预检完成", extra=report)
+    record_progress(ctx, "预检完成", extra=report)
+
+    small, first, second = ctx.extra[PROGRESS_MESSAGES_KEY]
+    assert small["extra"] == {"total": 1}
+    assert first["extra"]["total"] == 50 and first["extra"]["hosts"] == "<list: 50 项>"
+    ref = first["extra"][PAYLOAD_REF_KEY]["ref"]
+    assert second["extra"][PAYLOAD_REF_KEY]["ref"] == ref
+    assert len(list(tmp_path.rglob("*.json.gz"))) == 1
+    assert store.load(ref) == report
+    assert store.load("../etc/passwd") is None
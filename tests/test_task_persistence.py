@@ -1,7 +1,9 @@
+import json
 from datetime import datetime, timezone
 
 from cxvoyager.core.deployment.deployment_executor import RunOptions
 from cxvoyager.core.deployment.stage_manager import Stage
+from cxvoyager.interfaces.web.api_models import task_summary_json
 from cxvoyager.interfaces.web.task_scheduler import TaskManager, TaskRecord, TaskStatus
 
 
@@ -29,6 +31,7 @@ def test_task_persistence_roundtrip(tmp_path):
     with manager._lock:
         manager._tasks[record.id] = record
         manager._persist_locked()
+    manager.flush()
     manager._executor.shutdown(wait=False)
 
     reloaded = TaskManager(storage_path=storage_path)
@@ -47,6 +50,7 @@ def test_running_tasks_marked_failed_on_reload(tmp_path):
     with manager._lock:
         manager._tasks[record.id] = record
         manager._persist_locked()
+    manager.flush()
     manager._executor.shutdown(wait=False)
 
     reloaded = TaskManager(storage_path=storage_path)
@@ -56,3 +60,207 @@ def test_running_tasks_marked_failed_on_reload(tmp_path):
     assert loaded.error == "服务重启时中断"
     assert any(event["event"] == "error" for event in loaded.stage_history)
     reloaded._executor.shutdown(wait=False)
+
+
+def test_store_appends_history_incrementally(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    record = _make_record("t2", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        for index in range(3):
+            manager._append_progress_locked(record, {"message": f"line {index}", "stage": "prepare"})
+            manager._persist_locked(record)
+    # 写入被合并，调用方不触发磁盘 I/O
+    assert manager._store.load(record.id) is None
+    assert manager.flush() == 1
+
+    with manager._lock:
+        manager._append_progress_locked(record, {"message": "line 3", "stage": "prepare"})
+        manager._persist_locked(record)
+    manager.flush()
+    stored = manager._store.load(record.id)
+    assert [item["message"] for item in stored["progress_messages"]] == ["line 0", "line 1", "line 2", "line 3"]
+    assert len(stored["stage_history"]) == 1
+    manager.shutdown()
+
+
+def test_legacy_json_archive_is_migrated(tmp_path):
+    legacy = tmp_path / "tasks.json"
+    record = _make_record("legacy", Stage.prepare, TaskStatus.done)
+    legacy.write_text(json.dumps([record.snapshot()]), encoding="utf-8")
+
+    manager = TaskManager(storage_path=legacy)
+    loaded = manager.get("legacy")
+    assert loaded is not None and loaded.status == TaskStatus.done
+    assert (tmp_path / "tasks.db").exists()
+    assert not legacy.exists()
+    manager.shutdown()
+
+
+def test_progress_cursor_returns_only_new_messages(tmp_path):
+    storage_path = tmp_path / "tasks.db"
+    manager = TaskManager(storage_path=storage_path, flush_interval=60)
+    record = _make_record("t3", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        for index in range(5):
+            manager._append_progress_locked(record, {"message": f"line {index}", "stage": "prepare"})
+        manager._persist_locked(record)
+    manager.flush()
+
+    items, last_seq = manager.progress(record.id, after=2, limit=2)
+    assert [item["seq"] for item in items] == [3, 4]
+    assert last_seq == 5
+    assert manager.progress("missing") is None
+
+    # 其他进程创建的任务从存档按游标读取
+    other = TaskManager(storage_path=tmp_path / "other.db")
+    other._store.close()
+    other._store = manager._store.__class__(storage_path)
+    items, last_seq = other.progress(record.id, after=4)
+    assert [item["message"] for item in items] == ["line 4"] and last_seq == 5
+    other.shutdown()
+    manager.shutdown()
+
+
+def test_progress_retention_evicts_only_persisted_messages(tmp_path):
+    manager = TaskManager(
+        storage_path=tmp_path / "tasks.db",
+        flush_interval=60,
+        progress_retention={"info": 2, "warning": None},
+    )
+    record = _make_record("t4", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        manager._track_progress(record, pinned_after=0)
+        for index in range(5):
+            level = "warning" if index == 1 else "info"
+            manager._append_progress_locked(record, {"message": f"line {index}", "level": level})
+        manager._persist_locked(record)
+    # 尚未落盘的消息不会被淘汰
+    assert len(record.progress_messages) == 5
+
+    manager.flush()
+    assert [item["seq"] for item in record.progress_messages] == [2, 4, 5]
+
+    # 游标落在已淘汰区间时从存档补齐
+    items, last_seq = manager.progress(record.id, after=0, limit=10)
+    assert [item["seq"] for item in items] == [1, 2, 3, 4, 5] and last_seq == 5
+    with manager._lock:
+        manager._append_progress_locked(record, {"message": "line 5"})
+    items, _ = manager.progress(record.id, after=4)
+    assert [item["seq"] for item in items] == [5, 6]
+    manager.shutdown()
+
+
+def test_gauge_progress_updates_in_place(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    record = _make_record("t5", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        manager._track_progress(record, pinned_after=0)
+        manager._append_progress_locked(record, {"message": "开始上传"})
+        manager._append_progress_locked(record, {"message": "10%", "gauge": "upload:iso"})
+        manager._persist_locked(record)
+    manager.flush()
+    with manager._lock:
+        manager._append_progress_locked(record, {"message": "60%", "gauge": "upload:iso"})
+        manager._append_progress_locked(record, {"message": "100%", "gauge": "upload:iso"})
+        manager._persist_locked(record)
+    manager.flush()
+
+    assert [(item["seq"], item["message"]) for item in record.progress_messages] == [(1, "开始上传"), (4, "100%")]
+    items, last_seq = manager._store.load_progress(record.id)
+    assert [(item["seq"], item["gauge"]) for item in items] == [(1, None), (4, "upload:iso")]
+    assert last_seq == 4
+    manager.shutdown()
+
+
+def test_summary_json_is_cached_per_version(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    record = _make_record("t6", Stage.prepare, TaskStatus.done)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        manager._persist_locked(record)
+    first = task_summary_json(record, detail=False)
+    assert task_summary_json(record, detail=False) is first
+    assert json.loads(first)["version"] == record.version == 1
+
+    with manager._lock:
+        manager._append_progress_locked(record, {"message": "新消息"})
+        manager._persist_locked(record)
+    updated = json.loads(task_summary_json(record, detail=False))
+    assert updated["version"] == 2 and updated["last_progress_seq"] == 1
+
+    manager.flush()
+    reloaded = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    assert reloaded.get(record.id).version == 2
+    assert reloaded.epoch != manager.epoch
+    reloaded.shutdown()
+    manager.shutdown()
+
+
+def test_readers_get_immutable_snapshots_without_lock(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    record = _make_record("t7", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        manager._persist_locked(record)
+        # 持有写锁时读取方仍可返回（锁不可重入，加锁读取会在此死锁）
+        before = manager.get(record.id)
+        assert [item.id for item in manager.list()] == [record.id]
+        manager._append_progress_locked(record, {"message": "新消息"})
+        record.status = TaskStatus.done
+        manager._persist_locked(record)
+
+    assert before is not record
+    assert before.status == TaskStatus.running and len(before.progress_messages) == 0
+    after = manager.get(record.id)
+    assert after.status == TaskStatus.done and after.version == before.version + 1
+    assert [item["message"] for item in after.progress_messages] == ["新消息"]
+
+    manager.delete(record.id)
+    assert manager.get(record.id) is None and manager.list() == []
+    manager.shutdown()
+
+
+def test_snapshots_share_history_instead_of_copying(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    record = _make_record("t8", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        for index in range(3):
+            manager._append_progress_locked(record, {"message": f"第 {index} 条"})
+        record.stage_history.append({"event": "start", "stage": "prepare", "at": None})
+        manager._persist_locked(record)
+        snapshots = manager._snapshots
+        frozen = manager.get(record.id)
+        manager._append_progress_locked(record, {"message": "之后的消息"})
+        record.stage_history.append({"event": "complete", "stage": "prepare", "at": None})
+        manager._persist_locked(record)
+
+    assert manager._snapshots is snapshots  # 已有任务原地替换，不复制整个字典
+    assert frozen.progress_messages._buffer is record.progress_messages  # 冻结时不复制缓冲
+    assert [item["message"] for item in frozen.progress_messages] == ["第 0 条", "第 1 条", "第 2 条"]
+    assert len(frozen.progress_messages) == 3 and len(frozen.stage_history) == len(record.stage_history) - 1
+    assert [event["event"] for event in frozen.stage_history][-1] == "start"
+    assert len(manager.get(record.id).progress_messages) == 4
+    manager.shutdown()
+
+
+def test_list_summary_carries_counts_instead_of_history(tmp_path):
+    manager = TaskManager(storage_path=tmp_path / "tasks.db", flush_interval=60)
+    record = _make_record("t9", Stage.prepare, TaskStatus.running)
+    with manager._lock:
+        manager._tasks[record.id] = record
+        manager._append_progress_locked(record, {"message": "新消息"})
+        manager._persist_locked(record)
+    snapshot = manager.get(record.id)
+
+    summary = json.loads(task_summary_json(snapshot, detail=False))
+    assert summary["stage_history"] == [] and summary["progress_messages"] == []
+    assert summary["stage_event_count"] == len(record.stage_history) > 0
+    assert summary["current_stage"] == record.current_stage and summary["last_progress_seq"] == 1
+    full = json.loads(task_summary_json(snapshot))
+    assert len(full["stage_history"]) == len(record.stage_history) and len(full["progress_messages"]) == 1
+    manager.shutdown()
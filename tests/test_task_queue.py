@@ -0,0 +1,146 @@
+import multiprocessing
+from datetime import datetime, timezone
+
+import pytest
+
+from cxvoyager.core.deployment.deployment_executor import EffectiveRunOptions, RunOptions, RunResult
+from cxvoyager.core.deployment.stage_manager import Stage
+from cxvoyager.core.deployment.task_queue import DurableTaskQueue, LeaseLostError
+from cxvoyager.core.deployment.task_worker import DeploymentWorker
+from cxvoyager.interfaces.web.task_scheduler import TaskManager, TaskStatus
+
+
+def _claim_until_empty(path, worker_id, results):
+    queue = DurableTaskQueue(path)
+    while True:
+        task = queue.claim(worker_id)
+        if task is None:
+            return
+        results.put((worker_id, task.id))
+
+
+def test_claim_is_exclusive_across_processes(tmp_path):
+    path = tmp_path / "queue.db"
+    queue = DurableTaskQueue(path)
+    for index in range(20):
+        queue.enqueue(f"t{index}", {"kind": "run", "stages": ["prepare"]})
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_claim_until_empty, args=(str(path), f"w{n}", results)) for n in range(3)]
+    for proc in workers:
+        proc.start()
+    for proc in workers:
+        proc.join(timeout=60)
+        assert proc.exitcode == 0
+
+    claimed = [results.get(timeout=5) for _ in range(20)]
+    assert sorted(task_id for _, task_id in claimed) == sorted(f"t{index}" for index in range(20))
+    assert results.empty()
+
+
+def _fake_run(stages, options, progress_callback=None, abort_signal=None):
+    started = datetime.now(timezone.utc)
+    for stage in stages:
+        progress_callback("start", stage, None)
+        progress_callback("complete", stage, None)
+    return RunResult(
+        completed_stages=[stage.value for stage in stages],
+        options=EffectiveRunOptions(dry_run=True, strict_validation=False, debug=False, log_level="INFO"),
+        started_at=started,
+        finished_at=datetime.now(timezone.utc),
+        summary={"ok": True},
+    )
+
+
+def _manager(tmp_path, queue):
+    # 轮询间隔足够长，由测试显式调用 sync_queue
+    return TaskManager(storage_path=tmp_path / "tasks.json", queue=queue, poll_interval=60, resource_resolver=lambda record: [])
+
+
+def _submit(manager, stages, options):
+    record = manager.submit(stages, options)
+    manager._admission.submit(lambda: None).result()  # 等待准入线程写入队列
+    return record
+
+
+def test_worker_progress_flows_back_to_coordinator(tmp_path):
+    queue = DurableTaskQueue(tmp_path / "queue.db")
+    manager = _manager(tmp_path, queue)
+    try:
+        record = _submit(manager, [Stage.prepare, Stage.init_cluster], RunOptions(dry_run=True))
+        assert record.status == TaskStatus.pending
+
+        worker = DeploymentWorker(DurableTaskQueue(queue.path), worker_id="w1", heartbeat_interval=0.05, run_fn=_fake_run)
+        assert worker.run_once() is True
+        manager.sync_queue()  # 协调线程启动时也会同步一次，这里不依赖由谁应用事件
+
+        loaded = manager.get(record.id)
+        assert loaded.status == TaskStatus.done
+        assert loaded.completed_stages == [Stage.prepare.value, Stage.init_cluster.value]
+        assert [event["event"] for event in loaded.stage_history] == ["start", "complete", "start", "complete"]
+        assert loaded.effective_options.dry_run is True
+        assert "w1" in loaded.progress_messages[0]["message"]
+        assert queue.fetch_events() == []
+    finally:
+        manager.shutdown()
+
+
+def test_coordinators_sharing_a_queue_keep_each_others_events(tmp_path):
+    queue = DurableTaskQueue(tmp_path / "queue.db")
+    first = _manager(tmp_path / "a", queue)
+    second = _manager(tmp_path / "b", DurableTaskQueue(queue.path))
+    try:
+        mine = _submit(first, [Stage.prepare], RunOptions(dry_run=True))
+        theirs = _submit(second, [Stage.prepare], RunOptions(dry_run=True))
+        worker = DeploymentWorker(DurableTaskQueue(queue.path), worker_id="w1", heartbeat_interval=0.05, run_fn=_fake_run)
+        assert worker.run_once() and worker.run_once()
+
+        first.sync_queue()
+        assert first.get(mine.id).status == TaskStatus.done
+        assert {event.task_id for event in queue.fetch_events()} == {theirs.id}  # 不删除其他进程的事件
+        second.sync_queue()
+        assert second.get(theirs.id).status == TaskStatus.done
+        assert queue.fetch_events() == []
+    finally:
+        first.shutdown()
+        second.shutdown()
+
+
+def test_abort_before_claim_and_stale_lease(tmp_path):
+    queue = DurableTaskQueue(tmp_path / "queue.db")
+    manager = _manager(tmp_path, queue)
+    try:
+        record = _submit(manager, [Stage.prepare], RunOptions())
+        manager.abort(record.id, "测试终止")
+        assert queue.claim("w1") is None
+        manager.sync_queue()
+        assert manager.get(record.id).status == TaskStatus.aborted
+
+        second = _submit(manager, [Stage.prepare], RunOptions())
+        task = queue.claim("w1")
+        assert task.id == second.id
+        assert queue.expire_stale(lease_timeout=-1) == [second.id]
+        with pytest.raises(LeaseLostError):
+            queue.heartbeat(second.id, "w1")
+        manager.sync_queue()
+        assert manager.get(second.id).status == TaskStatus.failed
+        assert "心跳超时" in manager.get(second.id).error
+    finally:
+        manager.shutdown()
+
+
+def test_claim_prefers_priority_and_skips_busy_resources(tmp_path):
+    queue = DurableTaskQueue(tmp_path / "queue.db")
+    queue.enqueue("deploy-1", {"resource_keys": ["cluster:1"]})
+    queue.enqueue("deploy-2", {"resource_keys": ["cluster:1"]})
+    queue.enqueue("deploy-3", {"resource_keys": ["cluster:2"]})
+    queue.enqueue("check", {"priority": 10})
+
+    assert queue.queued_positions() == {"check": 1, "deploy-1": 2, "deploy-2": 3, "deploy-3": 4}
+    assert queue.claim("w1").id == "check"
+    assert queue.claim("w1").id == "deploy-1"
+    assert queue.claim("w2").id == "deploy-3"
+    assert queue.claim("w3") is None
+    queue.finish("deploy-1", "w1", "done")
+    assert queue.claim("w3").id == "deploy-2"
@@ -0,0 +1,154 @@
+import os
+import time
+from datetime import datetime, timezone
+
+from cxvoyager.core.deployment.deployment_executor import EffectiveRunOptions, RunOptions, RunResult
+from cxvoyager.core.deployment.progress import record_progress
+from cxvoyager.core.deployment.runtime_context import RunContext
+from cxvoyager.core.deployment.stage_manager import Stage
+from cxvoyager.interfaces.web.task_scheduler import TaskManager, TaskStatus
+
+
+def _fake_run_in_child(stages, options, progress_callback=None, abort_signal=None):
+    started = datetime.now(timezone.utc)
+    ctx = RunContext()
+    for stage in stages:
+        progress_callback("start", stage, ctx)
+        record_progress(ctx, f"running {stage.value}", stage=stage)
+        ctx.completed_stages.append(stage.value)
+        progress_callback("complete", stage, ctx)
+    return RunResult(
+        completed_stages=list(ctx.completed_stages),
+        options=EffectiveRunOptions(dry_run=False, strict_validation=False, debug=False, log_level="INFO"),
+        started_at=started,
+        finished_at=datetime.now(timezone.utc),
+        summary={"pid": os.getpid()},
+    )
+
+
+def _wait_for(manager, task_id, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record = manager.get(task_id)
+        if record.status not in {TaskStatus.pending, TaskStatus.running}:
+            return record
+        time.sleep(0.1)
+    raise AssertionError("task did not finish in time")
+
+
+def test_run_task_executes_in_child_process(tmp_path):
+    manager = TaskManager(max_workers=1, storage_path=tmp_path / "tasks.json", run_fn=_fake_run_in_child)
+    try:
+        record = manager.submit([Stage.prepare, Stage.init_cluster], RunOptions())
+        finished = _wait_for(manager, record.id)
+        assert finished.status == TaskStatus.done
+        assert finished.summary["pid"] != os.getpid()
+        assert finished.completed_stages == [Stage.prepare.value, Stage.init_cluster.value]
+        assert [event["event"] for event in finished.stage_history] == ["start", "complete", "start", "complete"]
+        assert [item["message"] for item in finished.progress_messages] == ["running prepare", "running init_cluster"]
+        assert isinstance(finished.progress_messages[0]["at"], datetime)
+    finally:
+        manager.shutdown()
+
+
+def _scheduler(tmp_path, keys, **kwargs):
+    # 资源键按提交顺序依次分配（准入线程单线程执行）
+    pending_keys = iter(keys)
+    manager = TaskManager(
+        storage_path=tmp_path / "tasks.json",
+        resource_resolver=lambda record: next(pending_keys),
+        **kwargs,
+    )
+    launched = []
+    manager._launch = launched.extend
+    return manager, launched
+
+
+def _submit(manager, stages=(Stage.prepare, Stage.init_cluster)):
+    record = manager.submit(list(stages), RunOptions())
+    manager._admission.submit(lambda: None).result()
+    return record
+
+
+def test_scheduler_serializes_conflicting_tasks_without_head_of_line_blocking(tmp_path):
+    keys = [["cluster:10.0.0.10"], ["cluster:10.0.0.10"], ["cluster:10.0.0.20"]]
+    manager, launched = _scheduler(tmp_path, keys, max_workers=2)
+    try:
+        first = _submit(manager)
+        blocked = _submit(manager)
+        other = _submit(manager)
+        assert launched == [first, other]
+        assert blocked.status == TaskStatus.pending
+        assert blocked.queue_position == 1
+        assert blocked.resource_keys == ["cluster:10.0.0.10"]
+
+        manager._finish_and_dispatch(first)
+        assert launched[-1] is blocked
+        assert blocked.queue_position is None
+    finally:
+        manager.shutdown()
+
+
+def test_quick_checks_bypass_long_deployments(tmp_path):
+    keys = [["cloudtower:10.0.0.2"], ["cloudtower:10.0.0.3"]]
+    manager, launched = _scheduler(tmp_path, keys, max_workers=1, quick_concurrency=1)
+    try:
+        deploy = _submit(manager)
+        waiting = _submit(manager)
+        quick = _submit(manager, stages=(Stage.prepare,))
+        assert launched == [deploy, quick]
+        assert quick.priority == 10 and quick.resource_keys == []
+        assert waiting.queue_position == 1
+
+        manager.abort(waiting.id)
+        manager._finish_and_dispatch(deploy)
+        assert launched == [deploy, quick]
+        assert waiting.status == TaskStatus.aborted
+    finally:
+        manager.shutdown()
+
+
+def test_run_payload_passes_plan_file_only_when_set(tmp_path):
+    from threading import Event
+
+    from cxvoyager.core.deployment.task_worker import execute_payload
+
+    seen = []
+
+    def _run(stages, options, progress_callback=None, abort_signal=None, **kwargs):
+        seen.append(kwargs)
+        return _fake_run_in_child(stages, options, progress_callback, abort_signal)
+
+    manager = TaskManager(storage_path=tmp_path / "tasks.json", resource_resolver=lambda record: [])
+    manager._launch = lambda records: None
+    try:
+        record = manager.submit([Stage.prepare], RunOptions(), plan_file=str(tmp_path / "a.plan.json"))
+        assert record.plan_files == [str(tmp_path / "a.plan.json")]
+        payload = manager._running[record.id]["payload"]
+    finally:
+        manager.shutdown()
+
+    execute_payload(payload, lambda kind, data: None, Event(), run_fn=_run)
+    execute_payload({**payload, "plan_file": None}, lambda kind, data: None, Event(), run_fn=_run)
+    assert [str(item.get("plan_file")) if item else None for item in seen] == [str(tmp_path / "a.plan.json"), None]
+
+
+def test_task_manager_is_built_on_first_use(tmp_path, monkeypatch):
+    import importlib
+
+    from cxvoyager.interfaces.web import task_scheduler
+
+    importlib.import_module("cxvoyager.interfaces.web.web_server")
+    assert task_scheduler._task_manager is None  # 导入不创建任务库与线程
+
+    built = []
+
+    def _build():
+        built.append(TaskManager(max_workers=1, storage_path=tmp_path / "tasks.json", run_fn=_fake_run_in_child))
+        return built[-1]
+
+    monkeypatch.setattr(task_scheduler, "_build_task_manager", _build)
+    assert task_scheduler.get_task_manager() is task_scheduler.get_task_manager()
+    assert len(built) == 1
+    task_scheduler.shutdown_task_manager()
+    assert task_scheduler._task_manager is None